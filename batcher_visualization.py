@@ -1,6 +1,17 @@
+import bisect
+import math
+
+
+# how the tracker picks between free intervals that are all large enough
+FIRST_FIT = "first_fit"  # the free interval with the lowest start index
+BEST_FIT = "best_fit"  # the smallest free interval
+SIZE_CLASS = "size_class"  # the lowest free interval in the smallest power of two size class whose intervals all fit
+ALLOCATION_POLICIES = (FIRST_FIT, BEST_FIT, SIZE_CLASS)
+
+
 class Printer:
-    def __init__(self, array_size=10, logging_enabled=False):
-        self.fixed_array = FixedSizeArray(array_size, logging_enabled)
+    def __init__(self, array_size=10, logging_enabled=False, policy=FIRST_FIT):
+        self.fixed_array = FixedSizeArray(array_size, logging_enabled, policy)
         self.queue = []  # List to store queued items for printing
 
     def queue_print(self, id, string, replace=False):
@@ -39,10 +50,27 @@ class Printer:
         self.queue.clear()
 
 class FixedSizeArrayTracker:
-    def __init__(self, size, logging_enabled=False):
+    def __init__(self, size, logging_enabled=False, policy=FIRST_FIT):
+        if policy not in ALLOCATION_POLICIES:
+            raise ValueError(f"Unknown allocation policy '{policy}', expected one of {ALLOCATION_POLICIES}.")
+
         self.size = size
         self.metadata = {}  # Map from ID to (start_index, length)
+        self.start_to_id = {}  # Map from start_index to the ID stored there
         self.logging_enabled = logging_enabled  # Control logging
+        self.policy = policy
+        # free space index, every free interval is stored several times so that we can coalesce by address and search
+        # by address, size or size class
+        self.free_starts = []  # Sorted list of the start index of every free interval
+        self.free_start_to_length = {}  # Map from free interval start to its length
+        self.free_length_and_start = []  # Sorted list of (length, start) for every free interval
+        self.size_class_to_free_starts = {}  # Map from floor(log2(length)) to the sorted starts of free intervals in that class
+        # Max segment tree over the start indices, leaf i holds the length of the free interval starting at i (0 when
+        # none does) and every other node the longest length below it
+        self.free_length_tree_leaf_count = 1
+        self.max_free_length_tree = []
+        self._build_free_length_tree()
+        self._insert_free_interval(0, size)
 
     def _log(self, message):
         """Logs a message if logging is enabled."""
@@ -50,30 +78,127 @@ class FixedSizeArrayTracker:
             print(f"[LOG]: {message}")
             print(self)
 
+    def _insert_free_interval(self, start, length):
+        """Marks the given interval as free, merging it with any free interval directly before or after it."""
+        if length <= 0:
+            return
+
+        i = bisect.bisect_left(self.free_starts, start)
+
+        # merge with the free interval that ends exactly where this one starts
+        if i > 0:
+            previous_start = self.free_starts[i - 1]
+            previous_length = self.free_start_to_length[previous_start]
+            if previous_start + previous_length == start:
+                self._remove_free_interval(previous_start)
+                start = previous_start
+                length += previous_length
+                i -= 1
+
+        # merge with the free interval that starts exactly where this one ends
+        if i < len(self.free_starts) and self.free_starts[i] == start + length:
+            next_start = self.free_starts[i]
+            length += self.free_start_to_length[next_start]
+            self._remove_free_interval(next_start)
+
+        bisect.insort(self.free_starts, start)
+        self.free_start_to_length[start] = length
+        bisect.insort(self.free_length_and_start, (length, start))
+        bisect.insort(self.size_class_to_free_starts.setdefault(self._size_class(length), []), start)
+        self._set_free_length(start, length)
+
+    def _remove_free_interval(self, start):
+        """Removes the free interval beginning at start from the free space index."""
+        length = self.free_start_to_length.pop(start)
+        del self.free_starts[bisect.bisect_left(self.free_starts, start)]
+        del self.free_length_and_start[bisect.bisect_left(self.free_length_and_start, (length, start))]
+        size_class_starts = self.size_class_to_free_starts[self._size_class(length)]
+        del size_class_starts[bisect.bisect_left(size_class_starts, start)]
+        self._set_free_length(start, 0)
+
+    def _build_free_length_tree(self):
+        """Sizes the free length tree to the array and fills it from the free intervals."""
+        self.free_length_tree_leaf_count = 1
+        while self.free_length_tree_leaf_count < self.size:
+            self.free_length_tree_leaf_count *= 2
+
+        self.max_free_length_tree = [0] * (2 * self.free_length_tree_leaf_count)
+        for start, length in self.free_start_to_length.items():
+            self.max_free_length_tree[self.free_length_tree_leaf_count + start] = length
+        for node in range(self.free_length_tree_leaf_count - 1, 0, -1):
+            self.max_free_length_tree[node] = max(self.max_free_length_tree[2 * node], self.max_free_length_tree[2 * node + 1])
+
+    def _set_free_length(self, start, length):
+        """Records the length of the free interval beginning at start in the free length tree, 0 when there is none."""
+        node = self.free_length_tree_leaf_count + start
+        self.max_free_length_tree[node] = length
+        node //= 2
+        while node > 0:
+            self.max_free_length_tree[node] = max(self.max_free_length_tree[2 * node], self.max_free_length_tree[2 * node + 1])
+            node //= 2
+
+    @staticmethod
+    def _size_class(length):
+        """Returns the size class of a length, every length in class k is in [2^k, 2^(k + 1))."""
+        return length.bit_length() - 1
+
+    def _find_free_interval_containing(self, start, length):
+        """Returns the start of the free interval that fully contains [start, start + length), or None."""
+        i = bisect.bisect_right(self.free_starts, start) - 1
+        if i < 0:
+            return None
+        free_start = self.free_starts[i]
+        if start + length <= free_start + self.free_start_to_length[free_start]:
+            return free_start
+        return None
+
     def _find_space(self, length):
-        """Finds a contiguous block of empty space of the given length."""
-        empty_start = None
-        empty_count = 0
+        """Finds a contiguous block of empty space of the given length using the tracker's policy."""
+        if length == 0:
+            # an empty range takes no space, it goes into free space when there is some and fits even when the array is full
+            start = self._find_space(1)
+            return 0 if start is None else start
+        if self.policy == FIRST_FIT:
+            return self._find_space_first_fit(length)
+        if self.policy == BEST_FIT:
+            return self._find_space_best_fit(length)
+        if self.policy == SIZE_CLASS:
+            return self._find_space_size_class(length)
+        raise ValueError(f"Unknown allocation policy '{self.policy}'.")
+
+    def _find_space_first_fit(self, length):
+        """Returns the lowest free interval that can hold length."""
+        # walk down the free length tree towards the leftmost subtree that has a free interval long enough
+        if self.max_free_length_tree[1] < length:
+            return None
 
-        for i in range(self.size):
-            if any(start <= i < start + length for start, length in self.metadata.values()):
-                # If there's a conflict, reset the counter
-                empty_start = None
-                empty_count = 0
-            elif empty_start is None:
-                # Start tracking empty space
-                empty_start = i
-                empty_count = 1
-            else:
-                # Increment empty space count
-                empty_count += 1
+        node = 1
+        while node < self.free_length_tree_leaf_count:
+            node = 2 * node if self.max_free_length_tree[2 * node] >= length else 2 * node + 1
+        return node - self.free_length_tree_leaf_count
 
-            # Check if we've found enough space
-            if empty_count == length:
-                return empty_start
+    def _find_space_best_fit(self, length):
+        """Returns the smallest free interval that can hold length, ties are broken by the lowest start index."""
+        i = bisect.bisect_left(self.free_length_and_start, (length, -1))
+        if i == len(self.free_length_and_start):
+            return None
+        _, start = self.free_length_and_start[i]
+        return start
 
-        # If no sufficient space found, return None
-        return None
+    def _find_space_size_class(self, length):
+        """
+        Returns the lowest free interval in the smallest size class whose intervals can all hold length, or the lowest
+        one that can hold it in the class length falls into when every larger class is empty.
+        """
+        # every interval in the class that length rounds up to, or in any larger one, is long enough
+        smallest_fitting_size_class = (length - 1).bit_length()
+        for size_class in range(smallest_fitting_size_class, self.size.bit_length()):
+            starts = self.size_class_to_free_starts.get(size_class)
+            if starts:
+                return starts[0]
+
+        # any interval that is still long enough is in the class length falls into, as every larger one is empty
+        return self._find_space_first_fit(length)
 
     def add_metadata(self, id, start, length):
         """Adds metadata for a specific ID."""
@@ -85,36 +210,132 @@ class FixedSizeArrayTracker:
             self._log("Error: Metadata exceeds array bounds.")
             return
 
-        if any(start <= i < start + length for i in range(self.size) for _, (s, l) in self.metadata.items() if s <= i < s + l):
-            self._log("Error: Overlapping metadata.")
-            return
+        # an empty range takes no space, so it can't overlap anything and there is nothing to carve
+        if length > 0:
+            free_start = self._find_free_interval_containing(start, length)
+            if free_start is None:
+                self._log("Error: Overlapping metadata.")
+                return
+
+            # carve the used space out of the free interval, giving back what's left on either side
+            free_length = self.free_start_to_length[free_start]
+            self._remove_free_interval(free_start)
+            self._insert_free_interval(free_start, start - free_start)
+            self._insert_free_interval(start + length, free_start + free_length - (start + length))
 
         self.metadata[id] = (start, length)
+        # empty ranges take no space, so another range can start at the same index, only the real one is tracked
+        if length > 0:
+            self.start_to_id[start] = id
         self._log(f"Added metadata: ID={id}, start={start}, length={length}")
 
     def remove_metadata(self, id):
         """Removes metadata for a specific ID."""
         if id in self.metadata:
-            del self.metadata[id]
+            start, length = self.metadata.pop(id)
+            if length > 0:
+                del self.start_to_id[start]
+            self._insert_free_interval(start, length)
             self._log(f"Removed metadata for ID={id}")
         else:
             self._log(f"ID '{id}' not found.")
 
+    def resize_in_place(self, id, length):
+        """
+        Changes the length of the range used by an ID without moving it, it can always shrink but only grows into
+        free space directly after it. Returns whether the range could be resized.
+        """
+        if id not in self.metadata:
+            return False
+
+        start, old_length = self.metadata[id]
+        if length > old_length:
+            next_length = self.free_start_to_length.get(start + old_length, 0)
+            if old_length + next_length < length:
+                return False
+            self._remove_free_interval(start + old_length)
+            self._insert_free_interval(start + length, old_length + next_length - length)
+        else:
+            self._insert_free_interval(start + length, old_length - length)
+
+        if old_length == 0 and length > 0:
+            self.start_to_id[start] = id
+        elif old_length > 0 and length == 0:
+            del self.start_to_id[start]
+        self.metadata[id] = (start, length)
+        self._log(f"Resized metadata in place: ID={id}, start={start}, length={length}")
+        return True
+
     def get_metadata(self, id):
         """Retrieves the metadata for the given ID."""
         return self.metadata.get(id, None)
 
     def compact(self):
-        """Compacts the metadata by removing gaps."""
+        """
+        Compacts the metadata by removing gaps. Returns the (id, old_start, new_start, length) of every range that
+        moved, in order of increasing start, so that moving the real data in that order never clobbers live data.
+        """
         new_metadata = {}
+        relocations = []
         current_index = 0
 
         for id, (start, length) in sorted(self.metadata.items(), key=lambda x: x[1][0]):
             new_metadata[id] = (current_index, length)
+            if start != current_index:
+                relocations.append((id, start, current_index, length))
             current_index += length
 
         self.metadata = new_metadata
+        self.start_to_id = {start: id for id, (start, length) in new_metadata.items() if length > 0}
+
+        # everything after the last object is now one free interval
+        self.free_starts = []
+        self.free_start_to_length = {}
+        self.free_length_and_start = []
+        self.size_class_to_free_starts = {}
+        self._build_free_length_tree()
+        self._insert_free_interval(current_index, self.size - current_index)
         self._log("Compacted metadata.")
+        return relocations
+
+    def grow(self, new_size):
+        """Extends the tracked space to new_size, the new space is free."""
+        if new_size <= self.size:
+            return
+        old_size = self.size
+        self.size = new_size
+        self._build_free_length_tree()
+        self._insert_free_interval(old_size, new_size - old_size)
+        self._log(f"Grew to {new_size}.")
+
+    def is_fragmented(self):
+        """Returns whether any free space sits in front of a used range."""
+        return bool(self.free_starts) and self.free_starts[0] + self.free_start_to_length[self.free_starts[0]] < self.size
+
+    def compact_step(self, max_elements):
+        """
+        Does part of the work of compact, sliding ranges to the front in order of increasing start until moving the
+        next one would go over max_elements. At least one range is moved when there is one to move so that repeated
+        calls always finish. Returns the relocations in the same form as compact.
+        """
+        relocations = []
+        moved_elements = 0
+
+        while self.is_fragmented():
+            free_start = self.free_starts[0]
+            start = free_start + self.free_start_to_length[free_start]
+            id = self.start_to_id[start]
+            _, length = self.metadata[id]
+
+            if relocations and moved_elements + length > max_elements:
+                break
+
+            self.remove_metadata(id)
+            self.add_metadata(id, free_start, length)
+            relocations.append((id, start, free_start, length))
+            moved_elements += length
+
+        return relocations
 
     def _visualize(self):
         """Returns a visual representation of the metadata."""
@@ -147,6 +368,18 @@ class FixedSizeArrayStorage:
         for i in range(length):
             self.array[start + i] = ''
     
+    def grow(self, new_size):
+        """Extends the array to new_size keeping the existing data where it is."""
+        self.array.extend([''] * (new_size - self.size))
+        self.size = new_size
+
+    def move_data(self, old_start, new_start, length):
+        """Moves a range of data, the source and destination are allowed to overlap."""
+        self.array[new_start:new_start + length] = self.array[old_start:old_start + length]
+        for i in range(old_start, old_start + length):
+            if not new_start <= i < new_start + length:
+                self.array[i] = ''
+
     def compact(self):
         """Compacts the array by removing gaps and shifting the data."""
         # Shifting the actual array data to remove gaps
@@ -170,9 +403,10 @@ class FixedSizeArrayStorage:
 
 
 class FixedSizeArray:
-    def __init__(self, size, logging_enabled=False):
-        self.tracker = FixedSizeArrayTracker(size, logging_enabled)  # Tracks metadata
+    def __init__(self, size, logging_enabled=False, policy=FIRST_FIT, growth_factor=None):
+        self.tracker = FixedSizeArrayTracker(size, logging_enabled, policy)  # Tracks metadata
         self.storage = FixedSizeArrayStorage(size)  # Manages actual data
+        self.growth_factor = growth_factor  # When set the array grows by this factor instead of running out of space
 
     def toggle_logging(self):
         """Toggles logging state on or off."""
@@ -183,26 +417,44 @@ class FixedSizeArray:
         if self.tracker.logging_enabled:
             print(f"Adding string with ID '{id}': {string}")
 
-        # Clear existing string if ID is already present
+        length = len(string)
+
+        # a replaced string keeps its space when the new one fits there, then this is only a write
         metadata = self.tracker.get_metadata(id)
+        if metadata and self.tracker.resize_in_place(id, length):
+            start, old_length = metadata
+            self.storage.remove_data(start, old_length)
+            self.storage.add_data(start, string)
+            if self.tracker.logging_enabled:
+                print(f"Reused the space of ID '{id}' in place.")
+                print(f"Array after adding string with ID '{id}'")
+            return
+
+        # Clear existing string if ID is already present
         if metadata:
-            start, length = metadata
-            self.storage.remove_data(start, length)
+            start, old_length = metadata
+            self.storage.remove_data(start, old_length)
             self.tracker.remove_metadata(id)
             if self.tracker.logging_enabled:
                 print(f"Removed old string with ID '{id}'.")
 
         # Find space for the new string
-        length = len(string)
         start = self.tracker._find_space(length)
 
         # If no space found, compact and try again
         if start is None:
             if self.tracker.logging_enabled:
                 print("No space found, compacting array...")
-            self.tracker.compact()
-            self.storage.compact()
+            for _, old_start, new_start, moved_length in self.tracker.compact():
+                self.storage.move_data(old_start, new_start, moved_length)
             start = self.tracker._find_space(length)
+            if start is None and self.growth_factor:
+                new_size = max(self.tracker.size + length, math.ceil(self.tracker.size * self.growth_factor))
+                if self.tracker.logging_enabled:
+                    print(f"Still no space found, growing array to {new_size}...")
+                self.tracker.grow(new_size)
+                self.storage.grow(new_size)
+                start = self.tracker._find_space(length)
             if start is None:
                 raise ValueError("Not enough space in the array to store the string.")
         
@@ -214,6 +466,12 @@ class FixedSizeArray:
         if self.tracker.logging_enabled:
             print(f"Array after adding string with ID '{id}'")
 
+    def incremental_defragment(self, max_elements_per_step):
+        """Moves at most max_elements_per_step elements towards the front, returns whether there is more to do."""
+        for _, old_start, new_start, length in self.tracker.compact_step(max_elements_per_step):
+            self.storage.move_data(old_start, new_start, length)
+        return self.tracker.is_fragmented()
+
     def get(self, id):
         """Retrieves the string associated with the given ID."""
         metadata = self.tracker.get_metadata(id)
@@ -3,6 +3,7 @@
 
 #include <glm/glm.hpp>
 #include <functional>
+#include <vector>
 
 // Hash specialization for glm::vec3
 namespace std {
@@ -24,6 +25,28 @@ template <> struct hash<glm::vec2> {
     }
 };
 
+// Hash specialization for glm::vec4
+template <> struct hash<glm::vec4> {
+    size_t operator()(const glm::vec4 &v) const {
+        size_t h1 = std::hash<float>{}(v.x);
+        size_t h2 = std::hash<float>{}(v.y);
+        size_t h3 = std::hash<float>{}(v.z);
+        size_t h4 = std::hash<float>{}(v.w);
+        return h1 ^ (h2 << 1) ^ (h3 << 2) ^ (h4 << 3);
+    }
+};
+
+// Hash specialization for glm::ivec4
+template <> struct hash<glm::ivec4> {
+    size_t operator()(const glm::ivec4 &v) const {
+        size_t h1 = std::hash<int>{}(v.x);
+        size_t h2 = std::hash<int>{}(v.y);
+        size_t h3 = std::hash<int>{}(v.z);
+        size_t h4 = std::hash<int>{}(v.w);
+        return h1 ^ (h2 << 1) ^ (h3 << 2) ^ (h4 << 3);
+    }
+};
+
 // Hash specialization for std::vector<T>
 template <typename T> struct hash<std::vector<T>> {
     size_t operator()(const std::vector<T> &vec) const {
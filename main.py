@@ -1,9 +1,11 @@
 from re import sub
+import cpp_utils.main
 from cpp_utils.main import *
 from fs_utils.main import *
 from enum import Enum, auto
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import shader_summary
 from shader_summary import *
 import argparse
 import sys
@@ -181,6 +183,13 @@ class ShaderBatcherCppStruct:
 
         equals_body = "return " + " && ".join(equals_body_comparisons) + ";"
 
+        # the vectors are hashed with the specializations in hashing.hpp and combined the same way it combines elements
+        hash_body = "size_t result = std::hash<std::vector<unsigned int>>{}(indices);\n"
+        for vertex_attribute in self.vertex_attributes:
+            va_data = shader_vertex_attribute_to_data[vertex_attribute]
+            hash_body += f"result ^= std::hash<std::vector<{va_data.attrib_type}>>{{}}({va_data.plural_name}) + 0x9e3779b9 + (result << 6) + (result >> 2);\n"
+        hash_body += "return result;"
+
         cpp_struct.add_method(
             CppMethod(
                 "operator==",
@@ -192,1001 +201,4324 @@ class ShaderBatcherCppStruct:
             )
         )
 
+        cpp_struct.add_method(
+            CppMethod(
+                "hash",
+                "size_t",
+                [],
+                hash_body,
+                define_in_header=True,
+                qualifiers=["const"],
+            )
+        )
+
         return cpp_struct
 
 
-class ShaderBatcherCppClass:
+class AllocationPolicy(Enum):
+    """how a batcher's allocator picks between free intervals that are all large enough"""
 
-    is_ubo_shader: bool
-    num_elements_in_buffer: int
+    FIRST_FIT = "first_fit"
+    BEST_FIT = "best_fit"
+    SIZE_CLASS = "size_class"
 
-    def __init__(
-        self,
-        shader_type: ShaderType,
-        num_elements_in_buffer: int,
-        vertex_attributes: List[ShaderVertexAttributeVariable],
-    ):
-        self.shader_type: ShaderType = shader_type
-        self.vertex_attributes: List[ShaderVertexAttributeVariable] = vertex_attributes
-        self.is_ubo_shader = (
-            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX in self.vertex_attributes
-        )
-        self.num_elements_in_buffer = num_elements_in_buffer
 
-    def get_class_name(self) -> str:
-        return f"{snake_to_camel_case(self.shader_type.name)}ShaderBatcher"
+class UploadMode(Enum):
+    """how a batcher gets the vertex data of cached objects onto the graphics card"""
 
-    def get_associated_draw_info_struct(self) -> Optional[DrawInfo]:
-        all_shader_vertex_attributes: frozenset[ShaderVertexAttributeVariable] = (
-            frozenset(
-                [
-                    va
-                    for va in self.vertex_attributes
-                    if va != ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
-                ]
-            )
-        )
-        if (
-            all_shader_vertex_attributes
-            in shader_vertex_attribute_variables_to_valid_draw_info_structs
-        ):
-            associated_draw_info_struct: DrawInfo = (
-                shader_vertex_attribute_variables_to_valid_draw_info_structs[
-                    all_shader_vertex_attributes
-                ]
-            )
-            return associated_draw_info_struct
-        else:
-            return None
+    # one glBufferSubData per attribute as soon as an object is cached
+    IMMEDIATE = "immediate"
+    # persistently mapped buffers split into one region per frame in flight, written with plain memory copies
+    STREAMING = "streaming"
+    # everything cached during a tick is merged into as few glBufferSubData calls as possible right before drawing
+    COALESCED = "coalesced"
 
-    def generate_queue_draw_parameter_list(self) -> List[CppParameter]:
-        # parameter_list = "const unsigned int object_id, const std::vector<unsigned int> &indices, "
-        parameter_list = [
-            CppParameter("object_id", "unsigned int", "const"),
-            CppParameter("indices", "std::vector<unsigned int>", "const", True),
-        ]
-        for vertex_attribute in self.vertex_attributes:
-            data = shader_vertex_attribute_to_data[vertex_attribute]
-            parameter_list.append(
-                CppParameter(
-                    data.plural_name, f"std::vector<{data.attrib_type}>", "const", True
-                )
-            )
-            # parameter_list += f"const std::vector<{data.attrib_type}> &{data.plural_name}, "
 
-        parameter_list.append(CppParameter("replace", "bool", "", False, "false"))
-        return parameter_list
+class DrawMode(Enum):
+    """how a batcher submits the objects queued during a tick"""
 
-    def generate_cache_parameter_list(self) -> List[CppParameter]:
-        # parameter_list = "const unsigned int object_id, const std::vector<unsigned int> &indices, "
-        parameter_list = [
-            CppParameter("object_id", "unsigned int", "const"),
-            CppParameter("indices", "std::vector<unsigned int>", "const", True),
-        ]
-        for vertex_attribute in self.vertex_attributes:
-            data = shader_vertex_attribute_to_data[vertex_attribute]
-            parameter_list.append(
-                CppParameter(
-                    data.plural_name, f"std::vector<{data.attrib_type}>", "const", True
-                )
-            )
-            # parameter_list += f"const std::vector<{data.attrib_type}> &{data.plural_name}, "
+    # one glMultiDrawElements call built from the index slots of the queued objects
+    MULTI_DRAW = "multi_draw"
+    # the draws are written to an indirect buffer as DrawElementsIndirectCommands, one glMultiDrawElementsIndirect call
+    INDIRECT = "indirect"
 
-        parameter_list.append(CppParameter("replace", "bool", "", False, "false"))
-        return parameter_list
 
-    def generate_constructor_body(self) -> str:
-        body = ""
-        for vertex_attribute in self.vertex_attributes:
-            data = shader_vertex_attribute_to_data[vertex_attribute]
-            buffer_object_var_name = f"{data.plural_name}_buffer_object"
-            body += f"""
-    glGenBuffers(1, &{buffer_object_var_name});
-    // allocate space but don't actually buffer any data (nullptr) note that size is measured in bytes
-    glBindBuffer(GL_ARRAY_BUFFER, {buffer_object_var_name});
-    glBufferData(GL_ARRAY_BUFFER, initial_buffer_size * sizeof({data.attrib_type}), nullptr, GL_DYNAMIC_DRAW);
-    shader_cache.configure_vertex_attributes_for_drawables_vao(vertex_attribute_object, {buffer_object_var_name}, ShaderType::{self.shader_type.name}, ShaderVertexAttributeVariable::{vertex_attribute.name});
-           """
-        body += f"""
-    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, indices_buffer_object);
-    glBufferData(GL_ELEMENT_ARRAY_BUFFER, initial_buffer_size * sizeof(unsigned int), nullptr, GL_DYNAMIC_DRAW);
-    """
-        return body
+# the number of matrices in the uniform block that the ubo shaders declare, the uniform buffer always has to be this
+# large even when fewer ltw indices are handed out
+NUM_UBO_LTW_MATRICES = 1024
 
-    def generate_deconstructor(self) -> str:
-        body = f"""
-    glDeleteVertexArrays(1, &vertex_attribute_object);
-    glDeleteBuffers(1, &indices_buffer_object);
-    """
-        for vertex_attribute in self.vertex_attributes:
-            data = shader_vertex_attribute_to_data[vertex_attribute]
-            buffer_object_var_name = f"{data.plural_name}_buffer_object"
-            body += f"""
-    glDeleteBuffers(1, &{buffer_object_var_name});"""
-        return body
 
-    def get_delete_object_methods_for_draw_info_struct(self) -> List[CppMethod]:
-        associated_draw_info_struct: Optional[DrawInfo] = (
-            self.get_associated_draw_info_struct()
-        )
-        delete_object_methods = []
+class CullingMode(Enum):
+    """where a batcher leaves out the objects that are outside of the culling view"""
 
-        if associated_draw_info_struct:
-            associated_ivpX_param_ref = ivpX_struct_to_param_ref[
-                associated_draw_info_struct
-            ]
-            ivpX_superclass_param_refs: List[CppParameter] = (
-                ivpX_param_ref_to_superclass_param_refs[associated_ivpX_param_ref]
-            )
+    NONE = "none"
+    # every queued object is tested on the cpu while the draw list is rebuilt
+    CPU = "cpu"
+    # the objects and their bounds live on the graphics card, a compute shader tests them and writes the commands of
+    # the visible ones, which are drawn with a single glMultiDrawElementsIndirectCount
+    GPU = "gpu"
 
-            for ivpX_param_ref in ivpX_superclass_param_refs:
 
-                delete_object_body = f"""
-                if ({ivpX_param_ref.name}.buffer_modification_tracker.has_data_in_buffer()) {{
-                    delete_object({ivpX_param_ref.name}.id);
-                    {ivpX_param_ref.name}.id = -1;
-                    {ivpX_param_ref.name}.buffer_modification_tracker.free_buffered_data();
-                }}
-                """
+class CapacityMerge(Enum):
+    """how the buffer sizes of several requests for the same shader are combined"""
 
-                delete_object_methods.append(
-                    CppMethod(
-                        "delete_object",
-                        "void",
-                        [ivpX_param_ref],
-                        delete_object_body,
-                        "public",
-                        initializer_list="",
-                        define_in_header=False,
-                        qualifiers=[],
-                        docstring_comment="""
-                    /**
-                     * @brief Deletes an object from this shader batcher
-                     * 
-                     *  This frees up all resources for the given object id, and allows that id to be used again.
-                     */ 
-                    """,
-                    )
-                )
-        else:
-            print("there was no associated draw info struct")
+    # the largest request wins, for submodules that draw from the same pool of objects
+    MAX = "max"
+    # every request gets its own share, for submodules that each bring their own objects
+    SUM = "sum"
 
-        return delete_object_methods
 
-    def generate_ivpX_tag_id_body(self, struct_var_name: str) -> str:
-        if self.is_ubo_shader:
-            return f"""
-        // NOTE: THIS IS WRONG when we use a tig the id's are not in sync, thus we need a separate id for both, fix later
-{struct_var_name}.id = ltw_object_id_generator.get_id();"""
-        else:
-            return f"""
-{struct_var_name}.id = object_id_generator.get_id();"""
+def get_draw_elements_indirect_command_struct_name() -> str:
+    return "DrawElementsIndirectCommand"
 
-    def generate_ivpX_queue_draw_body(
-        self, ivpX_struct_parameter_name: str, attributes: List[str]
-    ) -> str:
-        arg_list: str = ", ".join(
-            [ivpX_struct_parameter_name + "." + attr for attr in attributes]
-        )
 
-        optional_ubo_matrix_uploading_logic: str = f"""
+def generate_draw_elements_indirect_command_struct() -> str:
+    # every batcher using indirect draws includes this so it's guarded against being defined twice
+    return f"""
+#ifndef BATCHER_DRAW_ELEMENTS_INDIRECT_COMMAND
+#define BATCHER_DRAW_ELEMENTS_INDIRECT_COMMAND
+// laid out the way glMultiDrawElementsIndirect reads it
+struct {get_draw_elements_indirect_command_struct_name()} {{
+    GLuint count;
+    GLuint instance_count;
+    GLuint first_index;
+    GLint base_vertex;
+    GLuint base_instance;
+}};
+#endif
 
+"""
 
-// NOTE: for singular draw objects their ID represent their ltw matrix index
-// but when working with tigs they don't (collection of draw_info structs all with same ltw idx)
-ltw_matrices[{ivpX_struct_parameter_name}.id] = {ivpX_struct_parameter_name}.transform.get_transform_matrix();
-        """
 
-        return f"""
+def get_bounding_sphere_struct_name() -> str:
+    return "BoundingSphere"
 
-// NOTE: if you try and queue something for drawing that isn't registered in the system we'll do that now
-bool ivp_is_not_yet_registered = {ivpX_struct_parameter_name}.id == -1;
-if (ivp_is_not_yet_registered) {{
-    tag_id({ivpX_struct_parameter_name});
-}}
 
-{optional_ubo_matrix_uploading_logic if self.is_ubo_shader else ""} 
+def generate_bounding_sphere_struct() -> str:
+    # every batcher using culling includes this so it's guarded against being defined twice
+    return f"""
+#ifndef BATCHER_BOUNDING_SPHERE
+#define BATCHER_BOUNDING_SPHERE
+// in the space the vertices were cached in, for the ubo shaders that's before the ltw matrix is applied
+struct {get_bounding_sphere_struct_name()} {{
+    glm::vec3 center;
+    float radius;
+}};
+#endif
 
-{f'std::vector<unsigned int> ltw_indices({ivpX_struct_parameter_name}.xyz_positions.size(), {ivpX_struct_parameter_name}.id);' if self.is_ubo_shader else ''}
-bool replace = {ivpX_struct_parameter_name}.buffer_modification_tracker.has_been_modified_since_last_buffering();
-queue_draw({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.indices, {arg_list}{', ltw_indices' if self.is_ubo_shader else ''}, replace);
-// NOTE: sometimes the queue draw doesn't buffer any data, so this method name might be bad, the inner logic makes sense though.
-{ivpX_struct_parameter_name}.buffer_modification_tracker.just_buffered_data();
 """
 
-    def generate_ivpX_cache_body(
-        self, ivpX_struct_parameter_name: str, attributes: List[str]
-    ) -> str:
-        arg_list: str = ", ".join(
-            [ivpX_struct_parameter_name + "." + attr for attr in attributes]
-        )
-
-        optional_ubo_matrix_uploading_logic: str = f"""
 
+# the number of objects each invocation group of the culling compute shader tests
+GPU_CULLING_WORKGROUP_SIZE = 64
 
-// NOTE: for singular draw objects their ID represent their ltw matrix index
-// but when working with tigs they don't (collection of draw_info structs all with same ltw idx)
-ltw_matrices[{ivpX_struct_parameter_name}.id] = {ivpX_struct_parameter_name}.transform.get_transform_matrix();
-        """
 
-        return f"""
+def get_gpu_cull_object_struct_name() -> str:
+    return "GpuCullObject"
 
-// NOTE: if you try and cache something for drawing that isn't registered in the system we'll do that now
-bool ivp_is_not_yet_registered = {ivpX_struct_parameter_name}.id == -1;
-if (ivp_is_not_yet_registered) {{
-    tag_id({ivpX_struct_parameter_name});
-}}
 
-{optional_ubo_matrix_uploading_logic if self.is_ubo_shader else ""} 
+def generate_gpu_cull_object_struct() -> str:
+    # every batcher culling on the gpu includes this so it's guarded against being defined twice
+    return f"""
+#ifndef BATCHER_GPU_CULL_OBJECT
+#define BATCHER_GPU_CULL_OBJECT
+// laid out the way the culling compute shader reads it (std430), an ltw index of GLuint max means no matrix applies
+struct {get_gpu_cull_object_struct_name()} {{
+    glm::vec4 bounding_sphere;
+    GLuint count;
+    GLuint first_index;
+    GLint base_vertex;
+    GLuint ltw_index;
+}};
+#endif
 
-{f'std::vector<unsigned int> ltw_indices({ivpX_struct_parameter_name}.xyz_positions.size(), {ivpX_struct_parameter_name}.id);' if self.is_ubo_shader else ''}
-bool replace = {ivpX_struct_parameter_name}.buffer_modification_tracker.has_been_modified_since_last_buffering();
-cache({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.indices, {arg_list}{', ltw_indices' if self.is_ubo_shader else ''}, replace);
-// NOTE: sometimes the queue draw doesn't buffer any data, so this method name might be bad, the inner logic makes sense though.
-{ivpX_struct_parameter_name}.buffer_modification_tracker.just_buffered_data();
 """
 
-    def get_queue_draw_methods_for_draw_info_structs(self) -> List[CppMethod]:
-        # NOTE: we are generating a bunch of versions of the same function by allowing classes with at least the same attributes as the
-        # base param class to be passed in saving us time in the cpp code, guess eventually this could be templatized right? that would be we're generating templatized code which is pretty confusing... avoiding that for now.
 
-        def generate_ivpX_queue_draw_hierarchy_methods(
-            base_param: CppParameter, draw_info_attribute_names: List[str]
-        ) -> List[CppMethod]:
-            return [
-                CppMethod(
-                    "queue_draw",
-                    "void",
-                    [super_class_param],
-                    self.generate_ivpX_queue_draw_body(
-                        super_class_param.name, draw_info_attribute_names
-                    ),
-                    "public",
-                )
-                for super_class_param in ivpX_param_ref_to_superclass_param_refs[
-                    base_param
-                ]
-            ]
+class FreeListFixedSizeArrayTrackerCppClass:
+    """
+    generates the allocator that the shader batchers use to decide where each object lives in their buffers, free space
+    is indexed by start, by (length, start), by power of two size class and in a max segment tree over the starts that
+    finds the lowest free interval that is long enough, so that finding space, adding and removing never need a scan
+    over every slot of the buffer.
+    """
 
-        def generate_ivpX_cache_hierarchy_methods(
-            base_param: CppParameter, draw_info_attribute_names: List[str]
-        ) -> List[CppMethod]:
-            return [
-                CppMethod(
-                    "cache",
-                    "void",
-                    [super_class_param],
-                    self.generate_ivpX_cache_body(
-                        super_class_param.name, draw_info_attribute_names
-                    ),
-                    "public",
-                )
-                for super_class_param in ivpX_param_ref_to_superclass_param_refs[
-                    base_param
-                ]
-            ]
+    def get_class_name(self) -> str:
+        return "FreeListFixedSizeArrayTracker"
 
-        def generate_ivpX_tag_id_hierarchy_methods(
-            base_param_ref: CppParameter,
-        ) -> List[CppMethod]:
-            return [
-                CppMethod(
-                    "tag_id",
-                    "void",
-                    [super_class_param_ref],
-                    self.generate_ivpX_tag_id_body(super_class_param_ref.name),
-                    "public",
-                )
-                for super_class_param_ref in ivpX_param_ref_to_superclass_param_refs[
-                    base_param_ref
-                ]
-            ]
+    def get_allocation_policy_enum_name(self) -> str:
+        return "AllocationPolicy"
 
-        # NOTE: doing this in a stupid way, building a bunch of data and then later on only selecting the stuff we need rather than just
-        # only generating the stuff we need in the first place
-        ivp_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
-            ivp_param_ref, ["xyz_positions"]
-        )
-        ivpn_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
-            ivpn_param_ref, ["xyz_positions", "normals"]
-        )
-        ivpc_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
-            ivpc_param_ref, ["xyz_positions", "rgb_colors"]
-        )
-        ivpnc_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
-            ivpnc_param_ref, ["xyz_positions", "normals", "rgb_colors"]
-        )
+    def get_allocation_policy_value(self, allocation_policy: AllocationPolicy) -> str:
+        return f"{self.get_allocation_policy_enum_name()}::{allocation_policy.name}"
 
-        ivp_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
-            ivp_param_ref, ["xyz_positions"]
+    def generate_allocation_policy_enum(self) -> str:
+        values = ", ".join(policy.name for policy in AllocationPolicy)
+        return f"enum class {self.get_allocation_policy_enum_name()} {{ {values} }};\n\n"
+
+    def get_range_relocation_struct_name(self) -> str:
+        return "RangeRelocation"
+
+    def generate_range_relocation_struct(self) -> str:
+        return f"""
+// describes a range that the tracker moved, the real data has to be moved to match
+struct {self.get_range_relocation_struct_name()} {{
+    unsigned int id;
+    unsigned int old_start;
+    unsigned int new_start;
+    unsigned int length;
+}};
+
+"""
+
+    def get_file_name(self) -> str:
+        return camel_to_snake_case(self.get_class_name())
+
+    def generate_cpp_class(self) -> CppClass:
+        tracker_class = CppClass(self.get_class_name())
+
+        tracker_class.add_member(CppMember("size", "unsigned int"))
+        tracker_class.add_member(CppMember("logging_enabled", "bool"))
+        tracker_class.add_member(
+            CppMember("policy", self.get_allocation_policy_enum_name())
         )
-        ivpn_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
-            ivpn_param_ref, ["xyz_positions", "normals"]
+        # object id -> (start, length)
+        tracker_class.add_member(
+            CppMember(
+                "metadata",
+                "std::unordered_map<unsigned int, std::pair<unsigned int, unsigned int>>",
+            )
         )
-        ivpc_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
-            ivpc_param_ref, ["xyz_positions", "rgb_colors"]
+        tracker_class.add_member(
+            CppMember("start_to_id", "std::unordered_map<unsigned int, unsigned int>")
         )
-        ivpnc_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
-            ivpnc_param_ref, ["xyz_positions", "normals", "rgb_colors"]
+        tracker_class.add_member(
+            CppMember("free_start_to_length", "std::map<unsigned int, unsigned int>")
         )
-
-        ivp_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
-            ivp_param_ref
+        tracker_class.add_member(
+            CppMember(
+                "free_length_and_start",
+                "std::set<std::pair<unsigned int, unsigned int>>",
+            )
         )
-        ivpn_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
-            ivpn_param_ref
+        # max segment tree over the start indices, leaf i holds the length of the free interval starting at i (0 when
+        # none does) and every other node the longest length below it
+        tracker_class.add_member(
+            CppMember("free_length_tree_leaf_count", "unsigned int", "1")
         )
-        ivpc_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
-            ivpc_param_ref
+        tracker_class.add_member(
+            CppMember("max_free_length_tree", "std::vector<unsigned int>")
         )
-        ivpnc_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
-            ivpc_param_ref
+        # size class k holds the (start, length) of every free interval with a length in [2^k, 2^(k + 1))
+        tracker_class.add_member(
+            CppMember(
+                "size_class_to_free_start_and_length",
+                "std::vector<std::set<std::pair<unsigned int, unsigned int>>>",
+            )
         )
 
-        draw_info_struct_to_queue_draw_cpp_methods: Dict[DrawInfo, List[CppMethod]] = {
-            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_queue_draw_hierarchy_methods,
-            DrawInfo.IVPNORMALS: ivpn_queue_draw_hierarchy_methods,
-            DrawInfo.IVPCOLOR: ivpc_queue_draw_hierarchy_methods,
-            DrawInfo.IVPNCOLOR: ivpnc_queue_draw_hierarchy_methods,
-        }
-
-        draw_info_struct_to_cache_cpp_methods: Dict[DrawInfo, List[CppMethod]] = {
-            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_cache_hierarchy_methods,
-            DrawInfo.IVPNORMALS: ivpn_cache_hierarchy_methods,
-            DrawInfo.IVPCOLOR: ivpc_cache_hierarchy_methods,
-            DrawInfo.IVPNCOLOR: ivpnc_cache_hierarchy_methods,
-        }
-
-        draw_info_struct_to_tag_id_cpp_method: Dict[DrawInfo, List[CppMethod]] = {
-            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_tag_id_hierarchy_methods,
-            DrawInfo.IVPNORMALS: ivpn_tag_id_hierarchy_methods,
-            DrawInfo.IVPCOLOR: ivpc_tag_id_hierarchy_methods,
-            DrawInfo.IVPNCOLOR: ivpnc_tag_id_hierarchy_methods,
-        }
-
-        # NOTE: we're using this for all of them, bad.
-        queue_draw_methods: List[CppMethod] = []
-
-        associated_draw_info_struct: Optional[DrawInfo] = (
-            self.get_associated_draw_info_struct()
+        tracker_class.add_constructor(
+            [
+                CppParameter("size", "unsigned int"),
+                CppParameter("logging_enabled", "bool", "", False, "false"),
+                CppParameter(
+                    "policy",
+                    self.get_allocation_policy_enum_name(),
+                    "",
+                    False,
+                    self.get_allocation_policy_value(AllocationPolicy.FIRST_FIT),
+                ),
+            ],
+            "size(size), logging_enabled(logging_enabled), policy(policy), size_class_to_free_start_and_length(get_size_class(size) + 1)",
+            """
+    build_free_length_tree();
+    insert_free_interval(0, size);""",
         )
 
-        if associated_draw_info_struct:
-            associated_queue_draw_methods: List[CppMethod] = (
-                draw_info_struct_to_queue_draw_cpp_methods[associated_draw_info_struct]
+        start_and_length = [
+            CppParameter("start", "unsigned int"),
+            CppParameter("length", "unsigned int"),
+        ]
+
+        tracker_class.add_method(
+            CppMethod(
+                "get_size_class",
+                "unsigned int",
+                [CppParameter("length", "unsigned int")],
+                """
+    unsigned int size_class = 0;
+    while (length > 1) {
+        length >>= 1;
+        ++size_class;
+    }
+    return size_class;
+                """,
+                "private",
+                docstring_comment="""
+                    /**
+                     * @brief Returns floor(log2(length)), the size class that a free interval of this length belongs to
+                     */ 
+                    """,
             )
-            queue_draw_methods.extend(associated_queue_draw_methods)
+        )
 
-            associated_cache_methods: List[CppMethod] = (
-                draw_info_struct_to_cache_cpp_methods[associated_draw_info_struct]
+        tracker_class.add_method(
+            CppMethod(
+                "index_free_interval",
+                "void",
+                start_and_length,
+                """
+    free_start_to_length.emplace(start, length);
+    free_length_and_start.emplace(length, start);
+    size_class_to_free_start_and_length[get_size_class(length)].emplace(start, length);
+    set_free_length(start, length);
+                """,
+                "private",
             )
-            queue_draw_methods.extend(associated_cache_methods)
+        )
 
-            associated_tag_id_methods: List[CppMethod] = (
-                draw_info_struct_to_tag_id_cpp_method[associated_draw_info_struct]
+        tracker_class.add_method(
+            CppMethod(
+                "unindex_free_interval",
+                "void",
+                start_and_length,
+                """
+    free_start_to_length.erase(start);
+    free_length_and_start.erase({length, start});
+    size_class_to_free_start_and_length[get_size_class(length)].erase({start, length});
+    set_free_length(start, 0);
+                """,
+                "private",
             )
-            queue_draw_methods.extend(associated_tag_id_methods)
-        else:
-            print("cannot find an associated queue draw call")
+        )
 
-        return queue_draw_methods
+        tracker_class.add_method(
+            CppMethod(
+                "insert_free_interval",
+                "void",
+                start_and_length,
+                """
+    if (length == 0) {
+        return;
+    }
 
-    def generate_queue_draw_body(self) -> str:
+    auto next = free_start_to_length.lower_bound(start);
 
-        parameters_to_cache: List[str] = []
-        for vertex_attribute in self.vertex_attributes:
-            data = shader_vertex_attribute_to_data[vertex_attribute]
-            parameters_to_cache.append(data.plural_name)
+    // merge with the free interval that starts exactly where this one ends
+    if (next != free_start_to_length.end() and next->first == start + length) {
+        unsigned int next_length = next->second;
+        unindex_free_interval(next->first, next_length);
+        length += next_length;
+    }
 
-        unique_cache_params = ", ".join(parameters_to_cache)
+    // merge with the free interval that ends exactly where this one starts
+    auto previous = free_start_to_length.lower_bound(start);
+    if (previous != free_start_to_length.begin()) {
+        previous = std::prev(previous);
+        if (previous->first + previous->second == start) {
+            unsigned int previous_start = previous->first;
+            unsigned int previous_length = previous->second;
+            unindex_free_interval(previous_start, previous_length);
+            start = previous_start;
+            length += previous_length;
+        }
+    }
 
-        body = f"""
-        object_ids_this_tick.push_back(object_id);
-        cache(object_id, indices, {unique_cache_params}, replace);
-        """
-        return body
+    index_free_interval(start, length);
+                """,
+                "private",
+                docstring_comment="""
+                    /**
+                     * @brief Marks the given interval as free, coalescing it with any free neighbours
+                     */ 
+                    """,
+            )
+        )
 
-    def generate_cache_body(self) -> str:
+        tracker_class.add_method(
+            CppMethod(
+                "build_free_length_tree",
+                "void",
+                [],
+                """
+    free_length_tree_leaf_count = 1;
+    while (free_length_tree_leaf_count < size) {
+        free_length_tree_leaf_count *= 2;
+    }
 
-        def generate_sub_buffering_calls() -> str:
-            lines = []
-            for v in self.vertex_attributes:
-                sva_data = shader_vertex_attribute_to_data[v]
-                lines.append(
-                    f"glBindBuffer(GL_ARRAY_BUFFER, {sva_data.plural_name}_buffer_object);"
-                )
-                lines.append(
-                    f"glBufferSubData(GL_ARRAY_BUFFER, *start_index * sizeof({sva_data.attrib_type}), {sva_data.plural_name}.size() * sizeof({sva_data.attrib_type}), {sva_data.plural_name}.data());"
-                )
-                lines.append("\n")
+    max_free_length_tree.assign(2 * free_length_tree_leaf_count, 0);
+    for (const auto &[start, length] : free_start_to_length) {
+        max_free_length_tree[free_length_tree_leaf_count + start] = length;
+    }
+    for (unsigned int node = free_length_tree_leaf_count - 1; node > 0; --node) {
+        max_free_length_tree[node] = std::max(max_free_length_tree[2 * node], max_free_length_tree[2 * node + 1]);
+    }
+                """,
+                "private",
+                docstring_comment="""
+                    /**
+                     * @brief Sizes the free length tree to the tracked space and fills it from the free intervals
+                     */ 
+                    """,
+            )
+        )
 
-            indentation = TAB
-            for i in range(len(lines)):
-                lines[i] = indentation + lines[i]
+        tracker_class.add_method(
+            CppMethod(
+                "set_free_length",
+                "void",
+                start_and_length,
+                """
+    unsigned int node = free_length_tree_leaf_count + start;
+    max_free_length_tree[node] = length;
+    for (node /= 2; node > 0; node /= 2) {
+        max_free_length_tree[node] = std::max(max_free_length_tree[2 * node], max_free_length_tree[2 * node + 1]);
+    }
+                """,
+                "private",
+                docstring_comment="""
+                    /**
+                     * @brief Records the length of the free interval beginning at start, 0 when there is none
+                     */ 
+                    """,
+            )
+        )
 
-            return "\n".join(lines)
+        tracker_class.add_method(
+            CppMethod(
+                "find_lowest_free_start",
+                "std::optional<unsigned int>",
+                [CppParameter("length", "unsigned int")],
+                """
+    // walk down the free length tree towards the leftmost subtree that has a free interval long enough
+    if (max_free_length_tree[1] < length) {
+        return std::nullopt;
+    }
 
-        body = f"""
-    bool logging = false;
+    unsigned int node = 1;
+    while (node < free_length_tree_leaf_count) {
+        node = max_free_length_tree[2 * node] >= length ? 2 * node : 2 * node + 1;
+    }
+    return node - free_length_tree_leaf_count;
+                """,
+                "private",
+                qualifiers=["const"],
+                docstring_comment="""
+                    /**
+                     * @brief Returns the start of the lowest free interval that can hold length, or nothing if none can
+                     */ 
+                    """,
+            )
+        )
 
-    bool incoming_data_is_already_cached =
-        cached_object_ids_to_indices.find(object_id) != cached_object_ids_to_indices.end();
+        tracker_class.add_method(
+            CppMethod(
+                "find_contiguous_space",
+                "std::optional<unsigned int>",
+                [CppParameter("length", "unsigned int")],
+                """
+    if (length == 0) {
+        // an empty range takes no space, it goes into free space when there is some and fits even when the array is full
+        return find_contiguous_space(1).value_or(0);
+    }
+    switch (policy) {
+    case AllocationPolicy::FIRST_FIT:
+        return find_lowest_free_start(length);
+    case AllocationPolicy::BEST_FIT: {
+        // the smallest free interval that can hold length, ties are broken by the lowest start index
+        auto it = free_length_and_start.lower_bound({length, 0});
+        if (it == free_length_and_start.end()) {
+            return std::nullopt;
+        }
+        return it->second;
+    }
+    case AllocationPolicy::SIZE_CLASS: {
+        // every interval in the class that length rounds up to, or in any larger one, is long enough
+        bool length_is_power_of_two = (length & (length - 1)) == 0;
+        unsigned int smallest_fitting_size_class = get_size_class(length) + (length_is_power_of_two ? 0 : 1);
+        for (unsigned int c = smallest_fitting_size_class; c < size_class_to_free_start_and_length.size(); ++c) {
+            if (not size_class_to_free_start_and_length[c].empty()) {
+                return size_class_to_free_start_and_length[c].begin()->first;
+            }
+        }
+        // any interval that is still long enough is in the class length falls into, as every larger one is empty
+        return find_lowest_free_start(length);
+    }
+    }
+    throw std::invalid_argument("unknown allocation policy");
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Finds the start of a contiguous free block of the given length, or nothing if none exists
+                     */ 
+                    """,
+            )
+        )
 
-    if (incoming_data_is_already_cached and not replace) {{
+        tracker_class.add_method(
+            CppMethod(
+                "add_metadata",
+                "void",
+                [CppParameter("id", "unsigned int")] + start_and_length,
+                """
+    if (metadata.find(id) != metadata.end()) {
+        if (logging_enabled) {
+            global_logger->warn("id {} already exists, use a unique id", id);
+        }
         return;
-    }}
-
-    // therefore the data is either not cached, or it needs to be replaced
-    // in both of those cases the data needs to be stored, so moving on:
-
-    // if the data already exists then we need to replace
-    auto metadata = fsat.get_metadata(object_id);
-    if (metadata) {{
-        // so mark that space as free, and it only needs to occur in the realm of metadata
-        // later on we'll just clobber the real contents of the VBO which is not a problem
-        fsat.remove_metadata(object_id);
-    }}
+    }
 
-    // note we use positions because that information is what gets stored into the vertex buffer objects
-    // note that any other vertex data could be used as they must all have the same size
-    size_t length = positions.size();
-    auto start_index = fsat.find_contiguous_space(length);
+    if (start + length > size) {
+        if (logging_enabled) {
+            global_logger->warn("metadata for id {} exceeds the array bounds", id);
+        }
+        return;
+    }
 
-    // if there's no space left we will compactify things, and try again.
-    if (!start_index) {{
-        fsat.compact();
-        // TODO implement later when running out of space is a real issue.
-        // storage.compact(tracker.get_all_metadata());
-        start_index = fsat.find_contiguous_space(length);
-        if (!start_index) {{
-            throw std::runtime_error("not enough space even after compacting.");
-        }}
-    }}
+    // an empty range takes no space, so it can't overlap anything and there is nothing to carve
+    if (length > 0) {
+        // find the free interval which must fully contain the space being claimed
+        auto containing = free_start_to_length.upper_bound(start);
+        if (containing == free_start_to_length.begin()) {
+            if (logging_enabled) {
+                global_logger->warn("metadata for id {} overlaps existing metadata", id);
+            }
+            return;
+        }
+        containing = std::prev(containing);
+
+        unsigned int free_start = containing->first;
+        unsigned int free_length = containing->second;
+        if (start + length > free_start + free_length) {
+            if (logging_enabled) {
+                global_logger->warn("metadata for id {} overlaps existing metadata", id);
+            }
+            return;
+        }
 
-    // at this point it's guarenteed that there is space for the object.
-    // therefore *start_index is competely valid from now on
+        // carve the used space out of the free interval, giving back what's left on either side
+        unindex_free_interval(free_start, free_length);
+        insert_free_interval(free_start, start - free_start);
+        insert_free_interval(start + length, free_start + free_length - (start + length));
+    }
 
-    std::vector<unsigned int> cached_indices_for_data;
-    for (unsigned int index : indices) {{
-        // note that it's guarenteed that cached_index is going to reside completely
-        // within the allocated space this is because if the size of the positions vector
-        // is given by N, then the indices are only allowed to be values of 0, ..., N - 1
-        // then we move it up by start_index, and thus we're always within start_index + N - 1
-        // which it the amount of space we found during our find_contiguous space call
-        unsigned int cached_index = index + *start_index;
-        cached_indices_for_data.push_back(cached_index);
-    }}
+    metadata.emplace(id, std::make_pair(start, length));
+    // empty ranges take no space, so another range can start at the same index, only the real one is tracked
+    if (length > 0) {
+        start_to_id.emplace(start, id);
+    }
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Marks [start, start + length) as used by the given id
+                     */ 
+                    """,
+            )
+        )
 
-    // using this one as it will replace the existing data, thus works for replacement or first time insertion.
-    cached_object_ids_to_indices.insert_or_assign(object_id, cached_indices_for_data);
+        tracker_class.add_method(
+            CppMethod(
+                "remove_metadata",
+                "void",
+                [CppParameter("id", "unsigned int")],
+                """
+    auto it = metadata.find(id);
+    if (it == metadata.end()) {
+        if (logging_enabled) {
+            global_logger->warn("id {} not found", id);
+        }
+        return;
+    }
 
-    // now we put that data into the graphics card
-    glBindVertexArray(vertex_attribute_object);
+    auto [start, length] = it->second;
+    metadata.erase(it);
+    if (length > 0) {
+        start_to_id.erase(start);
+    }
+    insert_free_interval(start, length);
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Frees the space used by the given id
+                     */ 
+                    """,
+            )
+        )
 
-{generate_sub_buffering_calls()}
+        tracker_class.add_method(
+            CppMethod(
+                "resize_in_place",
+                "bool",
+                [CppParameter("id", "unsigned int")] + [start_and_length[1]],
+                """
+    auto it = metadata.find(id);
+    if (it == metadata.end()) {
+        return false;
+    }
 
-    glBindVertexArray(0);
+    auto &[start, old_length] = it->second;
+    if (length > old_length) {
+        auto next = free_start_to_length.find(start + old_length);
+        if (next == free_start_to_length.end() or old_length + next->second < length) {
+            return false;
+        }
+        unsigned int next_length = next->second;
+        unindex_free_interval(start + old_length, next_length);
+        insert_free_interval(start + length, old_length + next_length - length);
+    } else {
+        insert_free_interval(start + length, old_length - length);
+    }
 
-    // ok now we're done, update the metadata so that we know this space is used up
-    fsat.add_metadata(object_id, *start_index, length);
+    if (old_length == 0 and length > 0) {
+        start_to_id.emplace(start, id);
+    } else if (old_length > 0 and length == 0) {
+        start_to_id.erase(start);
+    }
+    old_length = length;
+    return true;
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Changes the length of the space used by the given id without moving it
+                     *
+                     * It can always shrink, but it only grows into free space directly after it.
+                     *
+                     * @return whether the space could be resized
+                     */ 
+                    """,
+            )
+        )
 
-    replaced_data_for_an_object_this_tick = true;
+        tracker_class.add_method(
+            CppMethod(
+                "get_metadata",
+                "std::optional<std::pair<unsigned int, unsigned int>>",
+                [CppParameter("id", "unsigned int")],
+                """
+    auto it = metadata.find(id);
+    if (it == metadata.end()) {
+        return std::nullopt;
+    }
+    return it->second;
+                """,
+                "public",
+                qualifiers=["const"],
+                docstring_comment="""
+                    /**
+                     * @brief Returns the (start, length) used by the given id if it has any
+                     */ 
+                    """,
+            )
+        )
 
-    if (logging) {{
-        std::cout << "^^^ QUEUE_DRAW ^^^" << std::endl;
-    }}
-        """
-        return body
+        tracker_class.add_method(
+            CppMethod(
+                "compact",
+                f"std::vector<{self.get_range_relocation_struct_name()}>",
+                [],
+                """
+    std::vector<std::pair<unsigned int, std::pair<unsigned int, unsigned int>>> by_start(metadata.begin(), metadata.end());
+    std::sort(by_start.begin(), by_start.end(),
+              [](const auto &a, const auto &b) { return a.second.first < b.second.first; });
+
+    std::vector<RangeRelocation> relocations;
+    unsigned int current_index = 0;
+    start_to_id.clear();
+    for (const auto &[id, start_and_length] : by_start) {
+        auto [start, length] = start_and_length;
+        metadata[id] = {current_index, length};
+        if (length > 0) {
+            start_to_id[current_index] = id;
+        }
+        if (start != current_index) {
+            relocations.push_back({id, start, current_index, length});
+        }
+        current_index += length;
+    }
 
-    def generate_draw_everything_body(self) -> str:
-        body = f"""
+    // everything after the last object is now one free interval
+    free_start_to_length.clear();
+    free_length_and_start.clear();
+    for (auto &size_class_free_intervals : size_class_to_free_start_and_length) {
+        size_class_free_intervals.clear();
+    }
+    build_free_length_tree();
+    insert_free_interval(current_index, size - current_index);
 
-    bool logging = false;
+    return relocations;
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Packs all used space to the front, keeping the relative order of the objects
+                     *
+                     * @return every range that moved in order of increasing start, moving the real data in this order
+                     * never clobbers data that hasn't been moved yet
+                     */ 
+                    """,
+            )
+        )
 
-    if (logging) {{
-        std::cout << "VVV DRAW_EVERYTHING VVV" << std::endl;
-    }}
-    shader_cache.use_shader_program(ShaderType::{self.shader_type.name});
-    glBindVertexArray(vertex_attribute_object);
+        tracker_class.add_method(
+            CppMethod(
+                "grow",
+                "void",
+                [CppParameter("new_size", "unsigned int")],
+                """
+    if (new_size <= size) {
+        return;
+    }
 
-    if (replaced_data_for_an_object_this_tick or object_ids_this_tick != object_ids_last_tick) {{
-        std::vector<unsigned int> all_indices;
-        for (const auto &draw_data : object_ids_this_tick) {{
-            auto it = cached_object_ids_to_indices.find(draw_data);
-            if (it != cached_object_ids_to_indices.end()) {{
-                const std::vector<unsigned int> &cached_indices = it->second;
-                all_indices.insert(all_indices.end(), cached_indices.begin(), cached_indices.end());
-            }} else {{
-                if (logging) {{
-                    std::cerr << "draw data tried to be drawn but was not cached, look into this as it should not occur"
-                              << std::endl;
-                }}
-            }}
-        }}
+    size_class_to_free_start_and_length.resize(get_size_class(new_size) + 1);
+    unsigned int old_size = size;
+    size = new_size;
+    build_free_length_tree();
+    insert_free_interval(old_size, new_size - old_size);
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Extends the tracked space to new_size, the new space is free
+                     */ 
+                    """,
+            )
+        )
+
+        tracker_class.add_method(
+            CppMethod(
+                "is_fragmented",
+                "bool",
+                [],
+                """
+    if (free_start_to_length.empty()) {
+        return false;
+    }
+    auto first_free = free_start_to_length.begin();
+    return first_free->first + first_free->second < size;
+                """,
+                "public",
+                qualifiers=["const"],
+                docstring_comment="""
+                    /**
+                     * @brief Returns whether any free space sits in front of a used range
+                     */ 
+                    """,
+            )
+        )
 
-        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, indices_buffer_object);
-        glBufferSubData(GL_ELEMENT_ARRAY_BUFFER, 0, all_indices.size() * sizeof(unsigned int), all_indices.data());
+        tracker_class.add_method(
+            CppMethod(
+                "compact_step",
+                f"std::vector<{self.get_range_relocation_struct_name()}>",
+                [CppParameter("max_elements", "unsigned int")],
+                """
+    std::vector<RangeRelocation> relocations;
+    unsigned int moved_elements = 0;
 
-        glDrawElements(GL_TRIANGLES, all_indices.size(), GL_UNSIGNED_INT, 0);
-        object_ids_last_tick = object_ids_this_tick;
-        drawn_indices_last_tick = all_indices;
-    }} else {{
-        glDrawElements(GL_TRIANGLES, drawn_indices_last_tick.size(), GL_UNSIGNED_INT, 0);
-    }}
+    while (is_fragmented()) {
+        auto [free_start, free_length] = *free_start_to_length.begin();
+        unsigned int start = free_start + free_length;
+        unsigned int id = start_to_id.at(start);
+        unsigned int length = metadata.at(id).second;
 
-    glBindVertexArray(0);
-    shader_cache.stop_using_shader_program();
+        if (not relocations.empty() and moved_elements + length > max_elements) {
+            break;
+        }
 
-    object_ids_this_tick.clear();
-    replaced_data_for_an_object_this_tick = false;
+        remove_metadata(id);
+        add_metadata(id, free_start, length);
+        relocations.push_back({id, start, free_start, length});
+        moved_elements += length;
+    }
 
-    if (logging) {{
-        std::cout << "^^^ DRAW_EVERYTHING ^^^" << std::endl;
+    return relocations;
+                """,
+                "public",
+                docstring_comment="""
+                    /**
+                     * @brief Does part of the work of compact, sliding ranges to the front in order of increasing start
+                     * until moving the next one would go over max_elements
+                     *
+                     * At least one range is moved when there is one to move, so repeated calls always finish, and the
+                     * final layout is the same as the one compact produces.
+                     *
+                     * @return the relocations in the same form as compact
+                     */ 
+                    """,
+            )
+        )
+
+        tracker_class.add_include(
+            "#include <algorithm>\n#include <map>\n#include <optional>\n#include <set>\n#include <stdexcept>\n#include <unordered_map>\n#include <vector>\n"
+            '#include "../sbpt_generated_includes.hpp"\n\n'
+            + self.generate_allocation_policy_enum()
+            + self.generate_range_relocation_struct()
+        )
+
+        return tracker_class
+
+
+class ShaderBatcherCppClass:
+
+    is_ubo_shader: bool
+    num_elements_in_buffer: int
+    allocation_policy: AllocationPolicy
+    # when set the buffers are reallocated this many times larger when they run out of space instead of throwing
+    growth_factor: Optional[float]
+    upload_mode: UploadMode
+    # only used when streaming, the number of frames that can be in flight before we have to wait on the gpu
+    num_stream_regions: int
+    # only used when coalescing, keeps a cpu copy of the buffers so merged ranges can be uploaded straight from it
+    use_shadow_copy: bool
+    draw_mode: DrawMode
+    # objects whose indices and vertex data are identical share one copy of it in the buffers
+    deduplicate_geometry: bool
+    # the ltw index is supplied once per drawn instance rather than once per vertex, so a mesh is cached once no
+    # matter how many tigs use it
+    use_instancing: bool
+    # only used by the ubo shaders, bounds the ltw indices handed out
+    num_ltw_matrices: int
+    # objects whose bounding sphere is outside of the view frustum or too far away are left out of the draw
+    culling_mode: CullingMode
+    # objects cached with cache_lods are drawn with the index list of the level that suits their distance to the camera
+    use_lods: bool
+
+    def __init__(
+        self,
+        shader_type: ShaderType,
+        num_elements_in_buffer: int,
+        vertex_attributes: List[ShaderVertexAttributeVariable],
+        allocation_policy: AllocationPolicy = AllocationPolicy.FIRST_FIT,
+        growth_factor: Optional[float] = None,
+        upload_mode: UploadMode = UploadMode.IMMEDIATE,
+        num_stream_regions: int = 3,
+        use_shadow_copy: bool = False,
+        draw_mode: DrawMode = DrawMode.MULTI_DRAW,
+        deduplicate_geometry: bool = False,
+        use_instancing: bool = False,
+        num_ltw_matrices: int = NUM_UBO_LTW_MATRICES,
+        culling_mode: CullingMode = CullingMode.NONE,
+        use_lods: bool = False,
+    ):
+        self.shader_type: ShaderType = shader_type
+        self.vertex_attributes: List[ShaderVertexAttributeVariable] = vertex_attributes
+        self.is_ubo_shader = (
+            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX in self.vertex_attributes
+        )
+        self.num_elements_in_buffer = num_elements_in_buffer
+        self.allocation_policy = allocation_policy
+        self.growth_factor = growth_factor
+        self.upload_mode = upload_mode
+        self.num_stream_regions = num_stream_regions
+        self.is_streaming = self.upload_mode == UploadMode.STREAMING
+        self.is_coalescing = self.upload_mode == UploadMode.COALESCED
+        self.has_shadow_copy = self.is_streaming or (
+            self.is_coalescing and use_shadow_copy
+        )
+        self.draw_mode = draw_mode
+        self.is_indirect = self.draw_mode == DrawMode.INDIRECT
+        self.deduplicate_geometry = deduplicate_geometry
+        # the space in the buffers is tracked per geometry, which is just the object when nothing is shared
+        self.geometry_id = "geometry_id" if self.deduplicate_geometry else "object_id"
+        self.use_instancing = use_instancing
+        self.num_ltw_matrices = num_ltw_matrices
+        self.culling_mode = culling_mode
+        self.use_culling = self.culling_mode != CullingMode.NONE
+        self.is_culling_on_cpu = self.culling_mode == CullingMode.CPU
+        self.is_culling_on_gpu = self.culling_mode == CullingMode.GPU
+        self.use_lods = use_lods
+        self.has_bounding_spheres = self.use_culling or self.use_lods
+        # what gets drawn depends on where the camera is, so the draw list is rebuilt when the view changes
+        self.has_view_dependent_draw_list = self.is_culling_on_cpu or self.use_lods
+        # the attributes that are stored per vertex in the buffers tracked by fsat
+        self.per_vertex_attributes: List[ShaderVertexAttributeVariable] = [
+            va
+            for va in self.vertex_attributes
+            if not (
+                self.use_instancing
+                and va == ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+            )
+        ]
+        # without instancing the ubo shaders store the ltw index with every vertex
+        self.has_per_vertex_ltw_indices = (
+            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+            in self.per_vertex_attributes
+        )
+
+    def get_class_name(self) -> str:
+        return f"{snake_to_camel_case(self.shader_type.name)}ShaderBatcher"
+
+    def get_associated_draw_info_struct(self) -> Optional[DrawInfo]:
+        all_shader_vertex_attributes: frozenset[ShaderVertexAttributeVariable] = (
+            frozenset(
+                [
+                    va
+                    for va in self.vertex_attributes
+                    if va != ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+                ]
+            )
+        )
+        if (
+            all_shader_vertex_attributes
+            in shader_vertex_attribute_variables_to_valid_draw_info_structs
+        ):
+            associated_draw_info_struct: DrawInfo = (
+                shader_vertex_attribute_variables_to_valid_draw_info_structs[
+                    all_shader_vertex_attributes
+                ]
+            )
+            return associated_draw_info_struct
+        else:
+            return None
+
+    def generate_queue_draw_parameter_list(self) -> List[CppParameter]:
+        # parameter_list = "const unsigned int object_id, const std::vector<unsigned int> &indices, "
+        parameter_list = [
+            CppParameter("object_id", "unsigned int", "const"),
+            CppParameter("indices", "std::vector<unsigned int>", "const", True),
+        ]
+        for vertex_attribute in self.vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            if vertex_attribute not in self.per_vertex_attributes:
+                # instanced, the whole object is drawn with a single ltw index
+                parameter_list.append(CppParameter("ltw_index", "unsigned int", "const"))
+                continue
+            parameter_list.append(
+                CppParameter(
+                    data.plural_name, f"std::vector<{data.attrib_type}>", "const", True
+                )
+            )
+            # parameter_list += f"const std::vector<{data.attrib_type}> &{data.plural_name}, "
+
+        parameter_list.append(CppParameter("replace", "bool", "", False, "false"))
+        return parameter_list
+
+    def generate_cache_parameter_list(self) -> List[CppParameter]:
+        # parameter_list = "const unsigned int object_id, const std::vector<unsigned int> &indices, "
+        parameter_list = [
+            CppParameter("object_id", "unsigned int", "const"),
+            CppParameter("indices", "std::vector<unsigned int>", "const", True),
+        ]
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            parameter_list.append(
+                CppParameter(
+                    data.plural_name, f"std::vector<{data.attrib_type}>", "const", True
+                )
+            )
+            # parameter_list += f"const std::vector<{data.attrib_type}> &{data.plural_name}, "
+
+        parameter_list.append(CppParameter("replace", "bool", "", False, "false"))
+        return parameter_list
+
+    def generate_constructor_body(self) -> str:
+        body = ""
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            buffer_object_var_name = f"{data.plural_name}_buffer_object"
+            if self.is_streaming:
+                body += f"""
+    glGenBuffers(1, &{buffer_object_var_name});
+    // one region per frame in flight, immutable storage so that it can stay mapped for the lifetime of the batcher
+    glBindBuffer(GL_ARRAY_BUFFER, {buffer_object_var_name});
+    glBufferStorage(GL_ARRAY_BUFFER, num_stream_regions * initial_buffer_size * sizeof({data.attrib_type}), nullptr, stream_buffer_flags);
+    {data.plural_name}_mapped = static_cast<{data.attrib_type} *>(glMapBufferRange(GL_ARRAY_BUFFER, 0, num_stream_regions * initial_buffer_size * sizeof({data.attrib_type}), stream_buffer_flags));
+    {data.plural_name}_shadow.resize(initial_buffer_size);
+    shader_cache.configure_vertex_attributes_for_drawables_vao(vertex_attribute_object, {buffer_object_var_name}, ShaderType::{self.shader_type.name}, ShaderVertexAttributeVariable::{vertex_attribute.name});
+           """
+                continue
+            body += f"""
+    glGenBuffers(1, &{buffer_object_var_name});
+    // allocate space but don't actually buffer any data (nullptr) note that size is measured in bytes
+    glBindBuffer(GL_ARRAY_BUFFER, {buffer_object_var_name});
+    glBufferData(GL_ARRAY_BUFFER, initial_buffer_size * sizeof({data.attrib_type}), nullptr, GL_DYNAMIC_DRAW);
+    shader_cache.configure_vertex_attributes_for_drawables_vao(vertex_attribute_object, {buffer_object_var_name}, ShaderType::{self.shader_type.name}, ShaderVertexAttributeVariable::{vertex_attribute.name});
+           """
+        if self.use_instancing:
+            ltw_index_attribute = ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+            body += f"""
+    // holds one ltw index per drawn instance, it gets sized once there are instances to draw
+    glGenBuffers(1, &ltw_indices_buffer_object);
+    shader_cache.configure_vertex_attributes_for_drawables_vao(vertex_attribute_object, ltw_indices_buffer_object, ShaderType::{self.shader_type.name}, ShaderVertexAttributeVariable::{ltw_index_attribute.name});
+    // the ltw index advances once per instance instead of once per vertex
+    GLint ltw_index_location = glGetAttribLocation(shader_cache.get_shader_program(ShaderType::{self.shader_type.name}).id, "{ltw_index_attribute.name.lower()}");
+    if (ltw_index_location == -1) {{
+        throw std::runtime_error("the shader has no active {ltw_index_attribute.name.lower()} attribute to advance per instance.");
     }}
+    glBindVertexArray(vertex_attribute_object);
+    glVertexAttribDivisor(ltw_index_location, 1);
+           """
+        body += f"""
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, indices_buffer_object);
+    glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_buffer_capacity * sizeof(unsigned int), nullptr, GL_DYNAMIC_DRAW);
     """
+        if self.is_culling_on_gpu:
+            body += """
+    glGenBuffers(1, &cull_objects_buffer_object);
+    glGenBuffers(1, &draw_count_buffer_object);
+    glBindBuffer(GL_PARAMETER_BUFFER, draw_count_buffer_object);
+    glBufferData(GL_PARAMETER_BUFFER, sizeof(GLuint), nullptr, GL_DYNAMIC_DRAW);
+    culling_program = create_culling_program();
+    """
+        if self.is_streaming:
+            body = (
+                """
+    const GLbitfield stream_buffer_flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT;"""
+                + body
+            )
+        elif self.has_shadow_copy:
+            for vertex_attribute in self.per_vertex_attributes:
+                data = shader_vertex_attribute_to_data[vertex_attribute]
+                body += f"""
+    {data.plural_name}_shadow.resize(initial_buffer_size);"""
+        return body
 
+    def generate_deconstructor(self) -> str:
+        body = f"""
+    glDeleteVertexArrays(1, &vertex_attribute_object);
+    glDeleteBuffers(1, &indices_buffer_object);
+    """
+        for vertex_attribute in self.vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            buffer_object_var_name = f"{data.plural_name}_buffer_object"
+            body += f"""
+    glDeleteBuffers(1, &{buffer_object_var_name});"""
+        body += f"""
+    glDeleteBuffers(1, &scratch_buffer_object);"""
+        if self.is_indirect:
+            body += f"""
+    glDeleteBuffers(1, &draw_indirect_buffer_object);"""
+        if self.is_culling_on_gpu:
+            body += f"""
+    glDeleteBuffers(1, &cull_objects_buffer_object);
+    glDeleteBuffers(1, &draw_count_buffer_object);
+    glDeleteProgram(culling_program);"""
+        if self.is_streaming:
+            body += f"""
+    for (GLsync fence : stream_region_fences) {{
+        if (fence) {{
+            glDeleteSync(fence);
+        }}
+    }}"""
         return body
 
-    # TODO: in the future there will be a bass queue draw call and then the extension classes
-    # will extend the body of the function filling in empty data (eg bone transforms or something)
-    def generate_CWL_V_TRANSFORMATION_UBOS_1024_WITH_SOLID_COLOR_specific_class_data(
-        self, batcher_class: CppClass
-    ):
-        tig = CppParameter("tig", "draw_info::TransformedIVPGroup", "", True)
-        replace = CppParameter("replace", "bool", "", False, "false")
-        transform_matrix_override = CppParameter(
-            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
+    def get_delete_object_methods_for_draw_info_struct(self) -> List[CppMethod]:
+        associated_draw_info_struct: Optional[DrawInfo] = (
+            self.get_associated_draw_info_struct()
+        )
+        delete_object_methods = []
+
+        if associated_draw_info_struct:
+            associated_ivpX_param_ref = ivpX_struct_to_param_ref[
+                associated_draw_info_struct
+            ]
+            ivpX_superclass_param_refs: List[CppParameter] = (
+                ivpX_param_ref_to_superclass_param_refs[associated_ivpX_param_ref]
+            )
+
+            for ivpX_param_ref in ivpX_superclass_param_refs:
+
+                delete_object_body = f"""
+                if ({ivpX_param_ref.name}.buffer_modification_tracker.has_data_in_buffer()) {{
+                    delete_object({ivpX_param_ref.name}.id);
+                    {ivpX_param_ref.name}.id = -1;
+                    {ivpX_param_ref.name}.buffer_modification_tracker.free_buffered_data();
+                }}
+                """
+
+                delete_object_methods.append(
+                    CppMethod(
+                        "delete_object",
+                        "void",
+                        [ivpX_param_ref],
+                        delete_object_body,
+                        "public",
+                        initializer_list="",
+                        define_in_header=False,
+                        qualifiers=[],
+                        docstring_comment="""
+                    /**
+                     * @brief Deletes an object from this shader batcher
+                     * 
+                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     */ 
+                    """,
+                    )
+                )
+        else:
+            print("there was no associated draw info struct")
+
+        return delete_object_methods
+
+    def generate_is_cached_expression(self) -> str:
+        if self.deduplicate_geometry:
+            return "object_id_to_geometry_id.find(object_id) != object_id_to_geometry_id.end()"
+        return "fsat.get_metadata(object_id).has_value()"
+
+    def generate_release_object_space_lines(self) -> str:
+        if self.deduplicate_geometry:
+            return """
+        // the space is only freed once no other object shares it
+        auto geometry = object_id_to_geometry_id.find(object_id);
+        release_geometry(geometry->second);
+        object_id_to_geometry_id.erase(geometry);"""
+        return f"""
+        fsat.remove_metadata(object_id);
+        index_fsat.remove_metadata(object_id);{self.generate_forget_bounding_sphere_lines("object_id")}"""
+
+    def generate_forget_lod_lines(self) -> str:
+        return f"""    // plain indices replace whatever levels the object had, cache_lods adds them back after caching
+    lod_index_ranges.erase({self.geometry_id});
+"""
+
+    def generate_forget_bounding_sphere_lines(
+        self, geometry_id: str, indentation: str = TAB * 2
+    ) -> str:
+        if not self.has_bounding_spheres:
+            return ""
+        lines = f"\n{indentation}bounding_spheres.erase({geometry_id});"
+        if self.has_per_vertex_ltw_indices:
+            lines += f"\n{indentation}bounding_sphere_ltw_indices.erase({geometry_id});"
+        if self.use_lods:
+            lines += f"\n{indentation}lod_index_ranges.erase({geometry_id});"
+        return lines
+
+    def generate_acquire_geometry_id_body(self) -> str:
+        return """
+    if (not free_geometry_ids.empty()) {
+        unsigned int geometry_id = free_geometry_ids.back();
+        free_geometry_ids.pop_back();
+        return geometry_id;
+    }
+
+    unsigned int geometry_id = geometry_draw_data.size();
+    geometry_draw_data.emplace_back();
+    geometry_draw_data_hashes.push_back(0);
+    geometry_reference_counts.push_back(0);
+    return geometry_id;
+    """
+
+    def generate_release_geometry_body(self) -> str:
+        return f"""
+    if (--geometry_reference_counts[geometry_id] > 0) {{
+        return;
+    }}
+
+    fsat.remove_metadata(geometry_id);
+    index_fsat.remove_metadata(geometry_id);
+    unregister_geometry_hash(geometry_id);{self.generate_forget_bounding_sphere_lines("geometry_id", TAB)}
+
+    // drop the cpu copy of the data now rather than when the id is reused
+    geometry_draw_data[geometry_id] = {{}};
+    free_geometry_ids.push_back(geometry_id);
+    """
+
+    def generate_unregister_geometry_hash_body(self) -> str:
+        return """
+    auto [candidate, candidates_end] = draw_data_hash_to_geometry_ids.equal_range(geometry_draw_data_hashes[geometry_id]);
+    for (; candidate != candidates_end; ++candidate) {
+        if (candidate->second == geometry_id) {
+            draw_data_hash_to_geometry_ids.erase(candidate);
+            break;
+        }
+    }
+    """
+
+    def generate_ivpX_tag_id_body(self, struct_var_name: str) -> str:
+        if self.is_ubo_shader:
+            return f"""
+        // NOTE: THIS IS WRONG when we use a tig the id's are not in sync, thus we need a separate id for both, fix later
+{struct_var_name}.id = ltw_object_id_generator.get_id();"""
+        else:
+            return f"""
+{struct_var_name}.id = object_id_generator.get_id();"""
+
+    def generate_ivpX_queue_draw_body(
+        self, ivpX_struct_parameter_name: str, attributes: List[str]
+    ) -> str:
+        arg_list: str = ", ".join(
+            [ivpX_struct_parameter_name + "." + attr for attr in attributes]
+        )
+
+        optional_ubo_matrix_uploading_logic: str = f"""
+
+
+// NOTE: for singular draw objects their ID represent their ltw matrix index
+// but when working with tigs they don't (collection of draw_info structs all with same ltw idx)
+set_ltw_matrix({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.transform.get_transform_matrix());
+        """
+
+        if self.use_instancing:
+            ltw_index_argument = f", {ivpX_struct_parameter_name}.id"
+            ltw_indices_construction = ""
+        elif self.is_ubo_shader:
+            ltw_index_argument = ", ltw_indices"
+            ltw_indices_construction = f"std::vector<unsigned int> ltw_indices({ivpX_struct_parameter_name}.xyz_positions.size(), {ivpX_struct_parameter_name}.id);"
+        else:
+            ltw_index_argument = ""
+            ltw_indices_construction = ""
+
+        return f"""
+
+// NOTE: if you try and queue something for drawing that isn't registered in the system we'll do that now
+bool ivp_is_not_yet_registered = {ivpX_struct_parameter_name}.id == -1;
+if (ivp_is_not_yet_registered) {{
+    tag_id({ivpX_struct_parameter_name});
+}}
+
+{optional_ubo_matrix_uploading_logic if self.is_ubo_shader else ""} 
+
+{ltw_indices_construction}
+bool replace = {ivpX_struct_parameter_name}.buffer_modification_tracker.has_been_modified_since_last_buffering();
+queue_draw({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.indices, {arg_list}{ltw_index_argument}, replace);
+// NOTE: sometimes the queue draw doesn't buffer any data, so this method name might be bad, the inner logic makes sense though.
+{ivpX_struct_parameter_name}.buffer_modification_tracker.just_buffered_data();
+"""
+
+    def generate_ivpX_cache_body(
+        self, ivpX_struct_parameter_name: str, attributes: List[str]
+    ) -> str:
+        arg_list: str = ", ".join(
+            [ivpX_struct_parameter_name + "." + attr for attr in attributes]
+        )
+
+        optional_ubo_matrix_uploading_logic: str = f"""
+
+
+// NOTE: for singular draw objects their ID represent their ltw matrix index
+// but when working with tigs they don't (collection of draw_info structs all with same ltw idx)
+set_ltw_matrix({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.transform.get_transform_matrix());
+        """
+
+        return f"""
+
+// NOTE: if you try and cache something for drawing that isn't registered in the system we'll do that now
+bool ivp_is_not_yet_registered = {ivpX_struct_parameter_name}.id == -1;
+if (ivp_is_not_yet_registered) {{
+    tag_id({ivpX_struct_parameter_name});
+}}
+
+{optional_ubo_matrix_uploading_logic if self.is_ubo_shader else ""} 
+
+{f'std::vector<unsigned int> ltw_indices({ivpX_struct_parameter_name}.xyz_positions.size(), {ivpX_struct_parameter_name}.id);' if self.is_ubo_shader and not self.use_instancing else ''}
+bool replace = {ivpX_struct_parameter_name}.buffer_modification_tracker.has_been_modified_since_last_buffering();
+cache({ivpX_struct_parameter_name}.id, {ivpX_struct_parameter_name}.indices, {arg_list}{', ltw_indices' if self.is_ubo_shader and not self.use_instancing else ''}, replace);
+// NOTE: sometimes the queue draw doesn't buffer any data, so this method name might be bad, the inner logic makes sense though.
+{ivpX_struct_parameter_name}.buffer_modification_tracker.just_buffered_data();
+"""
+
+    def get_queue_draw_methods_for_draw_info_structs(self) -> List[CppMethod]:
+        # NOTE: we are generating a bunch of versions of the same function by allowing classes with at least the same attributes as the
+        # base param class to be passed in saving us time in the cpp code, guess eventually this could be templatized right? that would be we're generating templatized code which is pretty confusing... avoiding that for now.
+
+        def generate_ivpX_queue_draw_hierarchy_methods(
+            base_param: CppParameter, draw_info_attribute_names: List[str]
+        ) -> List[CppMethod]:
+            return [
+                CppMethod(
+                    "queue_draw",
+                    "void",
+                    [super_class_param],
+                    self.generate_ivpX_queue_draw_body(
+                        super_class_param.name, draw_info_attribute_names
+                    ),
+                    "public",
+                )
+                for super_class_param in ivpX_param_ref_to_superclass_param_refs[
+                    base_param
+                ]
+            ]
+
+        def generate_ivpX_cache_hierarchy_methods(
+            base_param: CppParameter, draw_info_attribute_names: List[str]
+        ) -> List[CppMethod]:
+            return [
+                CppMethod(
+                    "cache",
+                    "void",
+                    [super_class_param],
+                    self.generate_ivpX_cache_body(
+                        super_class_param.name, draw_info_attribute_names
+                    ),
+                    "public",
+                )
+                for super_class_param in ivpX_param_ref_to_superclass_param_refs[
+                    base_param
+                ]
+            ]
+
+        def generate_ivpX_tag_id_hierarchy_methods(
+            base_param_ref: CppParameter,
+        ) -> List[CppMethod]:
+            return [
+                CppMethod(
+                    "tag_id",
+                    "void",
+                    [super_class_param_ref],
+                    self.generate_ivpX_tag_id_body(super_class_param_ref.name),
+                    "public",
+                )
+                for super_class_param_ref in ivpX_param_ref_to_superclass_param_refs[
+                    base_param_ref
+                ]
+            ]
+
+        # NOTE: doing this in a stupid way, building a bunch of data and then later on only selecting the stuff we need rather than just
+        # only generating the stuff we need in the first place
+        ivp_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
+            ivp_param_ref, ["xyz_positions"]
+        )
+        ivpn_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
+            ivpn_param_ref, ["xyz_positions", "normals"]
+        )
+        ivpc_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
+            ivpc_param_ref, ["xyz_positions", "rgb_colors"]
+        )
+        ivpnc_queue_draw_hierarchy_methods = generate_ivpX_queue_draw_hierarchy_methods(
+            ivpnc_param_ref, ["xyz_positions", "normals", "rgb_colors"]
+        )
+
+        ivp_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
+            ivp_param_ref, ["xyz_positions"]
+        )
+        ivpn_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
+            ivpn_param_ref, ["xyz_positions", "normals"]
+        )
+        ivpc_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
+            ivpc_param_ref, ["xyz_positions", "rgb_colors"]
+        )
+        ivpnc_cache_hierarchy_methods = generate_ivpX_cache_hierarchy_methods(
+            ivpnc_param_ref, ["xyz_positions", "normals", "rgb_colors"]
+        )
+
+        ivp_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
+            ivp_param_ref
+        )
+        ivpn_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
+            ivpn_param_ref
+        )
+        ivpc_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
+            ivpc_param_ref
+        )
+        ivpnc_tag_id_hierarchy_methods = generate_ivpX_tag_id_hierarchy_methods(
+            ivpc_param_ref
+        )
+
+        draw_info_struct_to_queue_draw_cpp_methods: Dict[DrawInfo, List[CppMethod]] = {
+            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_queue_draw_hierarchy_methods,
+            DrawInfo.IVPNORMALS: ivpn_queue_draw_hierarchy_methods,
+            DrawInfo.IVPCOLOR: ivpc_queue_draw_hierarchy_methods,
+            DrawInfo.IVPNCOLOR: ivpnc_queue_draw_hierarchy_methods,
+        }
+
+        draw_info_struct_to_cache_cpp_methods: Dict[DrawInfo, List[CppMethod]] = {
+            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_cache_hierarchy_methods,
+            DrawInfo.IVPNORMALS: ivpn_cache_hierarchy_methods,
+            DrawInfo.IVPCOLOR: ivpc_cache_hierarchy_methods,
+            DrawInfo.IVPNCOLOR: ivpnc_cache_hierarchy_methods,
+        }
+
+        draw_info_struct_to_tag_id_cpp_method: Dict[DrawInfo, List[CppMethod]] = {
+            DrawInfo.INDEXED_VERTEX_POSITIONS: ivp_tag_id_hierarchy_methods,
+            DrawInfo.IVPNORMALS: ivpn_tag_id_hierarchy_methods,
+            DrawInfo.IVPCOLOR: ivpc_tag_id_hierarchy_methods,
+            DrawInfo.IVPNCOLOR: ivpnc_tag_id_hierarchy_methods,
+        }
+
+        # NOTE: we're using this for all of them, bad.
+        queue_draw_methods: List[CppMethod] = []
+
+        associated_draw_info_struct: Optional[DrawInfo] = (
+            self.get_associated_draw_info_struct()
+        )
+
+        if associated_draw_info_struct:
+            associated_queue_draw_methods: List[CppMethod] = (
+                draw_info_struct_to_queue_draw_cpp_methods[associated_draw_info_struct]
+            )
+            queue_draw_methods.extend(associated_queue_draw_methods)
+
+            associated_cache_methods: List[CppMethod] = (
+                draw_info_struct_to_cache_cpp_methods[associated_draw_info_struct]
+            )
+            queue_draw_methods.extend(associated_cache_methods)
+
+            associated_tag_id_methods: List[CppMethod] = (
+                draw_info_struct_to_tag_id_cpp_method[associated_draw_info_struct]
+            )
+            queue_draw_methods.extend(associated_tag_id_methods)
+        else:
+            print("cannot find an associated queue draw call")
+
+        return queue_draw_methods
+
+    def generate_queue_draw_body(self) -> str:
+
+        parameters_to_cache: List[str] = []
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            parameters_to_cache.append(data.plural_name)
+
+        unique_cache_params = ", ".join(parameters_to_cache)
+
+        body = f"""
+        {"instances_this_tick.emplace_back(object_id, ltw_index);" if self.use_instancing else "object_ids_this_tick.push_back(object_id);"}
+        cache(object_id, indices, {unique_cache_params}, replace);
+        """
+        return body
+
+    def generate_attribute_upload_lines(
+        self, vertex_attribute: ShaderVertexAttributeVariable, start_index: str
+    ) -> List[str]:
+        """the lines which put the data held by the parameter named after the attribute at start_index in its buffer"""
+        sva_data = shader_vertex_attribute_to_data[vertex_attribute]
+        if self.has_shadow_copy:
+            # the shadow copy is the source of truth, the buffers are brought up to date with it right before drawing
+            return [
+                f"std::copy({sva_data.plural_name}.begin(), {sva_data.plural_name}.end(), {sva_data.plural_name}_shadow.begin() + {start_index});"
+            ]
+        if self.is_coalescing:
+            return [
+                f"pending_{sva_data.plural_name}_uploads.emplace_back({start_index}, {sva_data.plural_name});"
+            ]
+        return [
+            f"glBindBuffer(GL_ARRAY_BUFFER, {sva_data.plural_name}_buffer_object);",
+            f"glBufferSubData(GL_ARRAY_BUFFER, {start_index} * sizeof({sva_data.attrib_type}), {sva_data.plural_name}.size() * sizeof({sva_data.attrib_type}), {sva_data.plural_name}.data());",
+        ]
+
+    def generate_update_attributes_parameter_list(self) -> List[CppParameter]:
+        parameter_list = [CppParameter("object_id", "unsigned int", "const")]
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            parameter_list.append(
+                CppParameter(
+                    f"new_{data.plural_name}",
+                    f"const std::vector<{data.attrib_type}> *",
+                    "",
+                    False,
+                    "nullptr",
+                )
+            )
+        return parameter_list
+
+    def generate_update_attributes_body(self) -> str:
+        def generate_vertex_count_check(data) -> str:
+            return f"""
+    if (new_{data.plural_name} and new_{data.plural_name}->size() != length) {{
+        throw std::runtime_error("update_attributes was given {data.plural_name} that don't match the cached vertex count.");
+    }}"""
+
+        vertex_count_checks = "".join(
+            generate_vertex_count_check(shader_vertex_attribute_to_data[v])
+            for v in self.per_vertex_attributes
+        )
+
+        if self.deduplicate_geometry:
+            draw_data_struct_name = get_draw_data_struct_name(self.shader_type)
+            replacements = "".join(
+                f"""
+    if (new_{shader_vertex_attribute_to_data[v].plural_name}) {{
+        draw_data.{shader_vertex_attribute_to_data[v].plural_name} = *new_{shader_vertex_attribute_to_data[v].plural_name};
+    }}"""
+                for v in self.per_vertex_attributes
+            )
+            cache_arguments = ", ".join(
+                ["draw_data.indices"]
+                + [
+                    f"draw_data.{shader_vertex_attribute_to_data[v].plural_name}"
+                    for v in self.per_vertex_attributes
+                ]
+            )
+            recache_lines = f"""
+    cache(object_id, {cache_arguments}, true);"""
+            if self.use_lods:
+                recache_lines = f"""
+    // cache forgets the levels of the geometry it lands on, they index the same vertices so they carry over to it
+    std::vector<std::pair<unsigned int, unsigned int>> index_ranges;
+    auto lods = lod_index_ranges.find(geometry->second);
+    if (lods != lod_index_ranges.end()) {{
+        index_ranges = lods->second;
+    }}
+    cache(object_id, {cache_arguments}, true);
+    if (not index_ranges.empty()) {{
+        lod_index_ranges.insert_or_assign(object_id_to_geometry_id[object_id], index_ranges);
+    }}"""
+            return f"""
+    GlobalLogSection("update_attributes", logging_enabled);
+    auto geometry = object_id_to_geometry_id.find(object_id);
+    if (geometry == object_id_to_geometry_id.end()) {{
+        global_logger->warn("you tried to update an object that is not cached, it has id: {{}}", object_id);
+        return;
+    }}
+    size_t length = fsat.get_metadata(geometry->second)->second;
+{vertex_count_checks}
+
+    // the geometry may be shared with other objects, so the updated data goes through cache like any new data would,
+    // which gives this object a geometry of its own or lets it share another one as needed
+    {draw_data_struct_name} draw_data = geometry_draw_data[geometry->second];{replacements}{recache_lines}
+    """
+
+        uploads = ""
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            upload_lines = "\n".join(
+                TAB * 2 + line
+                for line in self.generate_attribute_upload_lines(vertex_attribute, "start")
+            )
+            uploads += f"""
+    if (new_{data.plural_name}) {{
+        const std::vector<{data.attrib_type}> &{data.plural_name} = *new_{data.plural_name};
+{upload_lines}
+    }}"""
+
+        if self.is_streaming:
+            uploads += """
+    mark_stream_range_dirty(start, length);"""
+        elif self.has_shadow_copy:
+            uploads += """
+    pending_upload_ranges.emplace_back(start, length);"""
+
+        if self.has_bounding_spheres:
+            uploads += "\n" + self.generate_update_bounding_sphere_lines(
+                "object_id", "new_", "*new_"
+            )
+
+        return f"""
+    GlobalLogSection("update_attributes", logging_enabled);
+    auto metadata = fsat.get_metadata(object_id);
+    if (not metadata) {{
+        global_logger->warn("you tried to update an object that is not cached, it has id: {{}}", object_id);
+        return;
+    }}
+    auto [start, length] = *metadata;
+{vertex_count_checks}
+
+    // the vertex count is unchanged so the data is overwritten where it is, the indices and the draw list stay as they are
+{uploads}
+    """
+
+    def generate_update_bounding_sphere_lines(
+        self, geometry_id: str, presence_prefix: str = "", access_prefix: str = ""
+    ) -> str:
+        """
+        the bounds only depend on the positions and, without instancing, on the ltw indices of the ubo shaders, when
+        presence_prefix is given each of those is only used if the pointer with that prefix is set
+        """
+        sources = [
+            (
+                ShaderVertexAttributeVariable.XYZ_POSITION,
+                "update_bounding_sphere",
+            )
+        ]
+        if self.has_per_vertex_ltw_indices:
+            sources.append(
+                (
+                    ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX,
+                    "update_bounding_sphere_ltw_index",
+                )
+            )
+        lines = []
+        for vertex_attribute, method_name in sources:
+            plural_name = shader_vertex_attribute_to_data[vertex_attribute].plural_name
+            call = f"{method_name}({geometry_id}, {access_prefix}{plural_name});"
+            if presence_prefix:
+                lines.append(f"""    if ({presence_prefix}{plural_name}) {{
+        {call}
+    }}""")
+            else:
+                lines.append(f"    {call}")
+        return "\n".join(lines)
+
+    def generate_cache_body(self) -> str:
+
+        vertex_count_source = shader_vertex_attribute_to_data[
+            self.per_vertex_attributes[0]
+        ].plural_name
+
+        if self.growth_factor:
+            out_of_space_handling = """
+        // compacting wasn't enough, but we're allowed to grow so make sure the new object fits at the end
+        if (!start_index) {
+            grow(buffer_capacity + length);
+            start_index = fsat.find_contiguous_space(length);
+        }"""
+        else:
+            out_of_space_handling = """
+        if (!start_index) {
+            throw std::runtime_error("not enough space even after compacting.");
+        }"""
+
+        def generate_sub_buffering_calls() -> str:
+            lines = []
+            for v in self.per_vertex_attributes:
+                lines.extend(self.generate_attribute_upload_lines(v, "*start_index"))
+                lines.append("\n")
+
+            if self.is_streaming:
+                lines.append("mark_stream_range_dirty(*start_index, length);")
+            elif self.has_shadow_copy:
+                lines.append("pending_upload_ranges.emplace_back(*start_index, length);")
+
+            indentation = TAB
+            for i in range(len(lines)):
+                lines[i] = indentation + lines[i]
+
+            return "\n".join(lines)
+
+        if self.deduplicate_geometry:
+            draw_data_struct_name = get_draw_data_struct_name(self.shader_type)
+            draw_data_members = ", ".join(
+                ["indices"]
+                + [
+                    shader_vertex_attribute_to_data[v].plural_name
+                    for v in self.per_vertex_attributes
+                ]
+            )
+            release_previous_data = f"""
+    auto cached_geometry = object_id_to_geometry_id.find(object_id);
+    bool incoming_data_is_already_cached = cached_geometry != object_id_to_geometry_id.end();
+
+    if (incoming_data_is_already_cached and not replace) {{
+        return;
+    }}
+
+    // if identical data is already in the buffers then this object just shares it
+    {draw_data_struct_name} draw_data{{{draw_data_members}}};
+    size_t draw_data_hash = draw_data.hash();
+    auto [candidate, candidates_end] = draw_data_hash_to_geometry_ids.equal_range(draw_data_hash);
+    for (; candidate != candidates_end; ++candidate) {{
+        unsigned int geometry_id = candidate->second;
+        if (geometry_draw_data[geometry_id] == draw_data) {{
+            // taken before the old geometry is released so that re-caching the same data never frees it
+            ++geometry_reference_counts[geometry_id];
+            if (incoming_data_is_already_cached) {{
+                release_geometry(cached_geometry->second);
+            }}
+            object_id_to_geometry_id.insert_or_assign(object_id, geometry_id);
+            replaced_data_for_an_object_this_tick = true;
+            return;
+        }}
+    }}
+
+    // the data is new, so this object gets a geometry of its own. when nothing else was sharing the old one it's
+    // turned into the new one so that its space can be reused, otherwise the object lets go of it
+    unsigned int geometry_id;
+    if (incoming_data_is_already_cached and geometry_reference_counts[cached_geometry->second] == 1) {{
+        geometry_id = cached_geometry->second;
+        unregister_geometry_hash(geometry_id);
+    }} else {{
+        if (incoming_data_is_already_cached) {{
+            release_geometry(cached_geometry->second);
+            object_id_to_geometry_id.erase(cached_geometry);
+        }}
+        geometry_id = acquire_geometry_id();
+    }}
+"""
+            register_geometry = """
+    geometry_draw_data[geometry_id] = std::move(draw_data);
+    geometry_draw_data_hashes[geometry_id] = draw_data_hash;
+    geometry_reference_counts[geometry_id] = 1;
+    draw_data_hash_to_geometry_ids.emplace(draw_data_hash, geometry_id);
+    object_id_to_geometry_id.insert_or_assign(object_id, geometry_id);
+"""
+        else:
+            release_previous_data = """
+    bool incoming_data_is_already_cached = fsat.get_metadata(object_id).has_value();
+
+    if (incoming_data_is_already_cached and not replace) {
+        return;
+    }
+
+    // therefore the data is either not cached, or it needs to be replaced
+    // in both of those cases the data needs to be stored, so moving on:
+
+"""
+            register_geometry = ""
+
+        body = f"""
+    bool logging = false;
+{release_previous_data}
+    // note we use {vertex_count_source} because that information is what gets stored into the vertex buffer objects
+    // note that any other vertex data could be used as they must all have the same size
+    size_t length = {vertex_count_source}.size();
+
+    // replaced data that still fits where the old data was is written over it, so an object that's re-cached every
+    // frame stays put and doesn't need a search for space
+    std::optional<unsigned int> start_index;
+    bool reused_space = fsat.resize_in_place({self.geometry_id}, length);
+    if (reused_space) {{
+        start_index = fsat.get_metadata({self.geometry_id})->first;
+    }} else {{
+        // if the data already exists then mark that space as free, it only needs to occur in the realm of metadata
+        // later on we'll just clobber the real contents of the VBO which is not a problem
+        if (fsat.get_metadata({self.geometry_id})) {{
+            fsat.remove_metadata({self.geometry_id});
+        }}
+        start_index = fsat.find_contiguous_space(length);
+    }}
+
+    // if there's no space left we will compactify things, and try again.
+    if (!start_index) {{
+        compact();
+        start_index = fsat.find_contiguous_space(length);
+{out_of_space_handling}
+    }}
+
+    // at this point it's guarenteed that there is space for the object.
+    // therefore *start_index is competely valid from now on
+
+    // the indices are stored as given, relative to the object's first vertex, *start_index is supplied as the base
+    // vertex when drawing. since the positions vector has N elements the indices are only allowed to be 0, ..., N - 1
+    // so they always land within the space found by find_contiguous_space.
+
+    // the indices live in their own slot of the element buffer, only that slot is written
+    auto previous_index_slot = index_fsat.get_metadata({self.geometry_id});
+    bool reused_index_slot = index_fsat.resize_in_place({self.geometry_id}, indices.size());
+    std::optional<unsigned int> index_start;
+    if (reused_index_slot) {{
+        index_start = previous_index_slot->first;
+    }} else {{
+        if (previous_index_slot) {{
+            index_fsat.remove_metadata({self.geometry_id});
+        }}
+        index_start = index_fsat.find_contiguous_space(indices.size());
+        if (!index_start) {{
+            compact_index_buffer();
+            index_start = index_fsat.find_contiguous_space(indices.size());
+            if (!index_start) {{
+                grow_index_buffer(index_buffer_capacity + indices.size());
+                index_start = index_fsat.find_contiguous_space(indices.size());
+            }}
+        }}
+        index_fsat.add_metadata({self.geometry_id}, *index_start, indices.size());
+    }}
+    write_index_slot(*index_start, indices);
+
+    // now we put that data into the graphics card
+    glBindVertexArray(vertex_attribute_object);
+
+{generate_sub_buffering_calls()}
+
+    glBindVertexArray(0);
+
+    // ok now we're done, update the metadata so that we know this space is used up
+    if (not reused_space) {{
+        fsat.add_metadata({self.geometry_id}, *start_index, length);
+    }}
+{register_geometry}{self.generate_update_bounding_sphere_lines(self.geometry_id) + chr(10) if self.has_bounding_spheres else ""}{self.generate_forget_lod_lines() if self.use_lods else ""}
+    // the draw list only has to be rebuilt when the object's index slot or base vertex moved or its index count changed
+    bool draw_list_is_unchanged = reused_space and reused_index_slot and previous_index_slot->second == indices.size();
+    if (not draw_list_is_unchanged) {{
+        replaced_data_for_an_object_this_tick = true;
+    }}
+
+    if (logging) {{
+        std::cout << "^^^ QUEUE_DRAW ^^^" << std::endl;
+    }}
+        """
+        return body
+
+    def generate_move_buffer_range_body(self) -> str:
+        return f"""
+    if (from == to or length == 0) {{
+        return;
+    }}
+
+    GLsizeiptr num_bytes = length * element_size;
+    GLintptr from_offset = from * element_size;
+    GLintptr to_offset = to * element_size;
+
+    bool ranges_overlap = (from < to ? to - from : from - to) < length;
+    if (not ranges_overlap) {{
+        glBindBuffer(GL_COPY_READ_BUFFER, buffer_object);
+        glBindBuffer(GL_COPY_WRITE_BUFFER, buffer_object);
+        glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, from_offset, to_offset, num_bytes);
+        return;
+    }}
+
+    // glCopyBufferSubData doesn't allow overlapping ranges within one buffer so we bounce through a scratch buffer,
+    // the data never leaves the graphics card
+    if (num_bytes > scratch_buffer_size) {{
+        if (scratch_buffer_object == 0) {{
+            glGenBuffers(1, &scratch_buffer_object);
+        }}
+        glBindBuffer(GL_COPY_WRITE_BUFFER, scratch_buffer_object);
+        glBufferData(GL_COPY_WRITE_BUFFER, num_bytes, nullptr, GL_DYNAMIC_COPY);
+        scratch_buffer_size = num_bytes;
+    }}
+
+    glBindBuffer(GL_COPY_READ_BUFFER, buffer_object);
+    glBindBuffer(GL_COPY_WRITE_BUFFER, scratch_buffer_object);
+    glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, from_offset, 0, num_bytes);
+
+    glBindBuffer(GL_COPY_READ_BUFFER, scratch_buffer_object);
+    glBindBuffer(GL_COPY_WRITE_BUFFER, buffer_object);
+    glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, 0, to_offset, num_bytes);
+    """
+
+    def generate_reallocate_buffer_body(self) -> str:
+        return """
+    GLuint new_buffer_object;
+    glGenBuffers(1, &new_buffer_object);
+    glBindBuffer(GL_COPY_WRITE_BUFFER, new_buffer_object);
+    glBufferData(GL_COPY_WRITE_BUFFER, new_num_bytes, nullptr, GL_DYNAMIC_DRAW);
+
+    // the old contents are copied over on the graphics card
+    glBindBuffer(GL_COPY_READ_BUFFER, buffer_object);
+    glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, 0, 0, old_num_bytes);
+
+    glDeleteBuffers(1, &buffer_object);
+    return new_buffer_object;
+    """
+
+    def generate_grow_body(self) -> str:
+        reallocations = ""
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            buffer_object_var_name = f"{data.plural_name}_buffer_object"
+            reallocations += f"""
+    {buffer_object_var_name} = reallocate_buffer({buffer_object_var_name}, buffer_capacity * sizeof({data.attrib_type}), new_capacity * sizeof({data.attrib_type}));
+    shader_cache.configure_vertex_attributes_for_drawables_vao(vertex_attribute_object, {buffer_object_var_name}, ShaderType::{self.shader_type.name}, ShaderVertexAttributeVariable::{vertex_attribute.name});
+"""
+
+        return f"""
+    GlobalLogSection("grow", logging_enabled);
+
+    size_t new_capacity = std::max(minimum_capacity, static_cast<size_t>(std::ceil(buffer_capacity * {self.growth_factor})));
+
+    glBindVertexArray(vertex_attribute_object);
+{reallocations}
+    glBindVertexArray(0);
+
+{"".join(f"    {shader_vertex_attribute_to_data[v].plural_name}_shadow.resize(new_capacity);{chr(10)}" for v in self.per_vertex_attributes) if self.has_shadow_copy else ""}
+    fsat.grow(new_capacity);
+    global_logger->info("grew {{}} from {{}} to {{}} elements", name, buffer_capacity, new_capacity);
+    buffer_capacity = new_capacity;
+    """
+
+    def generate_write_index_slot_body(self) -> str:
+        return """
+    // bound to the copy target so that the element buffer binding of whatever vertex array is current isn't touched
+    glBindBuffer(GL_COPY_WRITE_BUFFER, indices_buffer_object);
+    glBufferSubData(GL_COPY_WRITE_BUFFER, start * sizeof(unsigned int), indices.size() * sizeof(unsigned int), indices.data());
+    """
+
+    def generate_compact_index_buffer_body(self) -> str:
+        return """
+    GlobalLogSection("compact_index_buffer", logging_enabled);
+    std::vector<RangeRelocation> relocations = index_fsat.compact();
+    // the slots hold indices relative to their object's first vertex so they're moved as is
+    for (const RangeRelocation &relocation : relocations) {
+        move_buffer_range(indices_buffer_object, sizeof(unsigned int), relocation.old_start, relocation.new_start, relocation.length);
+    }
+
+    if (not relocations.empty()) {
+        // the draw list holds slot offsets so it has to be rebuilt on the next draw
+        replaced_data_for_an_object_this_tick = true;
+    }
+    """
+
+    def generate_grow_index_buffer_body(self) -> str:
+        return """
+    GlobalLogSection("grow_index_buffer", logging_enabled);
+
+    // how many indices the cached objects need can't be known up front, so unlike the vertex buffers the element
+    // buffer always grows when it runs out of space
+    size_t new_capacity = std::max(minimum_capacity, index_buffer_capacity * 2);
+
+    // the element buffer binding is part of the vertex array state so it has to be rebound
+    glBindVertexArray(vertex_attribute_object);
+    indices_buffer_object = reallocate_buffer(indices_buffer_object, index_buffer_capacity * sizeof(unsigned int), new_capacity * sizeof(unsigned int));
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, indices_buffer_object);
+    glBindVertexArray(0);
+
+    index_fsat.grow(new_capacity);
+    global_logger->info("grew the element buffer of {} from {} to {} indices", name, index_buffer_capacity, new_capacity);
+    index_buffer_capacity = new_capacity;
+    """
+
+    def generate_upload_draw_commands_body(self) -> str:
+        return """
+    GLsizeiptr num_bytes = commands.size() * sizeof(DrawElementsIndirectCommand);
+    glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+    if (num_bytes > draw_indirect_buffer_size) {
+        glBufferData(GL_DRAW_INDIRECT_BUFFER, num_bytes, commands.data(), GL_DYNAMIC_DRAW);
+        draw_indirect_buffer_size = num_bytes;
+    } else {
+        glBufferSubData(GL_DRAW_INDIRECT_BUFFER, 0, num_bytes, commands.data());
+    }
+    """
+
+    def generate_set_ltw_matrix_body(self) -> str:
+        return f"""
+    // objects that didn't move are queued every frame as well, they shouldn't cost an upload
+    if (ltw_matrices[ltw_index] == matrix) {{
+        return;
+    }}
+    ltw_matrices[ltw_index] = matrix;
+    dirty_ltw_matrix_ranges.emplace_back(ltw_index, 1);{chr(10) + "    view_inputs_changed_this_tick = true;" if self.has_view_dependent_draw_list else ""}
+    """
+
+    def generate_set_culling_view_body(self) -> str:
+        extract_planes = """
+    // the planes are sums and differences of the rows of the view projection matrix, normalized so that plugging a
+    // point into one gives its signed distance to that plane (left, right, bottom, top, near, far)
+    auto row = [&](int i) {
+        return glm::vec4(view_projection[0][i], view_projection[1][i], view_projection[2][i], view_projection[3][i]);
+    };
+    glm::vec4 planes[6] = {row(3) + row(0), row(3) - row(0), row(3) + row(1),
+                           row(3) - row(1), row(3) + row(2), row(3) - row(2)};
+"""
+        if self.is_culling_on_gpu:
+            return (
+                extract_planes
+                + """
+    // the view only reaches the graphics card as uniforms of the culling pass, so nothing has to be rebuilt for it
+    for (int i = 0; i < 6; ++i) {
+        frustum_planes[i] = planes[i] / glm::length(glm::vec3(planes[i]));
+    }
+    culling_camera_position = camera_position;
+    max_draw_distance = draw_distance;
+    has_culling_view = true;
+    """
+            )
+        return (
+            extract_planes
+            + """
+    bool view_changed =
+        not has_culling_view or camera_position != culling_camera_position or draw_distance != max_draw_distance;
+    for (int i = 0; i < 6; ++i) {
+        glm::vec4 plane = planes[i] / glm::length(glm::vec3(planes[i]));
+        view_changed = view_changed or plane != frustum_planes[i];
+        frustum_planes[i] = plane;
+    }
+    culling_camera_position = camera_position;
+    max_draw_distance = draw_distance;
+    has_culling_view = true;
+
+    // a camera that stays put doesn't cost a rebuild of the draw list
+    if (view_changed) {
+        view_inputs_changed_this_tick = true;
+    }
+    """
+        )
+
+    def get_bounds_changed_flag(self) -> str:
+        # on the gpu the bounds are part of the objects sent to the culling pass, so they're resent like changed data
+        if self.is_culling_on_gpu:
+            return "replaced_data_for_an_object_this_tick"
+        return "view_inputs_changed_this_tick"
+
+    def generate_update_bounding_sphere_body(self) -> str:
+        xyz_positions = shader_vertex_attribute_to_data[
+            ShaderVertexAttributeVariable.XYZ_POSITION
+        ].plural_name
+        return f"""
+    // centered on the axis aligned box around the positions, which is cheap and close enough to the smallest sphere
+    glm::vec3 min_corner(std::numeric_limits<float>::max());
+    glm::vec3 max_corner(std::numeric_limits<float>::lowest());
+    for (const glm::vec3 &position : {xyz_positions}) {{
+        min_corner = glm::min(min_corner, position);
+        max_corner = glm::max(max_corner, position);
+    }}
+    glm::vec3 center = {xyz_positions}.empty() ? glm::vec3(0.0f) : (min_corner + max_corner) * 0.5f;
+
+    float radius = 0.0f;
+    for (const glm::vec3 &position : {xyz_positions}) {{
+        radius = std::max(radius, glm::length(position - center));
+    }}
+
+    bounding_spheres.insert_or_assign(geometry_id, {get_bounding_sphere_struct_name()}{{center, radius}});
+    {self.get_bounds_changed_flag()} = true;
+    """
+
+    def generate_update_bounding_sphere_ltw_index_body(self) -> str:
+        ltw_indices = shader_vertex_attribute_to_data[
+            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+        ].plural_name
+        return f"""
+    // the sphere can only be moved by one matrix, so when the vertices don't agree on one the object is always drawn
+    bool vertices_share_an_ltw_index =
+        not {ltw_indices}.empty() and
+        std::all_of({ltw_indices}.begin(), {ltw_indices}.end(), [&](unsigned int ltw_index) {{ return ltw_index == {ltw_indices}.front(); }});
+    if (vertices_share_an_ltw_index) {{
+        bounding_sphere_ltw_indices.insert_or_assign(geometry_id, {ltw_indices}.front());
+    }} else {{
+        bounding_sphere_ltw_indices.erase(geometry_id);
+    }}
+    {self.get_bounds_changed_flag()} = true;
+    """
+
+    def generate_get_world_bounding_sphere_body(self) -> str:
+        transform_sphere = ""
+        if self.is_ubo_shader:
+            if self.has_per_vertex_ltw_indices:
+                find_ltw_index = """
+    auto shared_ltw_index = bounding_sphere_ltw_indices.find(geometry_id);
+    if (shared_ltw_index == bounding_sphere_ltw_indices.end()) {
+        return std::nullopt;
+    }
+    unsigned int ltw_index = shared_ltw_index->second;"""
+            else:
+                find_ltw_index = ""
+            transform_sphere = f"""{find_ltw_index}
+
+    // the sphere is moved into the world like the vertices are, its radius grows with the largest scale of the matrix
+    const glm::mat4 &ltw_matrix = ltw_matrices[ltw_index];
+    sphere.center = glm::vec3(ltw_matrix * glm::vec4(sphere.center, 1.0f));
+    float largest_squared_scale = std::max({{glm::dot(glm::vec3(ltw_matrix[0]), glm::vec3(ltw_matrix[0])),
+                                             glm::dot(glm::vec3(ltw_matrix[1]), glm::vec3(ltw_matrix[1])),
+                                             glm::dot(glm::vec3(ltw_matrix[2]), glm::vec3(ltw_matrix[2]))}});
+    sphere.radius *= std::sqrt(largest_squared_scale);"""
+
+        return f"""
+    auto bounding_sphere = bounding_spheres.find(geometry_id);
+    if (bounding_sphere == bounding_spheres.end()) {{
+        return std::nullopt;
+    }}
+    {get_bounding_sphere_struct_name()} sphere = bounding_sphere->second;{transform_sphere}
+    return sphere;
+    """
+
+    def generate_is_visible_body(self) -> str:
+        arguments = "geometry_id, ltw_index" if self.use_instancing else "geometry_id"
+        return f"""
+    if (not has_culling_view) {{
+        return true;
+    }}
+    // objects whose place in the world isn't known are always drawn
+    auto sphere = get_world_bounding_sphere({arguments});
+    if (not sphere) {{
+        return true;
+    }}
+
+    if (glm::length(sphere->center - culling_camera_position) - sphere->radius > max_draw_distance) {{
+        return false;
+    }}
+    for (const glm::vec4 &plane : frustum_planes) {{
+        if (glm::dot(glm::vec3(plane), sphere->center) + plane.w < -sphere->radius) {{
+            return false;
+        }}
+    }}
+    return true;
+    """
+
+    def generate_set_lod_view_body(self) -> str:
+        return """
+    lod_camera_position = camera_position;
+    this->lod_switch_distances = lod_switch_distances;
+    view_inputs_changed_this_tick = true;
+    """
+
+    def generate_select_lod_body(self) -> str:
+        arguments = "geometry_id, ltw_index" if self.use_instancing else "geometry_id"
+        return f"""
+    // objects whose place in the world isn't known are drawn at full detail
+    auto sphere = get_world_bounding_sphere({arguments});
+    if (not sphere) {{
+        return 0;
+    }}
+
+    // measured to the surface of the sphere so large objects don't lose detail while the camera is close to them
+    float distance = std::max(0.0f, glm::length(sphere->center - lod_camera_position) - sphere->radius);
+    unsigned int level = 0;
+    while (level + 1 < num_levels and level < lod_switch_distances.size() and distance >= lod_switch_distances[level]) {{
+        ++level;
+    }}
+    return level;
+    """
+
+    def generate_cache_lods_parameter_list(self) -> List[CppParameter]:
+        parameters = [
+            CppParameter("object_id", "unsigned int", "const"),
+            CppParameter(
+                "lod_indices",
+                "std::vector<std::vector<unsigned int>>",
+                "const",
+                True,
+            ),
+        ]
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            parameters.append(
+                CppParameter(
+                    data.plural_name, f"std::vector<{data.attrib_type}>", "const", True
+                )
+            )
+        parameters.append(CppParameter("replace", "bool", "", False, "false"))
+        return parameters
+
+    def generate_cache_lods_body(self) -> str:
+        vertex_arguments = ", ".join(
+            shader_vertex_attribute_to_data[vertex_attribute].plural_name
+            for vertex_attribute in self.per_vertex_attributes
+        )
+        geometry_id = (
+            "object_id_to_geometry_id[object_id]"
+            if self.deduplicate_geometry
+            else "object_id"
+        )
+        return f"""
+    if ({self.generate_is_cached_expression()} and not replace) {{
+        return;
+    }}
+
+    // every level is put one after the other into the same index slot, all of them index the same vertices
+    std::vector<unsigned int> indices;
+    std::vector<std::pair<unsigned int, unsigned int>> index_ranges;
+    for (const std::vector<unsigned int> &level_indices : lod_indices) {{
+        index_ranges.emplace_back(indices.size(), level_indices.size());
+        indices.insert(indices.end(), level_indices.begin(), level_indices.end());
+    }}
+
+    cache(object_id, indices, {vertex_arguments}, replace);
+    if (not index_ranges.empty()) {{
+        lod_index_ranges.insert_or_assign({geometry_id}, index_ranges);
+    }}
+    replaced_data_for_an_object_this_tick = true;
+    """
+
+    def generate_culling_compute_shader_source(self) -> str:
+        if self.is_ubo_shader:
+            ltw_matrices_declaration = f"""
+layout(std140, binding = 0) uniform LtwMatrices {{
+    mat4 ltw_matrices[{NUM_UBO_LTW_MATRICES}];
+}};"""
+            ltw_index_is_usable = "object.ltw_index != NO_LTW_INDEX"
+        else:
+            ltw_matrices_declaration = ""
+
+        if self.is_ubo_shader:
+            transform_sphere = f"""
+    if ({ltw_index_is_usable}) {{
+        mat4 ltw_matrix = ltw_matrices[object.ltw_index];
+        center = (ltw_matrix * vec4(center, 1.0)).xyz;
+        radius *= sqrt(max(max(dot(ltw_matrix[0].xyz, ltw_matrix[0].xyz), dot(ltw_matrix[1].xyz, ltw_matrix[1].xyz)),
+                           dot(ltw_matrix[2].xyz, ltw_matrix[2].xyz)));
+    }}"""
+        else:
+            transform_sphere = ""
+
+        return f"""#version 460
+layout(local_size_x = {GPU_CULLING_WORKGROUP_SIZE}) in;
+
+const uint NO_LTW_INDEX = 0xFFFFFFFFu;
+
+struct CullObject {{
+    vec4 bounding_sphere;
+    uint count;
+    uint first_index;
+    int base_vertex;
+    uint ltw_index;
+}};
+
+struct DrawElementsIndirectCommand {{
+    uint count;
+    uint instance_count;
+    uint first_index;
+    int base_vertex;
+    uint base_instance;
+}};
+
+layout(std430, binding = 1) readonly buffer CullObjects {{
+    CullObject cull_objects[];
+}};
+layout(std430, binding = 2) writeonly buffer DrawCommands {{
+    DrawElementsIndirectCommand draw_commands[];
+}};
+layout(std430, binding = 3) buffer DrawCount {{
+    uint draw_count;
+}};{ltw_matrices_declaration}
+
+layout(location = 0) uniform uint num_cull_objects;
+layout(location = 1) uniform bool has_culling_view;
+layout(location = 2) uniform vec3 camera_position;
+layout(location = 3) uniform float max_draw_distance;
+layout(location = 4) uniform vec4 frustum_planes[6];
+
+void main() {{
+    uint i = gl_GlobalInvocationID.x;
+    if (i >= num_cull_objects) {{
+        return;
+    }}
+    CullObject object = cull_objects[i];
+    vec3 center = object.bounding_sphere.xyz;
+    float radius = object.bounding_sphere.w;{transform_sphere}
+
+    if (has_culling_view) {{
+        if (length(center - camera_position) - radius > max_draw_distance) {{
+            return;
+        }}
+        for (int p = 0; p < 6; ++p) {{
+            if (dot(frustum_planes[p].xyz, center) + frustum_planes[p].w < -radius) {{
+                return;
+            }}
+        }}
+    }}
+
+    // visible, so the object's command is appended after the ones of the other visible objects
+    uint slot = atomicAdd(draw_count, 1u);
+    draw_commands[slot] = DrawElementsIndirectCommand(object.count, 1u, object.first_index, object.base_vertex, 0u);
+}}
+"""
+
+    def generate_create_culling_program_body(self) -> str:
+        return f"""
+    const char *source = R"glsl({self.generate_culling_compute_shader_source()})glsl";
+
+    GLuint shader = glCreateShader(GL_COMPUTE_SHADER);
+    glShaderSource(shader, 1, &source, nullptr);
+    glCompileShader(shader);
+    GLint compiled = 0;
+    glGetShaderiv(shader, GL_COMPILE_STATUS, &compiled);
+    if (not compiled) {{
+        char log[1024];
+        glGetShaderInfoLog(shader, sizeof(log), nullptr, log);
+        glDeleteShader(shader);
+        throw std::runtime_error(std::string("the culling compute shader failed to compile: ") + log);
+    }}
+
+    GLuint program = glCreateProgram();
+    glAttachShader(program, shader);
+    glLinkProgram(program);
+    glDeleteShader(shader);
+    GLint linked = 0;
+    glGetProgramiv(program, GL_LINK_STATUS, &linked);
+    if (not linked) {{
+        char log[1024];
+        glGetProgramInfoLog(program, sizeof(log), nullptr, log);
+        glDeleteProgram(program);
+        throw std::runtime_error(std::string("the culling compute shader failed to link: ") + log);
+    }}
+    return program;
+    """
+
+    def generate_upload_cull_objects_body(self) -> str:
+        return f"""
+    num_cull_objects = cull_objects.size();
+
+    GLsizeiptr num_bytes = cull_objects.size() * sizeof({get_gpu_cull_object_struct_name()});
+    glBindBuffer(GL_SHADER_STORAGE_BUFFER, cull_objects_buffer_object);
+    if (num_bytes > cull_objects_buffer_size) {{
+        glBufferData(GL_SHADER_STORAGE_BUFFER, num_bytes, cull_objects.data(), GL_DYNAMIC_DRAW);
+        cull_objects_buffer_size = num_bytes;
+    }} else {{
+        glBufferSubData(GL_SHADER_STORAGE_BUFFER, 0, num_bytes, cull_objects.data());
+    }}
+
+    // the culling pass writes at most one command per object, the commands never come from the cpu
+    GLsizeiptr num_command_bytes = cull_objects.size() * sizeof(DrawElementsIndirectCommand);
+    glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+    if (num_command_bytes > draw_indirect_buffer_size) {{
+        glBufferData(GL_DRAW_INDIRECT_BUFFER, num_command_bytes, nullptr, GL_DYNAMIC_COPY);
+        draw_indirect_buffer_size = num_command_bytes;
+    }}
+    """
+
+    def generate_dispatch_culling_body(self) -> str:
+        if self.is_ubo_shader:
+            bind_ltw_matrices = """
+    // other batchers use the same binding point for their matrices
+    glBindBufferBase(GL_UNIFORM_BUFFER, 0, ltw_matrices_gl_name);"""
+        else:
+            bind_ltw_matrices = ""
+        return f"""
+    // the visible objects count themselves up from zero as they append their commands
+    const GLuint zero = 0;
+    glBindBuffer(GL_PARAMETER_BUFFER, draw_count_buffer_object);
+    glBufferSubData(GL_PARAMETER_BUFFER, 0, sizeof(GLuint), &zero);
+
+    glUseProgram(culling_program);
+    glUniform1ui(0, num_cull_objects);
+    glUniform1i(1, has_culling_view);
+    glUniform3fv(2, 1, &culling_camera_position[0]);
+    glUniform1f(3, max_draw_distance);
+    glUniform4fv(4, 6, &frustum_planes[0][0]);
+
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 1, cull_objects_buffer_object);
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 2, draw_indirect_buffer_object);
+    glBindBufferBase(GL_SHADER_STORAGE_BUFFER, 3, draw_count_buffer_object);{bind_ltw_matrices}
+    glDispatchCompute((num_cull_objects + {GPU_CULLING_WORKGROUP_SIZE - 1}) / {GPU_CULLING_WORKGROUP_SIZE}, 1, 1);
+    // the commands and their count are read by the draw that follows
+    glMemoryBarrier(GL_COMMAND_BARRIER_BIT);
+    """
+
+    def generate_gpu_cull_objects_rebuild(
+        self, find_index_slot: str, geometry_id: str
+    ) -> str:
+        if self.has_per_vertex_ltw_indices:
+            find_ltw_index = f"""
+            auto shared_ltw_index = bounding_sphere_ltw_indices.find({geometry_id});
+            if (shared_ltw_index != bounding_sphere_ltw_indices.end()) {{
+                ltw_index = shared_ltw_index->second;
+            }} else {{
+                // the vertices don't agree on a matrix, so there's nothing to move the sphere with
+                bounding_sphere.w = std::numeric_limits<float>::infinity();
+            }}"""
+        else:
+            find_ltw_index = ""
+        return f"""
+    // the objects are only sent to the graphics card again when the set of them or their data changes, the culling
+    // itself happens there every frame
+    if (replaced_data_for_an_object_this_tick or object_ids_this_tick != object_ids_last_tick) {{
+        std::vector<{get_gpu_cull_object_struct_name()}> cull_objects;
+        cull_objects.reserve(object_ids_this_tick.size());
+        for (const auto &object_id : object_ids_this_tick) {{{find_index_slot}
+            if (not index_slot) {{
+                if (logging) {{
+                    std::cerr << "draw data tried to be drawn but was not cached, look into this as it should not occur"
+                              << std::endl;
+                }}
+                continue;
+            }}
+
+            auto [start, length] = *index_slot;
+            // no plane can cull an infinite radius, which is what objects without bounds get
+            glm::vec4 bounding_sphere(0.0f, 0.0f, 0.0f, std::numeric_limits<float>::infinity());
+            auto cached_sphere = bounding_spheres.find({geometry_id});
+            if (cached_sphere != bounding_spheres.end()) {{
+                bounding_sphere = glm::vec4(cached_sphere->second.center, cached_sphere->second.radius);
+            }}
+            GLuint ltw_index = std::numeric_limits<GLuint>::max();{find_ltw_index}
+            // the indices are relative to the object's first vertex
+            GLint base_vertex = fsat.get_metadata({geometry_id})->first;
+            cull_objects.push_back({{bounding_sphere, length, start, base_vertex, ltw_index}});
+        }}
+        upload_cull_objects(cull_objects);
+        object_ids_last_tick = object_ids_this_tick;
+    }}
+"""
+
+    def generate_upload_ltw_matrices_body(self) -> str:
+        return """
+    GlobalLogSection("upload_ltw_matrices", logging_enabled);
+    glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
+    // only the matrices that changed since the last upload are sent, neighbouring ones in one go
+    for (const auto &[start, length] : merge_ranges(dirty_ltw_matrix_ranges)) {
+        glBufferSubData(GL_UNIFORM_BUFFER, start * sizeof(glm::mat4), length * sizeof(glm::mat4), &ltw_matrices[start]);
+    }
+    dirty_ltw_matrix_ranges.clear();
+    // other batchers use the same binding point so it's claimed again every time
+    glBindBufferBase(GL_UNIFORM_BUFFER, 0, ltw_matrices_gl_name);
+    """
+
+    def generate_upload_instance_ltw_indices_body(self) -> str:
+        return """
+    GLsizeiptr num_bytes = instance_ltw_indices.size() * sizeof(unsigned int);
+    glBindBuffer(GL_ARRAY_BUFFER, ltw_indices_buffer_object);
+    if (num_bytes > instance_buffer_size) {
+        glBufferData(GL_ARRAY_BUFFER, num_bytes, instance_ltw_indices.data(), GL_DYNAMIC_DRAW);
+        instance_buffer_size = num_bytes;
+    } else {
+        glBufferSubData(GL_ARRAY_BUFFER, 0, num_bytes, instance_ltw_indices.data());
+    }
+    """
+
+    def generate_merge_ranges_body(self) -> str:
+        return """
+    std::sort(ranges.begin(), ranges.end());
+
+    std::vector<std::pair<unsigned int, unsigned int>> merged_ranges;
+    for (const auto &[start, length] : ranges) {
+        // overlapping or touching ranges are folded into the previous one
+        if (not merged_ranges.empty() and start <= merged_ranges.back().first + merged_ranges.back().second) {
+            auto &[merged_start, merged_length] = merged_ranges.back();
+            merged_length = std::max(merged_start + merged_length, start + length) - merged_start;
+        } else {
+            merged_ranges.emplace_back(start, length);
+        }
+    }
+    return merged_ranges;
+    """
+
+    def generate_flush_pending_uploads_body(self) -> str:
+        if self.has_shadow_copy:
+            uploads = ""
+            for vertex_attribute in self.per_vertex_attributes:
+                data = shader_vertex_attribute_to_data[vertex_attribute]
+                uploads += f"""
+        glBindBuffer(GL_ARRAY_BUFFER, {data.plural_name}_buffer_object);
+        glBufferSubData(GL_ARRAY_BUFFER, start * sizeof({data.attrib_type}), length * sizeof({data.attrib_type}), {data.plural_name}_shadow.data() + start);"""
+
+            return f"""
+    if (pending_upload_ranges.empty()) {{
+        return;
+    }}
+
+    // the shadow copy already holds the merged contents so each merged range is one contiguous upload per buffer
+    for (const auto &[start, length] : merge_ranges(pending_upload_ranges)) {{{uploads}
+    }}
+    pending_upload_ranges.clear();
+    """
+
+        uploads = ""
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            uploads += f"""
+    flush_pending_attribute_uploads({data.plural_name}_buffer_object, pending_{data.plural_name}_uploads);"""
+
+        return f"""
+    auto flush_pending_attribute_uploads = [this](GLuint buffer_object, auto &pending_uploads) {{
+        if (pending_uploads.empty()) {{
+            return;
+        }}
+        using Element = typename std::decay_t<decltype(pending_uploads.front().second)>::value_type;
+
+        std::vector<std::pair<unsigned int, unsigned int>> ranges;
+        for (const auto &[start, data] : pending_uploads) {{
+            ranges.emplace_back(start, data.size());
+        }}
+        std::vector<std::pair<unsigned int, unsigned int>> merged_ranges = merge_ranges(ranges);
+
+        // each merged range is assembled on the cpu, pieces are applied in the order they were cached so that the
+        // latest data wins where they overlap
+        std::vector<std::vector<Element>> staging(merged_ranges.size());
+        for (size_t i = 0; i < merged_ranges.size(); ++i) {{
+            staging[i].resize(merged_ranges[i].second);
+        }}
+        for (const auto &[start, data] : pending_uploads) {{
+            auto merged_range = std::prev(std::upper_bound(merged_ranges.begin(), merged_ranges.end(),
+                                                           std::make_pair(start, std::numeric_limits<unsigned int>::max())));
+            size_t i = merged_range - merged_ranges.begin();
+            std::copy(data.begin(), data.end(), staging[i].begin() + (start - merged_range->first));
+        }}
+
+        glBindBuffer(GL_ARRAY_BUFFER, buffer_object);
+        for (size_t i = 0; i < merged_ranges.size(); ++i) {{
+            glBufferSubData(GL_ARRAY_BUFFER, merged_ranges[i].first * sizeof(Element),
+                            merged_ranges[i].second * sizeof(Element), staging[i].data());
+        }}
+        pending_uploads.clear();
+    }};
+{uploads}
+    """
+
+    def generate_mark_stream_range_dirty_body(self) -> str:
+        return """
+    // every region has its own copy of the data so they all need the new contents before they're drawn from again
+    for (auto &pending_ranges : stream_region_pending_ranges) {
+        pending_ranges.emplace_back(start, length);
+    }
+    """
+
+    def generate_begin_stream_region_body(self) -> str:
+        region_copies = ""
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            region_copies += f"""
+        std::copy({data.plural_name}_shadow.begin() + start, {data.plural_name}_shadow.begin() + start + length, {data.plural_name}_mapped + region_offset + start);"""
+
+        return f"""
+    // wait until the gpu is done with the last frame that drew from this region before writing into it
+    GLsync &fence = stream_region_fences[stream_region_index];
+    if (fence) {{
+        GLenum wait_result = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 0);
+        while (wait_result == GL_TIMEOUT_EXPIRED) {{
+            wait_result = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000);
+        }}
+        glDeleteSync(fence);
+        fence = nullptr;
+    }}
+
+    // the buffers are coherently mapped so plain copies are visible to the gpu without any gl calls
+    size_t region_offset = stream_region_index * buffer_capacity;
+    for (const auto &[start, length] : merge_ranges(stream_region_pending_ranges[stream_region_index])) {{{region_copies}
+    }}
+    stream_region_pending_ranges[stream_region_index].clear();
+    """
+
+    def generate_end_stream_region_body(self) -> str:
+        return """
+    stream_region_fences[stream_region_index] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0);
+    stream_region_index = (stream_region_index + 1) % num_stream_regions;
+    """
+
+    def get_bytes_per_vertex_expression(self) -> str:
+        return " + ".join(
+            f"sizeof({shader_vertex_attribute_to_data[v].attrib_type})"
+            for v in self.per_vertex_attributes
+        )
+
+    def generate_apply_relocations_body(self) -> str:
+        move_calls = ""
+        if self.has_shadow_copy:
+            # ranges only move towards the front so a forward copy never reads something it already overwrote
+            move_calls = "\n".join(
+                f"        std::copy({shader_vertex_attribute_to_data[v].plural_name}_shadow.begin() + relocation.old_start, {shader_vertex_attribute_to_data[v].plural_name}_shadow.begin() + relocation.old_start + relocation.length, {shader_vertex_attribute_to_data[v].plural_name}_shadow.begin() + relocation.new_start);"
+                for v in self.per_vertex_attributes
+            )
+        if self.is_streaming:
+            move_calls += "\n        mark_stream_range_dirty(relocation.new_start, relocation.length);"
+        else:
+            move_calls += "\n" + "\n".join(
+                f"        move_buffer_range({shader_vertex_attribute_to_data[v].plural_name}_buffer_object, sizeof({shader_vertex_attribute_to_data[v].attrib_type}), relocation.old_start, relocation.new_start, relocation.length);"
+                for v in self.per_vertex_attributes
+            )
+
+        return f"""
+{"    // the moves below work on what's on the graphics card, so it has to be up to date first" if self.is_coalescing else ""}
+{"    flush_pending_uploads();" if self.is_coalescing else ""}
+    // relocations come in order of increasing start and every range only moves towards the front, so moving them
+    // in order never overwrites a range that has yet to be moved
+    for (const RangeRelocation &relocation : relocations) {{
+{move_calls}
+    }}
+
+    if (not relocations.empty()) {{
+        // the indices are relative to each object's first vertex so they stay valid, only the base vertices in the
+        // draw list have to pick up the new starts
+        replaced_data_for_an_object_this_tick = true;
+    }}
+    """
+
+    def generate_compact_body(self) -> str:
+        return f"""
+    GlobalLogSection("compact", logging_enabled);
+    std::vector<RangeRelocation> relocations = fsat.compact();
+    apply_relocations(relocations);
+    global_logger->info("compacted {{}} and moved {{}} ranges", name, relocations.size());
+    """
+
+    def generate_incremental_defragment_body(self) -> str:
+        return f"""
+    GlobalLogSection("incremental_defragment", logging_enabled);
+    const size_t bytes_per_vertex = {self.get_bytes_per_vertex_expression()};
+    std::vector<RangeRelocation> relocations = fsat.compact_step(max_bytes_per_frame / bytes_per_vertex);
+    apply_relocations(relocations);
+    return fsat.is_fragmented();
+    """
+
+    def generate_instanced_draw_list_rebuild(self) -> str:
+        if self.deduplicate_geometry:
+            find_geometry_id = """
+            auto geometry = object_id_to_geometry_id.find(object_id);
+            bool object_is_cached = geometry != object_id_to_geometry_id.end();"""
+            geometry_id = "geometry->second"
+        else:
+            find_geometry_id = """
+            bool object_is_cached = fsat.get_metadata(object_id).has_value();"""
+            geometry_id = "object_id"
+
+        if self.is_indirect and self.is_streaming:
+            upload_draw_list = """
+        std::vector<DrawElementsIndirectCommand> region_commands;
+        region_commands.reserve(num_stream_regions * draw_commands.size());
+        for (unsigned int region = 0; region < num_stream_regions; ++region) {
+            for (DrawElementsIndirectCommand command : draw_commands) {
+                command.base_vertex += region * buffer_capacity;
+                region_commands.push_back(command);
+            }
+        }
+        upload_draw_commands(region_commands);"""
+        elif self.is_indirect:
+            upload_draw_list = """
+        upload_draw_commands(draw_commands);"""
+        else:
+            upload_draw_list = ""
+
+        if self.use_lods:
+            # instances of a geometry drawn at different levels use different index ranges, so they need their own commands
+            instance_grouping = """
+    // every instance of a geometry at a level of detail is drawn by the same command, so the instances are grouped by
+    // geometry and level and their ltw indices are laid out in the order the commands read them through base_instance"""
+            instance_tuple = "std::tuple<unsigned int, unsigned int, unsigned int>"
+            instance_tuple_comment = "(geometry id, lod level, ltw index)"
+            select_lod_level = f"""
+            unsigned int lod_level = 0;
+            auto lods = lod_index_ranges.find({geometry_id});
+            if (lods != lod_index_ranges.end()) {{
+                lod_level = select_lod({geometry_id}, lods->second.size(), ltw_index);
+            }}"""
+            instance_values = f"{geometry_id}, lod_level, ltw_index"
+            group_key = "std::tie(std::get<0>(a), std::get<1>(a)) < std::tie(std::get<0>(b), std::get<1>(b))"
+            instance_bindings = "geometry_id, lod_level, ltw_index"
+            starts_new_group = (
+                "i == 0 or std::get<0>(geometry_instances[i - 1]) != geometry_id or\n"
+                "                                       std::get<1>(geometry_instances[i - 1]) != lod_level"
+            )
+            starts_new_group_name = "starts_new_group"
+        else:
+            instance_grouping = """
+    // every instance of a geometry is drawn by the same command, so the instances are grouped by geometry and their
+    // ltw indices are laid out in the order the commands read them through base_instance"""
+            instance_tuple = "std::pair<unsigned int, unsigned int>"
+            instance_tuple_comment = "(geometry id, ltw index)"
+            select_lod_level = ""
+            instance_values = f"{geometry_id}, ltw_index"
+            group_key = "a.first < b.first"
+            instance_bindings = "geometry_id, ltw_index"
+            starts_new_group = "i == 0 or geometry_instances[i - 1].first != geometry_id"
+            starts_new_group_name = "starts_new_geometry"
+
+        return f"""{instance_grouping}
+    if (replaced_data_for_an_object_this_tick or instances_this_tick != instances_last_tick{self.generate_view_rebuild_condition()}) {{
+        draw_commands.clear();
+        // {instance_tuple_comment}
+        std::vector<{instance_tuple}> geometry_instances;
+        geometry_instances.reserve(instances_this_tick.size());
+        for (const auto &[object_id, ltw_index] : instances_this_tick) {{{find_geometry_id}
+            if (not object_is_cached) {{
+                if (logging) {{
+                    std::cerr << "draw data tried to be drawn but was not cached, look into this as it should not occur"
+                              << std::endl;
+                }}
+                continue;
+            }}
+{self.generate_cull_lines(geometry_id, "ltw_index")}{select_lod_level}
+            geometry_instances.emplace_back({instance_values});
+        }}
+        std::stable_sort(geometry_instances.begin(), geometry_instances.end(),
+                         [](const auto &a, const auto &b) {{ return {group_key}; }});
+
+        std::vector<unsigned int> instance_ltw_indices;
+        instance_ltw_indices.reserve(geometry_instances.size());
+        for (size_t i = 0; i < geometry_instances.size(); ++i) {{
+            const auto &[{instance_bindings}] = geometry_instances[i];
+            bool {starts_new_group_name} = {starts_new_group};
+            if ({starts_new_group_name}) {{
+                auto [start, length] = *index_fsat.get_metadata(geometry_id);{self.generate_narrow_to_lod_lines("geometry_id", "lod_level", 4 * TAB)}
+                // the indices are relative to the geometry's first vertex
+                GLint base_vertex = fsat.get_metadata(geometry_id)->first;
+                draw_commands.push_back({{length, 0, start, base_vertex, static_cast<GLuint>(instance_ltw_indices.size())}});
+            }}
+            ++draw_commands.back().instance_count;
+            instance_ltw_indices.push_back(ltw_index);
+        }}
+        upload_instance_ltw_indices(instance_ltw_indices);{upload_draw_list}
+        instances_last_tick = instances_this_tick;
+    }}
+"""
+
+    def generate_instanced_draw_call(self) -> str:
+        if self.is_indirect and self.is_streaming:
+            return """
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+        const void *region_commands_offset = reinterpret_cast<const void *>(stream_region_index * draw_commands.size() * sizeof(DrawElementsIndirectCommand));
+        glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, region_commands_offset, draw_commands.size(), 0);"""
+        if self.is_indirect:
+            return """
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+        glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, nullptr, draw_commands.size(), 0);"""
+        region_offset = " + stream_region_index * buffer_capacity" if self.is_streaming else ""
+        return f"""
+        for (const DrawElementsIndirectCommand &command : draw_commands) {{
+            glDrawElementsInstancedBaseVertexBaseInstance(GL_TRIANGLES, command.count, GL_UNSIGNED_INT,
+                                                          reinterpret_cast<const void *>(command.first_index * sizeof(unsigned int)),
+                                                          command.instance_count, command.base_vertex{region_offset}, command.base_instance);
+        }}"""
+
+    def generate_draw_list_parts(self) -> Tuple[str, str, str, str]:
+        """returns the lines that rebuild the draw list, the draw call, the draw list's emptiness check and the lines
+        that clear what was queued this tick"""
+        if self.is_indirect:
+            add_slot_to_draw_list = """
+            // slots which directly follow each other in the buffer and share a base vertex are drawn as one
+            if (not draw_commands.empty() and start == end_of_last_slot and
+                draw_commands.back().base_vertex == static_cast<GLint>(base_vertex)) {
+                draw_commands.back().count += length;
+            } else {
+                draw_commands.push_back({length, 1, start, static_cast<GLint>(base_vertex), 0});
+            }"""
+            if self.is_streaming:
+                upload_draw_list = """
+        // every stream region gets its own copy of the commands pointing at its vertices, so switching regions
+        // between frames doesn't require touching the commands
+        std::vector<DrawElementsIndirectCommand> region_commands;
+        region_commands.reserve(num_stream_regions * draw_commands.size());
+        for (unsigned int region = 0; region < num_stream_regions; ++region) {
+            for (DrawElementsIndirectCommand command : draw_commands) {
+                command.base_vertex += region * buffer_capacity;
+                region_commands.push_back(command);
+            }
+        }
+        upload_draw_commands(region_commands);"""
+                draw_call = """
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+        const void *region_commands_offset = reinterpret_cast<const void *>(stream_region_index * draw_commands.size() * sizeof(DrawElementsIndirectCommand));
+        glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, region_commands_offset, draw_commands.size(), 0);"""
+            else:
+                upload_draw_list = """
+        upload_draw_commands(draw_commands);"""
+                draw_call = """
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+        glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, nullptr, draw_commands.size(), 0);"""
+            clear_draw_list = """
+        draw_commands.clear();"""
+            draw_list_is_empty = "draw_commands.empty()"
+        else:
+            add_slot_to_draw_list = """
+            // slots which directly follow each other in the buffer and share a base vertex are drawn as one
+            if (not draw_index_counts.empty() and start == end_of_last_slot and
+                draw_base_vertices.back() == static_cast<GLint>(base_vertex)) {
+                draw_index_counts.back() += length;
+            } else {
+                draw_index_counts.push_back(length);
+                draw_index_offsets.push_back(reinterpret_cast<const void *>(start * sizeof(unsigned int)));
+                draw_base_vertices.push_back(base_vertex);
+            }"""
+            upload_draw_list = ""
+            if self.is_streaming:
+                # the base vertices are relative to the start of a region, so they're offset into the one for this frame
+                draw_call = """
+        std::vector<GLint> region_base_vertices(draw_base_vertices);
+        for (GLint &base_vertex : region_base_vertices) {
+            base_vertex += stream_region_index * buffer_capacity;
+        }
+        glMultiDrawElementsBaseVertex(GL_TRIANGLES, draw_index_counts.data(), GL_UNSIGNED_INT, draw_index_offsets.data(),
+                                      draw_index_counts.size(), region_base_vertices.data());"""
+            else:
+                draw_call = """
+        glMultiDrawElementsBaseVertex(GL_TRIANGLES, draw_index_counts.data(), GL_UNSIGNED_INT, draw_index_offsets.data(),
+                                      draw_index_counts.size(), draw_base_vertices.data());"""
+            clear_draw_list = """
+        draw_index_counts.clear();
+        draw_index_offsets.clear();
+        draw_base_vertices.clear();"""
+            draw_list_is_empty = "draw_index_counts.empty()"
+
+        if self.deduplicate_geometry:
+            find_index_slot = """
+            auto geometry = object_id_to_geometry_id.find(object_id);
+            auto index_slot = geometry == object_id_to_geometry_id.end() ? std::nullopt : index_fsat.get_metadata(geometry->second);"""
+            geometry_id = "geometry->second"
+        else:
+            find_index_slot = """
+            auto index_slot = index_fsat.get_metadata(object_id);"""
+            geometry_id = "object_id"
+
+        if self.is_culling_on_gpu:
+            rebuild_draw_list = self.generate_gpu_cull_objects_rebuild(
+                find_index_slot, geometry_id
+            )
+            draw_call = f"""
+        dispatch_culling();
+        // the culling pass replaced this batcher's program
+        shader_cache.use_shader_program(ShaderType::{self.shader_type.name});
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, draw_indirect_buffer_object);
+        glBindBuffer(GL_PARAMETER_BUFFER, draw_count_buffer_object);
+        glMultiDrawElementsIndirectCount(GL_TRIANGLES, GL_UNSIGNED_INT, nullptr, 0, num_cull_objects, 0);"""
+            draw_list_is_empty = "num_cull_objects == 0"
+            clear_queued_draws = "object_ids_this_tick.clear();"
+        elif self.use_instancing:
+            rebuild_draw_list = self.generate_instanced_draw_list_rebuild()
+            draw_call = self.generate_instanced_draw_call()
+            draw_list_is_empty = "draw_commands.empty()"
+            clear_queued_draws = "instances_this_tick.clear();"
+        else:
+            rebuild_draw_list = self.generate_draw_list_rebuild(
+                clear_draw_list, find_index_slot, geometry_id, add_slot_to_draw_list, upload_draw_list
+            )
+            clear_queued_draws = "object_ids_this_tick.clear();"
+
+        return rebuild_draw_list, draw_call, draw_list_is_empty, clear_queued_draws
+
+    def generate_prepare_draw_body(self) -> str:
+        rebuild_draw_list, _, draw_list_is_empty, _ = self.generate_draw_list_parts()
+        return f"""
+
+    bool logging = false;
+{"    begin_stream_region();" if self.is_streaming else ""}
+{"    flush_pending_uploads();" if self.is_coalescing else ""}
+{rebuild_draw_list}
+    return not {draw_list_is_empty};
+    """
+
+    def generate_submit_draw_body(self) -> str:
+        _, draw_call, _, _ = self.generate_draw_list_parts()
+        # the draw call is written to sit inside a block, here it's at the top of the method
+        draw_call = draw_call.replace("\n" + TAB * 2, "\n" + TAB)
+        return f"""
+    glBindVertexArray(vertex_attribute_object);{draw_call}
+    """
+
+    def generate_finish_draw_body(self) -> str:
+        _, _, _, clear_queued_draws = self.generate_draw_list_parts()
+        return f"""
+{"    end_stream_region();" if self.is_streaming else ""}
+    {clear_queued_draws}
+    replaced_data_for_an_object_this_tick = false;{chr(10) + "    view_inputs_changed_this_tick = false;" if self.has_view_dependent_draw_list else ""}
+    """
+
+    def generate_draw_everything_body(self) -> str:
+        return f"""
+
+    bool logging = false;
+
+    if (logging) {{
+        std::cout << "VVV DRAW_EVERYTHING VVV" << std::endl;
+    }}
+
+    if (prepare_draw()) {{
+        shader_cache.use_shader_program(ShaderType::{self.shader_type.name});
+        submit_draw();
+        glBindVertexArray(0);
+        shader_cache.stop_using_shader_program();
+    }}
+    finish_draw();
+
+    if (logging) {{
+        std::cout << "^^^ DRAW_EVERYTHING ^^^" << std::endl;
+    }}
+    """
+
+    def generate_view_rebuild_condition(self) -> str:
+        # the camera or a matrix moving changes what's visible or which lod is drawn without anything else changing
+        return " or view_inputs_changed_this_tick" if self.has_view_dependent_draw_list else ""
+
+    def generate_cull_lines(self, geometry_id: str, ltw_index: str = "") -> str:
+        if not self.is_culling_on_cpu:
+            return ""
+        arguments = f"{geometry_id}, {ltw_index}" if ltw_index else geometry_id
+        return f"""
+            if (not is_visible({arguments})) {{
+                continue;
+            }}"""
+
+    def generate_narrow_to_lod_lines(
+        self, geometry_id: str, lod_level: str, indentation: str = 3 * TAB
+    ) -> str:
+        if not self.use_lods:
+            return ""
+        return f"""
+{indentation}// an object cached with levels only draws the part of its index slot that holds the selected level
+{indentation}auto lods = lod_index_ranges.find({geometry_id});
+{indentation}if (lods != lod_index_ranges.end()) {{
+{indentation}    auto [offset, count] = lods->second[{lod_level}];
+{indentation}    start += offset;
+{indentation}    length = count;
+{indentation}}}"""
+
+    def generate_draw_list_rebuild(
+        self,
+        clear_draw_list: str,
+        find_index_slot: str,
+        geometry_id: str,
+        add_slot_to_draw_list: str,
+        upload_draw_list: str,
+    ) -> str:
+        return f"""
+    // every cached object already has its indices in its own slot of the element buffer, so all that has to be
+    // rebuilt when something changes is the list of slots to draw, which is one entry per object rather than per index
+    if (replaced_data_for_an_object_this_tick or object_ids_this_tick != object_ids_last_tick{self.generate_view_rebuild_condition()}) {{{clear_draw_list}
+        unsigned int end_of_last_slot = 0;
+        for (const auto &object_id : object_ids_this_tick) {{{find_index_slot}
+            if (not index_slot) {{
+                if (logging) {{
+                    std::cerr << "draw data tried to be drawn but was not cached, look into this as it should not occur"
+                              << std::endl;
+                }}
+                continue;
+            }}{self.generate_cull_lines(geometry_id)}
+
+            auto [start, length] = *index_slot;{self.generate_narrow_to_lod_lines(geometry_id, f"select_lod({geometry_id}, lods->second.size())")}
+            // the indices are relative to the object's first vertex
+            unsigned int base_vertex = fsat.get_metadata({geometry_id})->first;{add_slot_to_draw_list}
+            end_of_last_slot = start + length;
+        }}{upload_draw_list}
+        object_ids_last_tick = object_ids_this_tick;
+    }}
+"""
+
+    # TODO: in the future there will be a bass queue draw call and then the extension classes
+    # will extend the body of the function filling in empty data (eg bone transforms or something)
+    def generate_CWL_V_TRANSFORMATION_UBOS_1024_WITH_SOLID_COLOR_specific_class_data(
+        self, batcher_class: CppClass
+    ):
+        tig = CppParameter("tig", "draw_info::TransformedIVPGroup", "", True)
+        replace = CppParameter("replace", "bool", "", False, "false")
+        transform_matrix_override = CppParameter(
+            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
+        )
+        if self.use_instancing:
+            queue_ivps = """
+// the ivps are cached once and every tig using them only adds an instance
+for (auto &ivp : tig.ivps) {
+    queue_draw(ivp.id, ivp.indices, ivp.xyz_positions, ltw_object_id, replace);
+}"""
+        else:
+            queue_ivps = """
+for (auto &ivp : tig.ivps) {
+    std::vector<unsigned int> ltw_indices(ivp.xyz_positions.size(), ltw_object_id);
+    queue_draw(ivp.id, ivp.indices, ivp.xyz_positions, ltw_indices, replace);
+}"""
+        body = f"""
+GlobalLogSection("queue_draw(tig)", logging_enabled);
+
+int ltw_object_id = tig.id;
+// TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
+bool requested_override = transform_matrix_override != glm::mat4(0);
+if (requested_override) {{
+    global_logger->info("setting matrix override");
+    set_ltw_matrix(ltw_object_id, transform_matrix_override);
+}} else {{
+    set_ltw_matrix(ltw_object_id, tig.transform.get_transform_matrix());
+}}
+
+{queue_ivps}
+        """
+        batcher_class.add_method(
+            CppMethod(
+                "queue_draw",
+                "void",
+                [tig, replace, transform_matrix_override],
+                body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Deletes an object from this shader batcher
+                     * 
+                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     */ 
+                    """,
+            )
+        )
+
+    def generate_TEXTURE_PACKER_CWL_V_TRANSFORMATION_UBOS_1024_specfic_class_data(
+        self, batcher_class: CppClass
+    ):
+
+        indices = CppParameter("indices", "std::vector<unsigned int>")
+        xyz_positions = CppParameter("xyz_positions", "std::vector<glm::vec3>")
+
+        ivptps = CppParameter("ivptps", "std::vector<draw_info::IVPTexturePacked>")
+
+        # TODO: generic enough to be in any ltw batcher class
+        tig = CppParameter(
+            "tig_to_update", "draw_info::TransformedIVPTPGroup", "", True
+        )
+        if self.use_instancing:
+            body = """
+GlobalLogSection("update_tig_ids", logging_enabled);
+// NOTE: the ivptp ids are kept, the copy is drawn as another instance of the same cached geometry with its own ltw
+// matrix
+tig_to_update.id = ltw_object_id_generator.get_id();
+        """
+        else:
+            body = """
+GlobalLogSection("update_tig_ids", logging_enabled);
+tig_to_update.id = ltw_object_id_generator.get_id();
+for (auto &ivptp : tig_to_update.ivptps) {
+    // NOTE: note that we must regenerate the internal ivptp ids because we do not use instancing here and for each
+    // object we store its ltw matrices so we can't re-use the same geometry
+    ivptp.id = object_id_generator.get_id();
+    global_logger->info("set id to: {}", ivptp.id);
+}
+        """
+        batcher_class.add_method(
+            CppMethod(
+                "update_tig_ids",
+                "void",
+                [tig],
+                body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Regenerates all associated ids for a tig
+                     * 
+                     * The point of this function I believe is when you copy an object and then you want to regenerate all its ids
+                     */ 
+                    """,
+            )
+        )
+
+        const_tig = CppParameter(
+            "tig", "draw_info::TransformedIVPTPGroup", "const", True
+        )
+        if self.use_instancing:
+            # copies made with update_tig_ids share the meshes, so every tig counts as a reference to the meshes it was
+            # queued with
+            batcher_class.add_member(
+                CppMember(
+                    "tig_id_to_mesh_ids",
+                    "std::unordered_map<unsigned int, std::vector<unsigned int>>",
+                )
+            )
+            batcher_class.add_member(
+                CppMember(
+                    "mesh_id_to_num_tigs",
+                    "std::unordered_map<unsigned int, unsigned int>",
+                )
+            )
+            body = """
+GlobalLogSection("delete_tig", logging_enabled);
+auto mesh_ids = tig_id_to_mesh_ids.find(tig.id);
+if (mesh_ids != tig_id_to_mesh_ids.end()) {
+    for (unsigned int mesh_id : mesh_ids->second) {
+        // the geometry stays cached for the other tigs using it and is freed with the last one
+        if (--mesh_id_to_num_tigs[mesh_id] == 0) {
+            mesh_id_to_num_tigs.erase(mesh_id);
+            delete_object(mesh_id);
+        }
+    }
+    tig_id_to_mesh_ids.erase(mesh_ids);
+}
+ltw_object_id_generator.reclaim_id(tig.id);
+        """
+        else:
+            body = """
+GlobalLogSection("delete_tig", logging_enabled);
+for (const auto &ivptp : tig.ivptps) {
+    delete_object(ivptp.id);
+}
+ltw_object_id_generator.reclaim_id(tig.id);
+        """
+        batcher_class.add_method(
+            CppMethod(
+                "delete_tig",
+                "void",
+                [const_tig],
+                body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Deletes an object from this shader batcher
+                     * 
+                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     */ 
+                    """,
+            )
+        )
+
+        tig = CppParameter("tig", "draw_info::TransformedIVPTPGroup")
+        replace = CppParameter("replace", "bool", "", False, "false")
+        transform_matrix_override = CppParameter(
+            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
+        )
+        if self.use_instancing:
+            reference_meshes = """
+// the first time a tig is queued it takes a reference on each of its meshes, delete_tig gives them back
+if (tig_id_to_mesh_ids.find(tig.id) == tig_id_to_mesh_ids.end()) {
+    auto &mesh_ids = tig_id_to_mesh_ids[tig.id];
+    for (const auto &ivptp : tig.ivptps) {
+        mesh_ids.push_back(ivptp.id);
+        ++mesh_id_to_num_tigs[ivptp.id];
+    }
+}
+"""
+        else:
+            reference_meshes = ""
+        body = f"""
+GlobalLogSection("queue_draw(tig.ivptps)", logging_enabled);
+int ltw_object_id = tig.id;
+// TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
+bool requested_override = transform_matrix_override != glm::mat4(0);
+if (requested_override) {{
+    set_ltw_matrix(ltw_object_id, transform_matrix_override);
+}} else {{
+    set_ltw_matrix(ltw_object_id, tig.transform.get_transform_matrix());
+}}
+{reference_meshes}
+for (const auto &ivptp : tig.ivptps) {{
+    {"" if self.use_instancing else "std::vector<unsigned int> ltw_indices(ivptp.xyz_positions.size(), ltw_object_id);"}
+    std::vector<int> ptis(ivptp.xyz_positions.size(), ivptp.packed_texture_index);
+    std::vector<int> ptbbi(ivptp.xyz_positions.size(), ivptp.packed_texture_bounding_box_index);
+
+    queue_draw(ivptp.id, ivptp.indices, {"ltw_object_id" if self.use_instancing else "ltw_indices"}, ptis, ivptp.packed_texture_coordinates, ptbbi,
+                              ivptp.xyz_positions, replace);
+}}
+        """
+        batcher_class.add_method(
+            CppMethod(
+                "queue_draw",
+                "void",
+                [tig, replace, transform_matrix_override],
+                body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     */ 
+                    """,
+            )
+        )
+
+    def generate_TEXTURE_PACKER_RIGGED_AND_ANIMATED_CWL_V_TRANSFORMATION_UBOS_1024_WITH_TEXTURES_specfic_class_data(
+        self, batcher_class: CppClass
+    ):
+        tig = CppParameter("tig", "draw_info::TransformedIVPNTPRGroup", "", True)
+        replace = CppParameter("replace", "bool", "", False, "false")
+        transform_matrix_override = CppParameter(
+            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
+        )
+        body = f"""
+    GlobalLogSection("queue_draw(tig.ivpntprs)", logging_enabled);
+
+    int ltw_object_id = tig.id;
+    // TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
+    bool requested_override = transform_matrix_override != glm::mat4(0);
+    if (requested_override) {{
+        set_ltw_matrix(ltw_object_id, transform_matrix_override);
+    }} else {{
+        set_ltw_matrix(ltw_object_id, tig.transform.get_transform_matrix());
+    }}
+
+
+    for (auto &ivpntpr : tig.ivpntprs) {{
+        // Populate bone_indices and bone_weights
+        std::vector<glm::ivec4> bone_indices;
+        std::vector<glm::vec4> bone_weights;
+
+        for (const auto &vertex_bone_data : ivpntpr.bone_data) {{
+            glm::ivec4 indices(static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[0]),
+                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[1]),
+                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[2]),
+                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[3]));
+
+            glm::vec4 weights(vertex_bone_data.weight_value_of_this_vertex_wrt_bone[0],
+                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[1],
+                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[2],
+                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[3]);
+
+            bone_indices.push_back(indices);
+            bone_weights.push_back(weights);
+        }}
+
+        std::vector<int> packed_texture_indices(ivpntpr.xyz_positions.size(), ivpntpr.packed_texture_index);
+        std::vector<int> packed_texture_bounding_box_indices(ivpntpr.xyz_positions.size(), ivpntpr.packed_texture_bounding_box_index);
+
+        {"" if self.use_instancing else "std::vector<unsigned int> ltw_indices(ivpntpr.xyz_positions.size(), tig.id);"}
+
+         queue_draw(ivpntpr.id, ivpntpr.indices, {"tig.id" if self.use_instancing else "ltw_indices"}, bone_indices, bone_weights,
+                        packed_texture_indices, ivpntpr.packed_texture_coordinates,
+                        packed_texture_bounding_box_indices, ivpntpr.xyz_positions);
+    }}
+        """
+        batcher_class.add_method(
+            CppMethod(
+                "queue_draw",
+                "void",
+                [tig, replace, transform_matrix_override],
+                body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     */ 
+                    """,
+            )
+        )
+
+    # NOTE: this is the main entry point to generating each batcher
+    # do a forward seach for add_method
+    def generate_cpp_class(self) -> CppClass:
+        batcher_class = CppClass(self.get_class_name())
+
+        is_ubo_1024_shader = (
+            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX in self.vertex_attributes
+        )
+        # CLASS ATTRIBUTES START
+
+        if is_ubo_1024_shader:
+            batcher_class.add_member(
+                CppMember(
+                    "ltw_object_id_generator",
+                    "BoundedUniqueIDGenerator",
+                    f"BoundedUniqueIDGenerator({self.num_ltw_matrices})",
+                )
+            )
+            batcher_class.add_member(CppMember("ltw_matrices_gl_name", "GLuint"))
+            batcher_class.add_member(
+                CppMember(f"ltw_matrices[{NUM_UBO_LTW_MATRICES}]", "glm::mat4")
+            )
+
+        if is_ubo_1024_shader:
+            # the (start, length) of every range of matrices set since the last upload
+            batcher_class.add_member(
+                CppMember(
+                    "dirty_ltw_matrix_ranges",
+                    "std::vector<std::pair<unsigned int, unsigned int>>",
+                )
+            )
+
+        batcher_class.add_member(CppMember("object_id_generator", "UniqueIDGenerator"))
+        batcher_class.add_member(CppMember("shader_cache", "ShaderCache"))
+        batcher_class.add_member(CppMember("vertex_attribute_object", "GLuint"))
+        batcher_class.add_member(CppMember("indices_buffer_object", "GLuint"))
+
+        # add vector for each thing this shader type has
+        for vertex_attribute in self.vertex_attributes:
+            va_data = shader_vertex_attribute_to_data[vertex_attribute]
+            batcher_class.add_member(
+                CppMember(f"{va_data.plural_name}_buffer_object", "GLuint")
+            )
+
+        batcher_class.add_member(
+            CppMember("buffer_capacity", "size_t", f"{self.num_elements_in_buffer}")
+        )
+
+        batcher_class.add_member(
+            CppMember("curr_index_buffer_offset", "unsigned int", "0")
+        )
+        batcher_class.add_member(
+            CppMember("largest_index_used_so_far", "unsigned int", "0")
+        )
+
+        if self.use_instancing:
+            # the (object id, ltw index) of every instance queued this tick
+            batcher_class.add_member(
+                CppMember(
+                    "instances_this_tick",
+                    "std::vector<std::pair<unsigned int, unsigned int>>",
+                )
+            )
+            batcher_class.add_member(
+                CppMember(
+                    "instances_last_tick",
+                    "std::vector<std::pair<unsigned int, unsigned int>>",
+                )
+            )
+            batcher_class.add_member(
+                CppMember("instance_buffer_size", "GLsizeiptr", "0")
+            )
+        else:
+            batcher_class.add_member(
+                CppMember("object_ids_this_tick", f"std::vector<unsigned int>")
+            )
+            batcher_class.add_member(
+                CppMember("object_ids_last_tick", f"std::vector<unsigned int>")
+            )
+        if self.is_indirect or self.use_instancing:
+            # the commands drawn last tick, one per run of index slots or one per instanced geometry
+            batcher_class.add_member(
+                CppMember(
+                    "draw_commands",
+                    f"std::vector<{get_draw_elements_indirect_command_struct_name()}>",
+                )
+            )
+        if self.is_indirect:
+            batcher_class.add_member(
+                CppMember("draw_indirect_buffer_object", "GLuint", "0")
+            )
+            batcher_class.add_member(
+                CppMember("draw_indirect_buffer_size", "GLsizeiptr", "0")
+            )
+        elif not self.use_instancing:
+            # the (count, byte offset, base vertex) of every run of index slots drawn last tick
+            batcher_class.add_member(
+                CppMember("draw_index_counts", f"std::vector<GLsizei>")
+            )
+            batcher_class.add_member(
+                CppMember("draw_index_offsets", f"std::vector<const void *>")
+            )
+            batcher_class.add_member(
+                CppMember("draw_base_vertices", f"std::vector<GLint>")
+            )
+        batcher_class.add_member(
+            CppMember(
+                "fsat", FreeListFixedSizeArrayTrackerCppClass().get_class_name()
+            )
+        )
+        # every object's indices live in their own slot of the element buffer, this tracks where
+        batcher_class.add_member(
+            CppMember(
+                "index_fsat", FreeListFixedSizeArrayTrackerCppClass().get_class_name()
+            )
+        )
+        batcher_class.add_member(
+            CppMember(
+                "index_buffer_capacity", "size_t", f"{self.num_elements_in_buffer}"
+            )
+        )
+
+        if self.deduplicate_geometry:
+            draw_data_struct_name = get_draw_data_struct_name(self.shader_type)
+            # the trackers above are keyed by geometry id, objects with identical data share a geometry
+            batcher_class.add_member(
+                CppMember(
+                    "object_id_to_geometry_id",
+                    "std::unordered_map<unsigned int, unsigned int>",
+                )
+            )
+            # the following are indexed by geometry id, the cpu copy of the data is what incoming data is compared to
+            batcher_class.add_member(
+                CppMember("geometry_draw_data", f"std::vector<{draw_data_struct_name}>")
+            )
+            batcher_class.add_member(
+                CppMember("geometry_draw_data_hashes", "std::vector<size_t>")
+            )
+            batcher_class.add_member(
+                CppMember("geometry_reference_counts", "std::vector<unsigned int>")
+            )
+            batcher_class.add_member(
+                CppMember("free_geometry_ids", "std::vector<unsigned int>")
+            )
+            batcher_class.add_member(
+                CppMember(
+                    "draw_data_hash_to_geometry_ids",
+                    "std::unordered_multimap<size_t, unsigned int>",
+                )
+            )
+
+        batcher_class.add_member(CppMember("logging_enabled", f"bool"))
+        batcher_class.add_member(
+            CppMember(
+                "name",
+                f"std::string",
+                f'"{camel_to_snake_case(self.get_class_name())}"',
+            )
+        )
+
+        batcher_class.add_member(
+            CppMember("replaced_data_for_an_object_this_tick ", f"bool")
+        )
+
+        if self.has_bounding_spheres:
+            # keyed by geometry id like the trackers, computed when the data is cached
+            batcher_class.add_member(
+                CppMember(
+                    "bounding_spheres",
+                    f"std::unordered_map<unsigned int, {get_bounding_sphere_struct_name()}>",
+                )
+            )
+            if self.has_per_vertex_ltw_indices:
+                # the ltw index shared by every vertex of a geometry, geometries without one are never culled
+                batcher_class.add_member(
+                    CppMember(
+                        "bounding_sphere_ltw_indices",
+                        "std::unordered_map<unsigned int, unsigned int>",
+                    )
+                )
+
+        if self.use_culling:
+            # nothing is culled until set_culling_view is called
+            batcher_class.add_member(CppMember("has_culling_view", "bool", "false"))
+            batcher_class.add_member(CppMember("frustum_planes[6]", "glm::vec4", "{}"))
+            batcher_class.add_member(
+                CppMember("culling_camera_position", "glm::vec3", "glm::vec3(0.0f)")
+            )
+            batcher_class.add_member(
+                CppMember(
+                    "max_draw_distance",
+                    "float",
+                    "std::numeric_limits<float>::infinity()",
+                )
+            )
+
+        if self.use_lods:
+            # the (offset into the geometry's index slot, index count) of every level, most detailed first, geometries
+            # cached without levels have no entry and draw their whole slot
+            batcher_class.add_member(
+                CppMember(
+                    "lod_index_ranges",
+                    "std::unordered_map<unsigned int, std::vector<std::pair<unsigned int, unsigned int>>>",
+                )
+            )
+            batcher_class.add_member(
+                CppMember("lod_camera_position", "glm::vec3", "glm::vec3(0.0f)")
+            )
+            # empty until set_lod_view is called, so every object draws its most detailed level
+            batcher_class.add_member(
+                CppMember("lod_switch_distances", "std::vector<float>")
+            )
+
+        if self.has_view_dependent_draw_list:
+            batcher_class.add_member(
+                CppMember("view_inputs_changed_this_tick", "bool", "false")
+            )
+
+        if self.is_culling_on_gpu:
+            # one GpuCullObject per queued object, the draw commands of the visible ones are written into the indirect
+            # buffer on the graphics card and counted in the draw count buffer
+            batcher_class.add_member(CppMember("culling_program", "GLuint", "0"))
+            batcher_class.add_member(
+                CppMember("cull_objects_buffer_object", "GLuint", "0")
+            )
+            batcher_class.add_member(
+                CppMember("cull_objects_buffer_size", "GLsizeiptr", "0")
+            )
+            batcher_class.add_member(CppMember("num_cull_objects", "GLuint", "0"))
+            batcher_class.add_member(
+                CppMember("draw_count_buffer_object", "GLuint", "0")
+            )
+
+        for vertex_attribute in self.per_vertex_attributes:
+            va_data = shader_vertex_attribute_to_data[vertex_attribute]
+            if self.is_streaming:
+                batcher_class.add_member(
+                    CppMember(
+                        f"{va_data.plural_name}_mapped",
+                        f"{va_data.attrib_type} *",
+                        "nullptr",
+                    )
+                )
+            if self.has_shadow_copy:
+                batcher_class.add_member(
+                    CppMember(
+                        f"{va_data.plural_name}_shadow",
+                        f"std::vector<{va_data.attrib_type}>",
+                    )
+                )
+            elif self.is_coalescing:
+                # the (start, data) of everything cached this tick that hasn't been uploaded yet
+                batcher_class.add_member(
+                    CppMember(
+                        f"pending_{va_data.plural_name}_uploads",
+                        f"std::vector<std::pair<unsigned int, std::vector<{va_data.attrib_type}>>>",
+                    )
+                )
+
+        if self.is_coalescing and self.has_shadow_copy:
+            # the (start, length) of every range of the shadow copy that hasn't been uploaded yet
+            batcher_class.add_member(
+                CppMember(
+                    "pending_upload_ranges",
+                    "std::vector<std::pair<unsigned int, unsigned int>>",
+                )
+            )
+
+        if self.is_streaming:
+            batcher_class.add_member(
+                CppMember(
+                    "num_stream_regions", "unsigned int", f"{self.num_stream_regions}"
+                )
+            )
+            batcher_class.add_member(
+                CppMember("stream_region_index", "unsigned int", "0")
+            )
+            batcher_class.add_member(
+                CppMember(
+                    "stream_region_fences",
+                    "std::vector<GLsync>",
+                    f"std::vector<GLsync>({self.num_stream_regions}, nullptr)",
+                )
+            )
+            # the (start, length) of every range that a region doesn't have the latest contents of yet
+            batcher_class.add_member(
+                CppMember(
+                    "stream_region_pending_ranges",
+                    "std::vector<std::vector<std::pair<unsigned int, unsigned int>>>",
+                    f"std::vector<std::vector<std::pair<unsigned int, unsigned int>>>({self.num_stream_regions})",
+                )
+            )
+
+        # used to move data between overlapping ranges of the same buffer during compaction
+        batcher_class.add_member(CppMember("scratch_buffer_object", "GLuint", "0"))
+        batcher_class.add_member(CppMember("scratch_buffer_size", "GLsizeiptr", "0"))
+
+        # CLASS ATTRIBUTES END
+
+        # CLASS METHODS START
+
+        ubo_matrices_initialization = f"""
+    for (int i = 0; i < {NUM_UBO_LTW_MATRICES}; ++i) {{
+        ltw_matrices[i] = glm::mat4(1.0f);
+    }}
+
+    glGenBuffers(1, &ltw_matrices_gl_name);
+    glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
+    // allocated once, afterwards only the matrices that changed are uploaded
+    glBufferData(GL_UNIFORM_BUFFER, sizeof(ltw_matrices), ltw_matrices, GL_STREAM_DRAW);
+    glBindBufferBase(GL_UNIFORM_BUFFER, 0, ltw_matrices_gl_name);
+
+        """
+
+        # TODO: parameterize
+        batcher_class.add_constructor(
+            [
+                CppParameter("shader_cache", "ShaderCache", "", True),
+                CppParameter("logging_enabled", "bool", "", False, "false"),
+            ],
+            f"shader_cache(shader_cache), logging_enabled(logging_enabled), fsat({self.num_elements_in_buffer}, logging_enabled, {FreeListFixedSizeArrayTrackerCppClass().get_allocation_policy_value(self.allocation_policy)}), index_fsat({self.num_elements_in_buffer}, logging_enabled, {FreeListFixedSizeArrayTrackerCppClass().get_allocation_policy_value(self.allocation_policy)})",
+            f"""
+    { ubo_matrices_initialization if (is_ubo_1024_shader) else "" }
+    glGenVertexArrays(1, &vertex_attribute_object);
+    glBindVertexArray(vertex_attribute_object);
+    glGenBuffers(1, &indices_buffer_object);{chr(10) + "    glGenBuffers(1, &draw_indirect_buffer_object);" if self.is_indirect else ""}
+    // reserve space for 1 million elements, probably overkill
+    const size_t initial_buffer_size = buffer_capacity;
+    {self.generate_constructor_body()}
+    glBindVertexArray(0);""",
+        )
+
+        batcher_class.add_method(
+            CppMethod(
+                f"~{self.get_class_name()}",
+                "",
+                [],
+                self.generate_deconstructor(),
+                "public",
+            )
+        )
+
+        if is_ubo_1024_shader:
+            batcher_class.add_method(
+                CppMethod(
+                    "set_ltw_matrix",
+                    "void",
+                    [
+                        CppParameter("ltw_index", "unsigned int", "const"),
+                        CppParameter("matrix", "glm::mat4", "const", True),
+                    ],
+                    self.generate_set_ltw_matrix_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Sets the local to world matrix at ltw_index, it reaches the shader on the next upload_ltw_matrices
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "upload_ltw_matrices",
+                    "void",
+                    [],
+                    self.generate_upload_ltw_matrices_body(),
+                    access_modifier="public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Uploads the ltw matrices to the shader
+                     */ 
+                    """,
+                )
+            )
+
+        if self.use_culling:
+            batcher_class.add_method(
+                CppMethod(
+                    "set_culling_view",
+                    "void",
+                    [
+                        CppParameter("view_projection", "glm::mat4", "const", True),
+                        CppParameter("camera_position", "glm::vec3", "const", True),
+                        CppParameter(
+                            "draw_distance",
+                            "float",
+                            "const",
+                            False,
+                            "std::numeric_limits<float>::infinity()",
+                        ),
+                    ],
+                    self.generate_set_culling_view_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Objects outside of this view projection's frustum or further than draw_distance from the camera aren't drawn
+                     */ 
+                    """,
+                )
+            )
+
+        if self.has_bounding_spheres:
+            batcher_class.add_method(
+                CppMethod(
+                    "update_bounding_sphere",
+                    "void",
+                    [
+                        CppParameter("geometry_id", "unsigned int", "const"),
+                        CppParameter("xyz_positions", "std::vector<glm::vec3>", "const", True),
+                    ],
+                    self.generate_update_bounding_sphere_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Recomputes the sphere around a geometry's positions that culling and lod selection use
+                     */ 
+                    """,
+                )
+            )
+
+            if self.has_per_vertex_ltw_indices:
+                batcher_class.add_method(
+                    CppMethod(
+                        "update_bounding_sphere_ltw_index",
+                        "void",
+                        [
+                            CppParameter("geometry_id", "unsigned int", "const"),
+                            CppParameter("ltw_indices", "std::vector<unsigned int>", "const", True),
+                        ],
+                        self.generate_update_bounding_sphere_ltw_index_body(),
+                        "private",
+                        initializer_list="",
+                        define_in_header=False,
+                        qualifiers=[],
+                        docstring_comment="""
+                    /**
+                     * @brief Records the ltw matrix that moves a geometry's bounding sphere
+                     */ 
+                    """,
+                    )
+                )
+
+            batcher_class.add_include(generate_bounding_sphere_struct())
+
+        if self.has_view_dependent_draw_list:
+            batcher_class.add_method(
+                CppMethod(
+                    "get_world_bounding_sphere",
+                    f"std::optional<{get_bounding_sphere_struct_name()}>",
+                    [CppParameter("geometry_id", "unsigned int", "const")]
+                    + (
+                        [CppParameter("ltw_index", "unsigned int", "const")]
+                        if self.use_instancing
+                        else []
+                    ),
+                    self.generate_get_world_bounding_sphere_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief A geometry's bounding sphere moved to where it's drawn, nullopt when there's no single place to put it
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_culling_on_cpu:
+            batcher_class.add_method(
+                CppMethod(
+                    "is_visible",
+                    "bool",
+                    [
+                        CppParameter("geometry_id", "unsigned int", "const"),
+                    ]
+                    + (
+                        [CppParameter("ltw_index", "unsigned int", "const")]
+                        if self.use_instancing
+                        else []
+                    ),
+                    self.generate_is_visible_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Whether a geometry's bounding sphere is inside of the culling view
+                     */ 
+                    """,
+                )
+            )
+        elif self.is_culling_on_gpu:
+            batcher_class.add_method(
+                CppMethod(
+                    "create_culling_program",
+                    "GLuint",
+                    [],
+                    self.generate_create_culling_program_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Compiles and links the compute shader that culls the objects and writes the draw commands
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "upload_cull_objects",
+                    "void",
+                    [
+                        CppParameter(
+                            "cull_objects",
+                            f"std::vector<{get_gpu_cull_object_struct_name()}>",
+                            "const",
+                            True,
+                        ),
+                    ],
+                    self.generate_upload_cull_objects_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Sends the objects to cull to the graphics card and makes room for a command per object
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "dispatch_culling",
+                    "void",
+                    [],
+                    self.generate_dispatch_culling_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Runs the culling pass which fills the indirect buffer and the draw count for the draw
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_include(generate_gpu_cull_object_struct())
+
+        if self.use_lods:
+            batcher_class.add_method(
+                CppMethod(
+                    "set_lod_view",
+                    "void",
+                    [
+                        CppParameter("camera_position", "glm::vec3", "const", True),
+                        CppParameter("lod_switch_distances", "std::vector<float>", "const", True),
+                    ],
+                    self.generate_set_lod_view_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Objects cached with cache_lods draw level i + 1 once their center is lod_switch_distances[i] or further from the camera
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "cache_lods",
+                    "void",
+                    self.generate_cache_lods_parameter_list(),
+                    self.generate_cache_lods_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Caches an object with one index list per level of detail, most detailed first, every level uses the same vertices
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "select_lod",
+                    "unsigned int",
+                    [
+                        CppParameter("geometry_id", "unsigned int", "const"),
+                        CppParameter("num_levels", "size_t", "const"),
+                    ]
+                    + (
+                        [CppParameter("ltw_index", "unsigned int", "const")]
+                        if self.use_instancing
+                        else []
+                    ),
+                    self.generate_select_lod_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief The level of detail to draw a geometry at from its distance to the lod camera
+                     */ 
+                    """,
+                )
+            )
+
+        # glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
+        # glBufferSubData(GL_UNIFORM_BUFFER, 0, sizeof(ltw_matrices), ltw_matrices);
+        # glBindBuffer(GL_UNIFORM_BUFFER, 0);
+
+        delete_object_body = f"""
+    GlobalLogSection("delete_object", logging_enabled);
+
+    global_logger->warn("trying to delete object with id: {{}}", object_id);
+    if ({self.generate_is_cached_expression()}) {{{self.generate_release_object_space_lines()}
+    {  "ltw_object_id_generator.reclaim_id(object_id);" if self.is_ubo_shader else "object_id_generator.reclaim_id(object_id);"}
+    }} else {{
+        global_logger->warn("you tried to delete object that was not yet cached, objects become cached when you run queue_draw or cache on them. Most likely you tried to delete an object before actually drawing it.", object_id);
+    }}
+        """
+
+        batcher_class.add_method(
+            CppMethod(
+                "delete_object",
+                "void",
+                [CppParameter("object_id", "unsigned int", "const")],
+                delete_object_body,
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Deletes an object from this shader batcher
+                     * 
+                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     */ 
+                    """,
+            )
         )
-        body = """
-GlobalLogSection("queue_draw(tig)", logging_enabled);
 
-int ltw_object_id = tig.id;
-// TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
-bool requested_override = transform_matrix_override != glm::mat4(0);
-if (requested_override) {
-    global_logger->info("setting matrix override");
-    ltw_matrices[ltw_object_id] = transform_matrix_override;
-} else {
-    ltw_matrices[ltw_object_id] = tig.transform.get_transform_matrix();
-}
+        for method in self.get_delete_object_methods_for_draw_info_struct():
+            batcher_class.add_method(method)
 
+        for method in self.get_queue_draw_methods_for_draw_info_structs():
+            batcher_class.add_method(method)
 
-for (auto &ivp : tig.ivps) {
-    std::vector<unsigned int> ltw_indices(ivp.xyz_positions.size(), ltw_object_id);
-    queue_draw(ivp.id, ivp.indices, ivp.xyz_positions, ltw_indices, replace);
-}
+        queue_draw_by_id_body = f"""
+    GlobalLogSection("queue_draw", logging_enabled);
+    if ({self.generate_is_cached_expression()}) {{
+        {"instances_this_tick.emplace_back(object_id, ltw_index);" if self.use_instancing else "object_ids_this_tick.push_back(object_id);"}
+    }} else {{
+        global_logger->warn("you tried to draw an object that is not cached, we cannot do that, it has id: {{}}", object_id);
+    }}
         """
+
+        queue_draw_by_id_parameters = [CppParameter("object_id", "unsigned int", "const")]
+        if self.use_instancing:
+            queue_draw_by_id_parameters.append(
+                CppParameter("ltw_index", "unsigned int", "const")
+            )
+            batcher_class.add_method(
+                CppMethod(
+                    "queue_draw",
+                    "void",
+                    [CppParameter("object_id", "unsigned int", "const")],
+                    """
+    queue_draw(object_id, object_id);
+        """,
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Queues up a single object to be drawn with the ltw matrix of the same id, like queue_draw(ivp) does
+                     */ 
+                    """,
+                )
+            )
+
         batcher_class.add_method(
             CppMethod(
                 "queue_draw",
                 "void",
-                [tig, replace, transform_matrix_override],
-                body,
+                queue_draw_by_id_parameters,
+                queue_draw_by_id_body,
                 "public",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Deletes an object from this shader batcher
-                     * 
-                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     * @brief Queues up a tig to be drawn when draw_everything is called
                      */ 
                     """,
             )
         )
 
-    def generate_TEXTURE_PACKER_CWL_V_TRANSFORMATION_UBOS_1024_specfic_class_data(
-        self, batcher_class: CppClass
-    ):
-
-        indices = CppParameter("indices", "std::vector<unsigned int>")
-        xyz_positions = CppParameter("xyz_positions", "std::vector<glm::vec3>")
-
-        ivptps = CppParameter("ivptps", "std::vector<draw_info::IVPTexturePacked>")
-
-        # TODO: generic enough to be in any ltw batcher class
-        tig = CppParameter(
-            "tig_to_update", "draw_info::TransformedIVPTPGroup", "", True
+        # NOTE: this is the base queue draw that the above ones use internally
+        batcher_class.add_method(
+            CppMethod(
+                "queue_draw",
+                "void",
+                self.generate_queue_draw_parameter_list(),
+                self.generate_queue_draw_body(),
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     */ 
+                    """,
+            )
         )
-        body = """
-GlobalLogSection("update_tig_ids", logging_enabled);
-tig_to_update.id = ltw_object_id_generator.get_id();
-for (auto &ivptp : tig_to_update.ivptps) {
-    // NOTE: note that we must regenerate the internal ivptp ids because we do not use instancing here and for each
-    // object we store its ltw matrices so we can't re-use the same geometry
-    ivptp.id = object_id_generator.get_id();
-    global_logger->info("set id to: {}", ivptp.id);
-}
-        """
+
         batcher_class.add_method(
             CppMethod(
-                "update_tig_ids",
+                "cache",
                 "void",
-                [tig],
-                body,
+                self.generate_cache_parameter_list(),
+                self.generate_cache_body(),
                 "public",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Regenerates all associated ids for a tig
+                     * @brief Given some draw info plus an object id, this function caches that data into the shader batcher
                      * 
-                     * The point of this function I believe is when you copy an object and then you want to regenerate all its ids
+                     * If the object with that id is already cached then nothing happens.
                      */ 
                     """,
             )
         )
 
-        const_tig = CppParameter(
-            "tig", "draw_info::TransformedIVPTPGroup", "const", True
-        )
-        body = """
-GlobalLogSection("delete_tig", logging_enabled);
-for (const auto &ivptp : tig.ivptps) {
-    delete_object(ivptp.id);
-}
-ltw_object_id_generator.reclaim_id(tig.id);
-        """
         batcher_class.add_method(
             CppMethod(
-                "delete_tig",
+                "update_attributes",
                 "void",
-                [const_tig],
-                body,
+                self.generate_update_attributes_parameter_list(),
+                self.generate_update_attributes_body(),
                 "public",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Deletes an object from this shader batcher
-                     * 
-                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     * @brief Overwrites the given attributes of a cached object in place, the ones left as nullptr are kept
+                     *
+                     * Every given attribute must have as many elements as the object has vertices, use cache with replace
+                     * when the vertex count or the indices change.
+                     */ 
+                    """,
+            )
+        )
+
+        for vertex_attribute in self.per_vertex_attributes:
+            data = shader_vertex_attribute_to_data[vertex_attribute]
+            update_attributes_arguments = ", ".join(
+                ["object_id"]
+                + [
+                    f"&{data.plural_name}" if v == vertex_attribute else "nullptr"
+                    for v in self.per_vertex_attributes
+                ]
+            )
+            batcher_class.add_method(
+                CppMethod(
+                    f"update_{data.plural_name}",
+                    "void",
+                    [
+                        CppParameter("object_id", "unsigned int", "const"),
+                        CppParameter(
+                            data.plural_name,
+                            f"std::vector<{data.attrib_type}>",
+                            "const",
+                            True,
+                        ),
+                    ],
+                    f"""
+    update_attributes({update_attributes_arguments});
+        """,
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment=f"""
+                    /**
+                     * @brief Overwrites the {data.plural_name.replace("_", " ")} of a cached object in place
+                     */ 
+                    """,
+                )
+            )
+
+        batcher_class.add_method(
+            CppMethod(
+                "move_buffer_range",
+                "void",
+                [
+                    CppParameter("buffer_object", "GLuint"),
+                    CppParameter("element_size", "GLsizeiptr"),
+                    CppParameter("from", "unsigned int"),
+                    CppParameter("to", "unsigned int"),
+                    CppParameter("length", "unsigned int"),
+                ],
+                self.generate_move_buffer_range_body(),
+                "private",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Moves length elements of a buffer from one place to another entirely on the graphics card
+                     */ 
+                    """,
+            )
+        )
+
+        if self.deduplicate_geometry:
+            # the struct itself is added next to the class, its members are only used in the method definitions
+            batcher_class.add_include(
+                f"struct {get_draw_data_struct_name(self.shader_type)};\n\n"
+            )
+            batcher_class.add_method(
+                CppMethod(
+                    "acquire_geometry_id",
+                    "unsigned int",
+                    [],
+                    self.generate_acquire_geometry_id_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Returns an unused geometry id, reusing released ones first
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "release_geometry",
+                    "void",
+                    [CppParameter("geometry_id", "unsigned int")],
+                    self.generate_release_geometry_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Drops one reference to a geometry, freeing its space once nothing uses it anymore
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "unregister_geometry_hash",
+                    "void",
+                    [CppParameter("geometry_id", "unsigned int")],
+                    self.generate_unregister_geometry_hash_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Stops incoming data from being matched against this geometry
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_indirect or self.use_instancing:
+            batcher_class.add_include(generate_draw_elements_indirect_command_struct())
+
+        if self.use_instancing:
+            batcher_class.add_method(
+                CppMethod(
+                    "upload_instance_ltw_indices",
+                    "void",
+                    [
+                        CppParameter(
+                            "instance_ltw_indices", "std::vector<unsigned int>", "const", True
+                        )
+                    ],
+                    self.generate_upload_instance_ltw_indices_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Writes the per instance ltw indices into their buffer, only reallocating it when they don't fit
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_indirect:
+            batcher_class.add_method(
+                CppMethod(
+                    "upload_draw_commands",
+                    "void",
+                    [
+                        CppParameter(
+                            "commands",
+                            f"std::vector<{get_draw_elements_indirect_command_struct_name()}>",
+                            "const",
+                            True,
+                        )
+                    ],
+                    self.generate_upload_draw_commands_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Writes the draw commands into the indirect buffer, only reallocating it when they don't fit
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_streaming or self.is_coalescing or is_ubo_1024_shader:
+            batcher_class.add_method(
+                CppMethod(
+                    "merge_ranges",
+                    "std::vector<std::pair<unsigned int, unsigned int>>",
+                    [
+                        CppParameter(
+                            "ranges", "std::vector<std::pair<unsigned int, unsigned int>>"
+                        )
+                    ],
+                    self.generate_merge_ranges_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Sorts (start, length) ranges and folds the ones that overlap or touch together
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_coalescing:
+            batcher_class.add_method(
+                CppMethod(
+                    "flush_pending_uploads",
+                    "void",
+                    [],
+                    self.generate_flush_pending_uploads_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Uploads everything cached since the last flush, using as few uploads per buffer as possible
+                     *
+                     * draw_everything does this for you, it only needs to be called directly if the buffers are read
+                     * from outside of the batcher.
+                     */ 
+                    """,
+                )
+            )
+
+        if self.is_streaming:
+            batcher_class.add_method(
+                CppMethod(
+                    "mark_stream_range_dirty",
+                    "void",
+                    [
+                        CppParameter("start", "unsigned int"),
+                        CppParameter("length", "unsigned int"),
+                    ],
+                    self.generate_mark_stream_range_dirty_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Records that every stream region needs the shadow copy's contents of this range
+                     */ 
+                    """,
+                )
+            )
+
+            batcher_class.add_method(
+                CppMethod(
+                    "begin_stream_region",
+                    "void",
+                    [],
+                    self.generate_begin_stream_region_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Waits for the gpu to release this frame's region and brings it up to date with the shadow copy
                      */ 
                     """,
+                )
             )
-        )
-
-        tig = CppParameter("tig", "draw_info::TransformedIVPTPGroup")
-        replace = CppParameter("replace", "bool", "", False, "false")
-        transform_matrix_override = CppParameter(
-            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
-        )
-        body = """
-GlobalLogSection("queue_draw(tig.ivptps)", logging_enabled);
-int ltw_object_id = tig.id;
-// TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
-bool requested_override = transform_matrix_override != glm::mat4(0);
-if (requested_override) {
-    ltw_matrices[ltw_object_id] = transform_matrix_override;
-} else {
-    ltw_matrices[ltw_object_id] = tig.transform.get_transform_matrix();
-}
 
-for (const auto &ivptp : tig.ivptps) {
-    std::vector<unsigned int> ltw_indices(ivptp.xyz_positions.size(), ltw_object_id);
-    std::vector<int> ptis(ivptp.xyz_positions.size(), ivptp.packed_texture_index);
-    std::vector<int> ptbbi(ivptp.xyz_positions.size(), ivptp.packed_texture_bounding_box_index);
+            batcher_class.add_method(
+                CppMethod(
+                    "end_stream_region",
+                    "void",
+                    [],
+                    self.generate_end_stream_region_body(),
+                    "private",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Fences the region that was just drawn from and moves on to the next one
+                     */ 
+                    """,
+                )
+            )
 
-    queue_draw(ivptp.id, ivptp.indices, ltw_indices, ptis, ivptp.packed_texture_coordinates, ptbbi,
-                              ivptp.xyz_positions, replace);
-}
-        """
         batcher_class.add_method(
             CppMethod(
-                "queue_draw",
+                "write_index_slot",
                 "void",
-                [tig, replace, transform_matrix_override],
-                body,
-                "public",
+                [
+                    CppParameter("start", "unsigned int"),
+                    CppParameter(
+                        "indices", "std::vector<unsigned int>", "const", True
+                    ),
+                ],
+                self.generate_write_index_slot_body(),
+                "private",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     * @brief Uploads an object's indices into its slot of the element buffer
                      */ 
                     """,
             )
         )
 
-    def generate_TEXTURE_PACKER_RIGGED_AND_ANIMATED_CWL_V_TRANSFORMATION_UBOS_1024_WITH_TEXTURES_specfic_class_data(
-        self, batcher_class: CppClass
-    ):
-        tig = CppParameter("tig", "draw_info::TransformedIVPNTPRGroup", "", True)
-        replace = CppParameter("replace", "bool", "", False, "false")
-        transform_matrix_override = CppParameter(
-            "transform_matrix_override", "glm::mat4", "", False, "glm::mat4(0)"
-        )
-        body = """
-    GlobalLogSection("queue_draw(tig.ivpntprs)", logging_enabled);
-
-    int ltw_object_id = tig.id;
-    // TODO: there will be a bug here if you try to override with the zero matrix, but you will probably never do that
-    bool requested_override = transform_matrix_override != glm::mat4(0);
-    if (requested_override) {
-        ltw_matrices[ltw_object_id] = transform_matrix_override;
-    } else {
-        ltw_matrices[ltw_object_id] = tig.transform.get_transform_matrix();
-    }
-
-
-    for (auto &ivpntpr : tig.ivpntprs) {
-        // Populate bone_indices and bone_weights
-        std::vector<glm::ivec4> bone_indices;
-        std::vector<glm::vec4> bone_weights;
-
-        for (const auto &vertex_bone_data : ivpntpr.bone_data) {
-            glm::ivec4 indices(static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[0]),
-                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[1]),
-                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[2]),
-                               static_cast<int>(vertex_bone_data.indices_of_bones_that_affect_this_vertex[3]));
-
-            glm::vec4 weights(vertex_bone_data.weight_value_of_this_vertex_wrt_bone[0],
-                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[1],
-                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[2],
-                              vertex_bone_data.weight_value_of_this_vertex_wrt_bone[3]);
-
-            bone_indices.push_back(indices);
-            bone_weights.push_back(weights);
-        }
-
-        std::vector<int> packed_texture_indices(ivpntpr.xyz_positions.size(), ivpntpr.packed_texture_index);
-        std::vector<int> packed_texture_bounding_box_indices(ivpntpr.xyz_positions.size(), ivpntpr.packed_texture_bounding_box_index);
-
-        std::vector<unsigned int> ltw_indices(ivpntpr.xyz_positions.size(), tig.id);
-
-         queue_draw(ivpntpr.id, ivpntpr.indices, ltw_indices, bone_indices, bone_weights,
-                        packed_texture_indices, ivpntpr.packed_texture_coordinates,
-                        packed_texture_bounding_box_indices, ivpntpr.xyz_positions);
-    }
-        """
         batcher_class.add_method(
             CppMethod(
-                "queue_draw",
+                "compact_index_buffer",
                 "void",
-                [tig, replace, transform_matrix_override],
-                body,
-                "public",
+                [],
+                self.generate_compact_index_buffer_body(),
+                "private",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     * @brief Moves every index slot to the front of the element buffer so that all free space is in one block
                      */ 
                     """,
             )
         )
 
-    # NOTE: this is the main entry point to generating each batcher
-    # do a forward seach for add_method
-    def generate_cpp_class(self) -> CppClass:
-        batcher_class = CppClass(self.get_class_name())
-
-        is_ubo_1024_shader = (
-            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX in self.vertex_attributes
-        )
-        # CLASS ATTRIBUTES START
-
-        if is_ubo_1024_shader:
-            batcher_class.add_member(
-                CppMember(
-                    "ltw_object_id_generator",
-                    "BoundedUniqueIDGenerator",
-                    "BoundedUniqueIDGenerator(1024)",
-                )
-            )
-            batcher_class.add_member(CppMember("ltw_matrices_gl_name", "GLuint"))
-            batcher_class.add_member(CppMember("ltw_matrices[1024]", "glm::mat4"))
-
-        batcher_class.add_member(CppMember("object_id_generator", "UniqueIDGenerator"))
-        batcher_class.add_member(CppMember("shader_cache", "ShaderCache"))
-        batcher_class.add_member(CppMember("vertex_attribute_object", "GLuint"))
-        batcher_class.add_member(CppMember("indices_buffer_object", "GLuint"))
-
-        # add vector for each thing this shader type has
-        for vertex_attribute in self.vertex_attributes:
-            va_data = shader_vertex_attribute_to_data[vertex_attribute]
-            batcher_class.add_member(
-                CppMember(f"{va_data.plural_name}_buffer_object", "GLuint")
-            )
-
-        batcher_class.add_member(
-            CppMember("curr_index_buffer_offset", "unsigned int", "0")
-        )
-        batcher_class.add_member(
-            CppMember("largest_index_used_so_far", "unsigned int", "0")
-        )
-
-        batcher_class.add_member(
-            CppMember("object_ids_this_tick", f"std::vector<unsigned int>")
-        )
-        batcher_class.add_member(
-            CppMember("object_ids_last_tick", f"std::vector<unsigned int>")
-        )
-        batcher_class.add_member(
-            CppMember("drawn_indices_last_tick", f"std::vector<unsigned int>")
-        )
-        batcher_class.add_member(
-            CppMember(
-                "cached_object_ids_to_indices",
-                f"std::unordered_map<unsigned int, std::vector<unsigned int>>",
-            )
-        )
-
-        batcher_class.add_member(CppMember("fsat", f"FixedSizeArrayTracker"))
-
-        batcher_class.add_member(CppMember("logging_enabled", f"bool"))
-        batcher_class.add_member(
-            CppMember(
-                "name",
-                f"std::string",
-                f'"{camel_to_snake_case(self.get_class_name())}"',
-            )
-        )
-
-        batcher_class.add_member(
-            CppMember("replaced_data_for_an_object_this_tick ", f"bool")
-        )
-
-        # CLASS ATTRIBUTES END
-
-        # CLASS METHODS START
-
-        ubo_matrices_initialization = f"""
-    for (int i = 0; i < 1024; ++i) {{
-        ltw_matrices[i] = glm::mat4(1.0f);
-    }}
-
-    glGenBuffers(1, &ltw_matrices_gl_name);
-    glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
-    glBufferData(GL_UNIFORM_BUFFER, sizeof(ltw_matrices), ltw_matrices, GL_STATIC_DRAW);
-    glBindBufferBase(GL_UNIFORM_BUFFER, 0, ltw_matrices_gl_name);
-
-        """
-
-        # TODO: parameterize
-        batcher_class.add_constructor(
-            [
-                CppParameter("shader_cache", "ShaderCache", "", True),
-                CppParameter("logging_enabled", "bool", "", False, "false"),
-            ],
-            f"shader_cache(shader_cache), logging_enabled(logging_enabled), fsat({self.num_elements_in_buffer}, logging_enabled)",
-            f"""
-    { ubo_matrices_initialization if (is_ubo_1024_shader) else "" }
-    glGenVertexArrays(1, &vertex_attribute_object);
-    glBindVertexArray(vertex_attribute_object);
-    glGenBuffers(1, &indices_buffer_object);
-    // reserve space for 1 million elements, probably overkill
-    const size_t initial_buffer_size = {self.num_elements_in_buffer};
-    {self.generate_constructor_body()}
-    glBindVertexArray(0);""",
-        )
-
         batcher_class.add_method(
             CppMethod(
-                f"~{self.get_class_name()}",
-                "",
-                [],
-                self.generate_deconstructor(),
-                "public",
-            )
-        )
-
-        if is_ubo_1024_shader:
-            batcher_class.add_method(
-                CppMethod(
-                    "upload_ltw_matrices",
-                    "void",
-                    [],
-                    f"""
-    GlobalLogSection("upload_ltw_matrices", logging_enabled);
-    glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
-    glBufferData(GL_UNIFORM_BUFFER, sizeof(ltw_matrices), ltw_matrices, GL_STATIC_DRAW);
-    glBindBufferBase(GL_UNIFORM_BUFFER, 0, ltw_matrices_gl_name);
-            """,
-                    access_modifier="public",
-                    initializer_list="",
-                    define_in_header=False,
-                    qualifiers=[],
-                    docstring_comment="""
+                "reallocate_buffer",
+                "GLuint",
+                [
+                    CppParameter("buffer_object", "GLuint"),
+                    CppParameter("old_num_bytes", "GLsizeiptr"),
+                    CppParameter("new_num_bytes", "GLsizeiptr"),
+                ],
+                self.generate_reallocate_buffer_body(),
+                "private",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
                     /**
-                     * @brief Uploads the ltw matrices to the shader
+                     * @brief Replaces a buffer with a larger one holding the same contents, returns the new buffer
                      */ 
                     """,
-                )
             )
-
-        # glBindBuffer(GL_UNIFORM_BUFFER, ltw_matrices_gl_name);
-        # glBufferSubData(GL_UNIFORM_BUFFER, 0, sizeof(ltw_matrices), ltw_matrices);
-        # glBindBuffer(GL_UNIFORM_BUFFER, 0);
-
-        delete_object_body = f"""
-    GlobalLogSection("delete_object", logging_enabled);
-
-    global_logger->warn("trying to delete object with id: {{}}", object_id);
-    auto it = cached_object_ids_to_indices.find(object_id);
-    if (it != cached_object_ids_to_indices.end()) {{
-        fsat.remove_metadata(object_id);
-    {  "ltw_object_id_generator.reclaim_id(object_id);" if self.is_ubo_shader else "object_id_generator.reclaim_id(object_id);"}
-        
-        cached_object_ids_to_indices.erase(it);
-    }} else {{
-        global_logger->warn("you tried to delete object that was not yet cached, objects become cached when you run queue_draw or cache on them. Most likely you tried to delete an object before actually drawing it.", object_id);
-    }}
-        """
+        )
 
         batcher_class.add_method(
             CppMethod(
-                "delete_object",
+                "grow_index_buffer",
                 "void",
-                [CppParameter("object_id", "unsigned int", "const")],
-                delete_object_body,
-                "public",
+                [CppParameter("minimum_capacity", "size_t")],
+                self.generate_grow_index_buffer_body(),
+                "private",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Deletes an object from this shader batcher
-                     * 
-                     *  This frees up all resources for the given object id, and allows that id to be used again.
+                     * @brief Reallocates the element buffer to hold at least minimum_capacity indices
                      */ 
                     """,
             )
         )
 
-        for method in self.get_delete_object_methods_for_draw_info_struct():
-            batcher_class.add_method(method)
-
-        for method in self.get_queue_draw_methods_for_draw_info_structs():
-            batcher_class.add_method(method)
-
-        queue_draw_by_id_body = f"""
-    GlobalLogSection("queue_draw", logging_enabled);
-    auto it = cached_object_ids_to_indices.find(object_id);
-    if (it != cached_object_ids_to_indices.end()) {{
-        object_ids_this_tick.push_back(object_id);
-    }} else {{
-        global_logger->warn("you tried to draw an object that is not cached, we cannot do that, it has id: {{}}", object_id);
-    }}
-        """
+        if self.growth_factor:
+            batcher_class.add_method(
+                CppMethod(
+                    "grow",
+                    "void",
+                    [CppParameter("minimum_capacity", "size_t")],
+                    self.generate_grow_body(),
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment="""
+                    /**
+                     * @brief Reallocates every buffer to hold at least minimum_capacity vertices, growing geometrically
+                     */ 
+                    """,
+                )
+            )
 
         batcher_class.add_method(
             CppMethod(
-                "queue_draw",
+                "apply_relocations",
                 "void",
-                [CppParameter("object_id", "unsigned int", "const")],
-                queue_draw_by_id_body,
-                "public",
+                [
+                    CppParameter(
+                        "relocations", "std::vector<RangeRelocation>", "const", True
+                    )
+                ],
+                self.generate_apply_relocations_body(),
+                "private",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     * @brief Moves the vertex data of every relocated object to match the tracker
                      */ 
                     """,
             )
         )
 
-        # NOTE: this is the base queue draw that the above ones use internally
         batcher_class.add_method(
             CppMethod(
-                "queue_draw",
+                "compact",
                 "void",
-                self.generate_queue_draw_parameter_list(),
-                self.generate_queue_draw_body(),
+                [],
+                self.generate_compact_body(),
                 "public",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Queues up a tig to be drawn when draw_everything is called
+                     * @brief Moves every cached object to the front of the buffers so that all free space is in one block
+                     *
+                     * This happens automatically when an object doesn't fit, but it can also be run up front at a moment
+                     * when a hitch won't be noticed.
                      */ 
                     """,
             )
@@ -1194,19 +4526,22 @@ for (const auto &ivptp : tig.ivptps) {
 
         batcher_class.add_method(
             CppMethod(
-                "cache",
-                "void",
-                self.generate_cache_parameter_list(),
-                self.generate_cache_body(),
+                "incremental_defragment",
+                "bool",
+                [CppParameter("max_bytes_per_frame", "size_t")],
+                self.generate_incremental_defragment_body(),
                 "public",
                 initializer_list="",
                 define_in_header=False,
                 qualifiers=[],
                 docstring_comment="""
                     /**
-                     * @brief Given some draw info plus an object id, this function caches that data into the shader batcher
-                     * 
-                     * If the object with that id is already cached then nothing happens.
+                     * @brief Does a bounded amount of the work that compact does, meant to be called once per frame
+                     *
+                     * Objects are slid to the front in the same order compact uses until moving the next one would copy
+                     * more than max_bytes_per_frame, at least one object is moved per call so that it always finishes.
+                     *
+                     * @return whether there is still fragmentation left to clean up
                      */ 
                     """,
             )
@@ -1233,6 +4568,63 @@ for (const auto &ivptp : tig.ivptps) {
                 batcher_class
             )
 
+        batcher_class.add_method(
+            CppMethod(
+                "prepare_draw",
+                "bool",
+                [],
+                self.generate_prepare_draw_body(),
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Sends pending data and rebuilds the draw list from what was queued this tick, without binding anything to draw with.
+                     * @return whether there's anything to draw, when there isn't submit_draw can be skipped.
+                     * @note draw_everything and Batcher::draw_all call this, it's only needed when scheduling the draws by hand.
+                     */ 
+                    """,
+            )
+        )
+
+        batcher_class.add_method(
+            CppMethod(
+                "submit_draw",
+                "void",
+                [],
+                self.generate_submit_draw_body(),
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Binds this batcher's vertex array and issues the draws prepared by prepare_draw.
+                     * @note the shader program has to be in use already, and the vertex array is left bound.
+                     */ 
+                    """,
+            )
+        )
+
+        batcher_class.add_method(
+            CppMethod(
+                "finish_draw",
+                "void",
+                [],
+                self.generate_finish_draw_body(),
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Forgets what was queued this tick, called once per tick after the draws were submitted (or skipped).
+                     */ 
+                    """,
+            )
+        )
+
         batcher_class.add_method(
             CppMethod(
                 "draw_everything",
@@ -1258,24 +4650,48 @@ for (const auto &ivptp : tig.ivptps) {
 
 
 class BatcherCppClassCreator:
-    def __init__(self, constructed_batchers: List[str]):
+    def __init__(
+        self, constructed_batchers: List[str], constructed_shader_types: List[ShaderType]
+    ):
         self.constructed_batchers = constructed_batchers
+        # the shader type of each constructed batcher, in the same order
+        self.constructed_shader_types = constructed_shader_types
 
     def generate_cpp_class(self) -> CppClass:
         initializer_list = []
         batcher_class = CppClass("Batcher")
         # requested_shader_types = []
 
-        # Add constructed batchers as members and add them to the initializer list
+        # every batcher allocates its buffers when it's constructed, so they're only constructed once they're first
+        # used through their accessor, that way scenes don't pay for the shaders they never draw with
         for constructed_batcher_name in self.constructed_batchers:
             batcher_class.add_member(
                 CppMember(
-                    camel_to_snake_case(constructed_batcher_name),
-                    constructed_batcher_name,
+                    f"{camel_to_snake_case(constructed_batcher_name)}_instance",
+                    f"std::optional<{constructed_batcher_name}>",
                 )
             )
-            initializer_list.append(
-                f"{camel_to_snake_case(constructed_batcher_name)}(shader_cache)"
+            batcher_class.add_method(
+                CppMethod(
+                    camel_to_snake_case(constructed_batcher_name),
+                    f"{constructed_batcher_name} &",
+                    [],
+                    f"""
+    if (not {camel_to_snake_case(constructed_batcher_name)}_instance) {{
+        {camel_to_snake_case(constructed_batcher_name)}_instance.emplace(shader_cache);
+    }}
+    return *{camel_to_snake_case(constructed_batcher_name)}_instance;
+    """,
+                    "public",
+                    initializer_list="",
+                    define_in_header=False,
+                    qualifiers=[],
+                    docstring_comment=f"""
+                    /**
+                     * @brief Returns the {constructed_batcher_name}, constructing it and allocating its buffers on the first call.
+                     */ 
+                    """,
+                )
             )
             # remove from end
             clip_size = len("_SHADER_BATCHER")
@@ -1292,6 +4708,11 @@ class BatcherCppClassCreator:
             )
         )
 
+        # the batchers draw through the same shader cache, which is kept to construct them with and so draw_all can
+        # switch between their programs
+        batcher_class.add_member(CppMember("shader_cache", "ShaderCache &"))
+        initializer_list.append("shader_cache(shader_cache)")
+
         initializer_list = ", ".join(initializer_list)
 
         # Add constructor with updated initializer list
@@ -1302,8 +4723,76 @@ class BatcherCppClassCreator:
             "",
         )
 
+        batcher_class.add_method(
+            CppMethod(
+                "draw_all",
+                "void",
+                [],
+                self.generate_draw_all_body(),
+                "public",
+                initializer_list="",
+                define_in_header=False,
+                qualifiers=[],
+                docstring_comment="""
+                    /**
+                     * @brief Draws what was queued on every batcher since the last draw, in place of calling draw_everything on each.
+                     * @note batchers that were never used or have nothing queued are skipped, and the shader program and vertex array are only unbound once at the end.
+                     */ 
+                    """,
+            )
+        )
+
         return batcher_class
 
+    def generate_draw_all_body(self) -> str:
+        # the batchers don't bind any textures, so their program is all the state there is to order the draws by, and
+        # since there's one batcher per shader type every program is put in use at most once per draw_all
+        batchers_in_draw_order = sorted(
+            zip(self.constructed_batchers, self.constructed_shader_types),
+            key=lambda batcher: list(ShaderType).index(batcher[1]),
+        )
+
+        prepare_lines = []
+        submit_lines = []
+        finish_lines = []
+        for constructed_batcher_name, shader_type in batchers_in_draw_order:
+            member_name = camel_to_snake_case(constructed_batcher_name)
+            # going through the instance rather than the accessor, so drawing never constructs a batcher
+            prepare_lines.append(
+                f"    bool {member_name}_has_draws = {member_name}_instance and {member_name}_instance->prepare_draw();"
+            )
+            submit_lines.append(
+                f"""    if ({member_name}_has_draws) {{
+        shader_cache.use_shader_program(ShaderType::{shader_type.name});
+        {member_name}_instance->submit_draw();
+        drew_anything = true;
+    }}"""
+            )
+            finish_lines.append(
+                f"""    if ({member_name}_instance) {{
+        {member_name}_instance->finish_draw();
+    }}"""
+            )
+
+        prepare = "\n".join(prepare_lines)
+        submit = "\n".join(submit_lines)
+        finish = "\n".join(finish_lines)
+        return f"""
+    // every batcher writes its pending data before any vertex array is bound, so none of that is recorded into one
+{prepare}
+
+    // the previous batcher's vertex array and program stay bound until the next one replaces them
+    bool drew_anything = false;
+{submit}
+
+    if (drew_anything) {{
+        glBindVertexArray(0);
+        shader_cache.stop_using_shader_program();
+    }}
+
+{finish}
+    """
+
 
 def list_available_shaders(shader_to_used_vertex_attribute_variables):
     print("Available Shaders:")
@@ -1331,61 +4820,265 @@ def list_available_shaders(shader_to_used_vertex_attribute_variables):
 
 
 import os
-import shutil
+import hashlib
+import json
+import tempfile
+import fnmatch
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 
-def wipe_generated_directory():
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+# remembers the inputs every shader batcher in the generated directory was made from
+GENERATED_MANIFEST_FILE_NAME = ".manifest.json"
+
 
-    # Define the path for the 'generated' directory relative to the script's location
+def create_generated_directory() -> str:
+    """Create the 'generated' directory next to this script if it doesn't exist yet and return its path.
+
+    The directory isn't wiped, files which are already up to date are left alone so that their modification times
+    don't make the c++ build recompile everything that includes them.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
     generated_dir = os.path.join(script_dir, "generated")
+    os.makedirs(generated_dir, exist_ok=True)
+    return generated_dir
+
+
+def remove_stale_generated_files(generated_dir: str, generated_file_names: List[str]):
+    """Remove the files of the generated directory that weren't produced by this run, eg batchers that aren't
+    requested anymore."""
+    for file_name in os.listdir(generated_dir):
+        file_path = os.path.join(generated_dir, file_name)
+        if (
+            file_name not in generated_file_names
+            and file_name != GENERATED_MANIFEST_FILE_NAME
+            and os.path.isfile(file_path)
+        ):
+            os.remove(file_path)
+            print(f"Removed stale {file_path}")
+
+
+def write_file_if_changed(file_path: str, content: str) -> bool:
+    """Write the content to the file unless it already holds exactly that, returns whether it was written.
+
+    The content goes into a temporary file next to the target which then replaces it, so an interrupted run or a
+    build running alongside never sees a half written file.
+    """
+    if os.path.isfile(file_path):
+        with open(file_path, "r") as existing_file:
+            if existing_file.read() == content:
+                return False
+        mode = os.stat(file_path).st_mode & 0o777
+    else:
+        # temporary files are only readable by their owner, a new file gets the permissions open would have given it
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_path)), prefix=".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as temporary_file:
+            temporary_file.write(content)
+        os.chmod(temporary_path, mode)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return True
+
+
+def write_generated_file(file_path: str, content: str):
+    if write_file_if_changed(file_path, content):
+        print(f"Written to {file_path}")
+    else:
+        print(f"Unchanged {file_path}")
+
+
+def get_generator_version() -> str:
+    # any change to the generator or to the modules it builds the code and reads the shaders with can change what it
+    # outputs, so their sources stand in for a version number
+    version = hashlib.sha256()
+    for source_path in [__file__, cpp_utils.main.__file__, shader_summary.__file__]:
+        with open(os.path.abspath(source_path), "rb") as source_file:
+            version.update(source_file.read())
+    return version.hexdigest()
+
+
+def fingerprint_shader_batcher_inputs(
+    requested_shader: "ShaderRequest",
+    vertex_attributes: List[ShaderVertexAttributeVariable],
+    generator_version: str,
+) -> str:
+    """Hash everything a shader batcher's files are generated from, equal fingerprints mean equal files."""
+    inputs = {
+        "generator_version": generator_version,
+        "shader_type": requested_shader.shader_type.name,
+        "vertex_attributes": [
+            vertex_attribute.name for vertex_attribute in vertex_attributes
+        ],
+        # every option of the request including the buffer size, the repr lists them all in a fixed order
+        "request": repr(requested_shader),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def remove_generated_manifest(generated_dir: str):
+    manifest_path = os.path.join(generated_dir, GENERATED_MANIFEST_FILE_NAME)
+    if os.path.isfile(manifest_path):
+        os.remove(manifest_path)
 
-    # Remove 'generated' if it exists and recreate it
-    if os.path.exists(generated_dir):
-        shutil.rmtree(generated_dir)
-    os.makedirs(generated_dir)
+
+def load_generated_manifest(generated_dir: str) -> Dict[str, str]:
+    """Return the fingerprint of every shader batcher from the last run, keyed by the name of its files without the
+    extension, a missing or unreadable manifest just means that everything gets generated."""
+    try:
+        with open(os.path.join(generated_dir, GENERATED_MANIFEST_FILE_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
 
 
 @dataclass
 class ShaderRequest:
     shader_type: ShaderType
     num_elements_in_buffer: int
+    allocation_policy: AllocationPolicy = AllocationPolicy.FIRST_FIT
+    growth_factor: Optional[float] = None
+    upload_mode: UploadMode = UploadMode.IMMEDIATE
+    num_stream_regions: int = 3
+    use_shadow_copy: bool = False
+    draw_mode: DrawMode = DrawMode.MULTI_DRAW
+    deduplicate_geometry: bool = False
+    use_instancing: bool = False
+    num_ltw_matrices: int = NUM_UBO_LTW_MATRICES
+    culling_mode: CullingMode = CullingMode.NONE
+    use_lods: bool = False
+
+
+def parse_bool(text: str) -> bool:
+    if text in ("true", "yes", "1"):
+        return True
+    if text in ("false", "no", "0"):
+        return False
+    raise ValueError("expected true or false")
+
+
+def parse_positive_int(text: str) -> int:
+    value = int(text)
+    if value <= 0:
+        raise ValueError("the value has to be positive")
+    return value
+
+
+def parse_growth_factor(text: str) -> float:
+    growth_factor = float(text)
+    if growth_factor <= 1:
+        raise ValueError("the growth factor has to be larger than 1")
+    return growth_factor
+
+
+# option name in a shader spec -> (ShaderRequest field it sets, conversion from the text after the '=')
+shader_spec_options = {
+    "policy": ("allocation_policy", AllocationPolicy),
+    "growth_factor": ("growth_factor", parse_growth_factor),
+    "upload": ("upload_mode", UploadMode),
+    "stream_frames": ("num_stream_regions", parse_positive_int),
+    "shadow_copy": ("use_shadow_copy", parse_bool),
+    "draw": ("draw_mode", DrawMode),
+    "dedup": ("deduplicate_geometry", parse_bool),
+    "instancing": ("use_instancing", parse_bool),
+    "ltw_matrices": ("num_ltw_matrices", parse_positive_int),
+    "culling": ("culling_mode", CullingMode),
+    "lods": ("use_lods", parse_bool),
+}
 
 
-def get_required_shaders(config_file) -> List[ShaderRequest]:
+def get_required_shaders(
+    config_file, capacity_merge: CapacityMerge = CapacityMerge.MAX
+) -> List[ShaderRequest]:
     """Read the configuration file and return a list of ShaderRequest objects after validation."""
     with open(config_file, "r") as file:
         shader_specs = [line.strip() for line in file if line.strip()]
 
-    return validate_shader_specs(shader_specs)
+    return validate_shader_specs(shader_specs, capacity_merge)
 
 
-def validate_shader_specs(shader_specs: List[str]) -> List["ShaderRequest"]:
-    """Validate shader specs and return a list of ShaderRequest objects (shader + buffer size)."""
+def validate_shader_specs(
+    shader_specs: List[str], capacity_merge: CapacityMerge = CapacityMerge.MAX
+) -> List["ShaderRequest"]:
+    """Validate shader specs and return a list of ShaderRequest objects (shader + buffer size + options), one per
+    shader.
+
+    The specs come from every submodule, so a shader can be requested more than once. Those requests are merged into
+    one whose buffer size is the largest or the sum of theirs depending on capacity_merge, and which has every option
+    that any of them set. Requests that set the same option to different values conflict, all conflicts are reported
+    before exiting.
+    """
     valid_shader_names = {
         shader.name.lower(): shader for shader in ShaderType
     }  # Map enum names to enum values
     shader_requests = []
+    # shader type -> (the specs requesting it, merged buffer size, merged options, the spec that set each option), in
+    # the order first requested
+    merged_specs: Dict[ShaderType, Tuple[List[str], int, dict, Dict[str, str]]] = {}
+    conflicts: List[str] = []
+    option_names = {
+        field_name: option_name
+        for option_name, (field_name, _) in shader_spec_options.items()
+    }
+
+    def format_option_value(value) -> str:
+        return str(value.value if isinstance(value, Enum) else value).lower()
 
-    pattern_with_size = re.compile(r"^([a-zA-Z0-9_]+)\((\d+)\)$")
+    pattern_with_arguments = re.compile(r"^([a-zA-Z0-9_]+)\(([^()]*)\)$")
     pattern_no_size = re.compile(r"^([a-zA-Z0-9_]+)$")
+    pattern_option = re.compile(r"^([a-zA-Z0-9_]+)\s*=\s*([a-zA-Z0-9_.]+)$")
 
     DEFAULT_NUM_ELEMENTS = 100000
 
     for spec in shader_specs:
-        match_with_size = pattern_with_size.match(spec)
+        match_with_arguments = pattern_with_arguments.match(spec)
         match_no_size = pattern_no_size.match(spec)
 
-        if match_with_size:
-            shader_name, num_elements_str = match_with_size.groups()
-            num_elements = int(num_elements_str)
+        options = {}
+        if match_with_arguments:
+            shader_name, arguments_str = match_with_arguments.groups()
+            arguments = [argument.strip() for argument in arguments_str.split(",")]
+            num_elements = DEFAULT_NUM_ELEMENTS
+            # the buffer size is optional but when it's given it has to come first
+            if arguments and arguments[0].isdigit():
+                num_elements = int(arguments.pop(0))
+            for argument in arguments:
+                match_option = pattern_option.match(argument)
+                if not match_option:
+                    print(
+                        f"Error: Invalid option '{argument}' in '{spec}'. Expected 'option=value'."
+                    )
+                    exit(1)
+                option_name, option_value = match_option.groups()
+                if option_name not in shader_spec_options:
+                    print(
+                        f"Error: Unknown option '{option_name}' in '{spec}'. Valid options are: {', '.join(shader_spec_options)}."
+                    )
+                    exit(1)
+                field_name, convert = shader_spec_options[option_name]
+                try:
+                    options[field_name] = convert(option_value.lower())
+                except ValueError:
+                    print(
+                        f"Error: Invalid value '{option_value}' for option '{option_name}' in '{spec}'."
+                    )
+                    exit(1)
         elif match_no_size:
             shader_name = match_no_size.group(1)
             num_elements = DEFAULT_NUM_ELEMENTS
         else:
             print(
-                f"Error: Invalid format '{spec}'. Expected 'shader_name' or 'shader_name(num_elements)'."
+                f"Error: Invalid format '{spec}'. Expected 'shader_name', 'shader_name(num_elements)' or 'shader_name(num_elements, option=value, ...)'."
             )
             exit(1)
 
@@ -1399,14 +5092,407 @@ def validate_shader_specs(shader_specs: List[str]) -> List["ShaderRequest"]:
             print(f"Error: buffer size must be positive in '{spec}'.")
             exit(1)
 
+        shader_type = valid_shader_names[shader_name]
+        if shader_type not in merged_specs:
+            merged_specs[shader_type] = (
+                [spec],
+                num_elements,
+                options,
+                {field_name: spec for field_name in options},
+            )
+            continue
+
+        specs, merged_num_elements, merged_options, option_to_spec = merged_specs[shader_type]
+        for field_name, value in options.items():
+            if field_name in merged_options and merged_options[field_name] != value:
+                conflicts.append(
+                    f"'{spec}' sets '{option_names[field_name]}' to {format_option_value(value)} where "
+                    f"'{option_to_spec[field_name]}' set it to {format_option_value(merged_options[field_name])}"
+                )
+        # the first request to set an option keeps it, so every later conflict is reported against that one
+        merged_specs[shader_type] = (
+            specs + [spec],
+            (
+                merged_num_elements + num_elements
+                if capacity_merge == CapacityMerge.SUM
+                else max(merged_num_elements, num_elements)
+            ),
+            {**options, **merged_options},
+            {**{field_name: spec for field_name in options}, **option_to_spec},
+        )
+
+    if conflicts:
+        print("Error: conflicting requests for the same shader:")
+        for conflict in conflicts:
+            print(f"  {conflict}")
+        exit(1)
+
+    # the options are checked against each other once they're merged, since two requests can each be fine on their
+    # own but not together
+    for shader_type, (specs, num_elements, options, _) in merged_specs.items():
+        spec = " + ".join(specs)
+        shader_name = shader_type.name.lower()
+        if len(specs) > 1:
+            print(
+                f"Merged {len(specs)} requests for '{shader_name}' into a buffer size of {num_elements}."
+            )
+
+        # persistently mapped buffers use immutable storage which can't be reallocated
+        if (
+            options.get("upload_mode") == UploadMode.STREAMING
+            and options.get("growth_factor") is not None
+        ):
+            print(
+                f"Error: 'growth_factor' can't be combined with 'upload=streaming' in '{spec}'."
+            )
+            exit(1)
+
+        if (
+            "use_shadow_copy" in options
+            and options.get("upload_mode") != UploadMode.COALESCED
+        ):
+            print(f"Error: 'shadow_copy' only applies to 'upload=coalesced' in '{spec}'.")
+            exit(1)
+
+        # instances are told apart by their ltw matrix, so like the matrix options only the ubo shaders can use it
+        uses_ltw_matrices = (
+            ShaderVertexAttributeVariable.LOCAL_TO_WORLD_INDEX
+            in shader_to_used_vertex_attribute_variables.get(
+                valid_shader_names[shader_name], []
+            )
+        )
+        for ltw_option, ltw_field in [
+            ("instancing", "use_instancing"),
+            ("ltw_matrices", "num_ltw_matrices"),
+        ]:
+            if ltw_field in options and not uses_ltw_matrices:
+                print(
+                    f"Error: '{ltw_option}' only applies to shaders with a local to world index in '{spec}'."
+                )
+                exit(1)
+
+        # the shaders declare a block of exactly this many matrices, fewer only bounds the ltw indices handed out
+        if options.get("num_ltw_matrices", NUM_UBO_LTW_MATRICES) > NUM_UBO_LTW_MATRICES:
+            print(
+                f"Error: 'ltw_matrices' can be at most {NUM_UBO_LTW_MATRICES}, the number of matrices the shaders "
+                f"declare, in '{spec}'."
+            )
+            exit(1)
+
+        # the bounds that objects are culled with and levels are picked by are computed from their 3d positions
+        has_xyz_positions = (
+            ShaderVertexAttributeVariable.XYZ_POSITION
+            in shader_to_used_vertex_attribute_variables.get(
+                valid_shader_names[shader_name], []
+            )
+        )
+        if (
+            options.get("culling_mode", CullingMode.NONE) != CullingMode.NONE
+            and not has_xyz_positions
+        ):
+            print(
+                f"Error: 'culling' only applies to shaders with xyz positions in '{spec}'."
+            )
+            exit(1)
+        if options.get("use_lods") and not has_xyz_positions:
+            print(
+                f"Error: 'lods' only applies to shaders with xyz positions in '{spec}'."
+            )
+            exit(1)
+
+        # the culling pass writes plain indirect commands, one per object, for the single region of the buffers
+        if options.get("culling_mode") == CullingMode.GPU:
+            if options.get("draw_mode") != DrawMode.INDIRECT:
+                print(f"Error: 'culling=gpu' needs 'draw=indirect' in '{spec}'.")
+                exit(1)
+            if (
+                options.get("use_instancing")
+                or options.get("upload_mode") == UploadMode.STREAMING
+                or options.get("use_lods")
+            ):
+                print(
+                    f"Error: 'culling=gpu' can't be combined with 'instancing', 'upload=streaming' or 'lods' in '{spec}'."
+                )
+                exit(1)
+
         shader_requests.append(
-            ShaderRequest(valid_shader_names[shader_name], num_elements)
+            ShaderRequest(valid_shader_names[shader_name], num_elements, **options)
         )
 
     print("All shader specs are valid.")
     return shader_requests
 
 
+REQUIRED_SHADER_BATCHERS_FILE_NAME = ".required_shader_batchers.txt"
+# remembers what the search for request files found in every directory, see find_required_shader_batcher_files
+REQUIRED_SHADER_BATCHERS_DISCOVERY_CACHE_FILE_NAME = ".required_shader_batchers_discovery_cache.json"
+# directories that never hold requests of their own, so the search doesn't look inside them, matched with fnmatch
+DIRECTORY_PATTERNS_SKIPPED_BY_DISCOVERY = [
+    ".git",
+    ".hg",
+    ".svn",
+    ".cache",
+    ".venv",
+    "venv",
+    "__pycache__",
+    "node_modules",
+    "generated",
+    "build",
+    "build-*",
+    "cmake-build-*",
+]
+
+
+def read_gitignore_patterns(directory: str) -> List[List[str]]:
+    """Return the patterns of the directory's .gitignore as (directory, pattern) pairs in the order they're written."""
+    try:
+        with open(os.path.join(directory, ".gitignore")) as gitignore_file:
+            lines = gitignore_file.read().splitlines()
+    except OSError:
+        return []
+    patterns = []
+    for line in lines:
+        # trailing spaces are dropped unless the last one is escaped with a backslash
+        pattern = line.rstrip(" ")
+        if pattern != line and (len(pattern) - len(pattern.rstrip("\\"))) % 2 == 1:
+            pattern += " "
+        if pattern and not pattern.startswith("#"):
+            patterns.append([directory, pattern])
+    return patterns
+
+
+@lru_cache(maxsize=None)
+def gitignore_pattern_to_regex(pattern: str) -> "re.Pattern":
+    """Translate a .gitignore pattern, without its leading ! or trailing /, into a regex for a path relative to the
+    .gitignore's directory.
+
+    A pattern with a / anywhere but at its end is anchored to the .gitignore's directory, otherwise it matches at any
+    depth. * and ? don't match a /, a **/ matches any number of directories, a trailing /** everything inside, and a
+    backslash makes the character after it literal.
+    """
+    if "/" in pattern:
+        pattern = pattern[1:] if pattern.startswith("/") else pattern
+        regex = ""
+    else:
+        regex = "(?:.*/)?"
+
+    i = 0
+    while i < len(pattern):
+        at_segment_start = i == 0 or pattern[i - 1] == "/"
+        if at_segment_start and pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif at_segment_start and pattern[i:] == "**":
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            characters = pattern[i + 1 : end]
+            negated = characters[0] in "!^"
+            if negated:
+                characters = characters[1:]
+            characters = "".join(c if c == "-" else re.escape(c) for c in characters)
+            regex += f"(?!/)[{'^' if negated else ''}{characters}]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex)
+
+
+def is_ignored_by_gitignore(
+    path: str, is_directory: bool, gitignore_patterns: List[List[str]]
+) -> bool:
+    """Check a path against .gitignore patterns, the last pattern that matches decides like it does for git.
+
+    A leading ! negates a pattern and a trailing / limits it to directories, a backslash in front of a leading ! or #
+    makes it literal instead, see gitignore_pattern_to_regex for how the rest of the pattern is matched.
+    """
+    ignored = False
+    for base_directory, pattern in gitignore_patterns:
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        if pattern.endswith("/"):
+            if not is_directory:
+                continue
+            pattern = pattern[:-1]
+        relative_path = os.path.relpath(path, base_directory).replace(os.sep, "/")
+        if gitignore_pattern_to_regex(pattern).fullmatch(relative_path):
+            ignored = not negated
+    return ignored
+
+
+def find_required_shader_batcher_files(root_directory: str, cache_path: str) -> List[str]:
+    """Return the paths of every request file under the root directory, sorted so the merged requests are stable.
+
+    Directories matching DIRECTORY_PATTERNS_SKIPPED_BY_DISCOVERY or ignored by a .gitignore (from the root directory
+    down) aren't searched. What was found in every directory is cached along with the directory's modification time,
+    which changes whenever something is added to or removed from it, so unchanged directories are only stat'ed instead
+    of listed on later runs.
+    """
+    try:
+        with open(cache_path) as cache_file:
+            previous_cache = json.load(cache_file)
+        if not isinstance(previous_cache, dict):
+            previous_cache = {}
+    except (OSError, ValueError):
+        previous_cache = {}
+    cache: Dict[str, dict] = {}
+    found_files: List[str] = []
+
+    def search(directory: str, inherited_gitignore_patterns: List[List[str]]):
+        try:
+            directory_modification_time = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        try:
+            gitignore_modification_time = os.stat(
+                os.path.join(directory, ".gitignore")
+            ).st_mtime_ns
+        except OSError:
+            gitignore_modification_time = None
+        # what a parent's .gitignore says applies here too, so a change to it invalidates this directory as well
+        key = [
+            directory_modification_time,
+            gitignore_modification_time,
+            hashlib.sha256(
+                json.dumps(inherited_gitignore_patterns).encode()
+            ).hexdigest(),
+        ]
+
+        entry = previous_cache.get(directory)
+        if not isinstance(entry, dict) or entry.get("key") != key:
+            own_gitignore_patterns = read_gitignore_patterns(directory)
+            gitignore_patterns = inherited_gitignore_patterns + own_gitignore_patterns
+            subdirectories = []
+            has_requests = False
+            try:
+                with os.scandir(directory) as directory_entries:
+                    for directory_entry in directory_entries:
+                        if directory_entry.is_dir(follow_symlinks=False):
+                            if not any(
+                                fnmatch.fnmatchcase(directory_entry.name, pattern)
+                                for pattern in DIRECTORY_PATTERNS_SKIPPED_BY_DISCOVERY
+                            ) and not is_ignored_by_gitignore(
+                                directory_entry.path, True, gitignore_patterns
+                            ):
+                                subdirectories.append(directory_entry.name)
+                        elif (
+                            directory_entry.name == REQUIRED_SHADER_BATCHERS_FILE_NAME
+                            and not is_ignored_by_gitignore(
+                                directory_entry.path, False, gitignore_patterns
+                            )
+                        ):
+                            has_requests = True
+            except OSError:
+                return
+            entry = {
+                "key": key,
+                "own_gitignore_patterns": own_gitignore_patterns,
+                "subdirectories": sorted(subdirectories),
+                "has_requests": has_requests,
+            }
+        cache[directory] = entry
+
+        if entry["has_requests"]:
+            found_files.append(
+                os.path.join(directory, REQUIRED_SHADER_BATCHERS_FILE_NAME)
+            )
+        for subdirectory in entry["subdirectories"]:
+            search(
+                os.path.join(directory, subdirectory),
+                inherited_gitignore_patterns + entry["own_gitignore_patterns"],
+            )
+
+    search(root_directory, [])
+
+    # this touches the directory the cache is in, so that one directory is listed again next time, which is cheap
+    write_file_if_changed(cache_path, json.dumps(cache, sort_keys=True) + "\n")
+    return sorted(found_files)
+
+
+def merge_required_shader_batcher_files(file_paths: List[str]) -> str:
+    merged_requests = ""
+    for file_path in file_paths:
+        with open(file_path) as requests_file:
+            requests = requests_file.read()
+        if requests and not requests.endswith("\n"):
+            requests += "\n"
+        merged_requests += requests
+    return merged_requests
+
+
+def create_shader_batcher(
+    requested_shader: ShaderRequest,
+    vertex_attributes: List[ShaderVertexAttributeVariable],
+) -> ShaderBatcherCppClass:
+    return ShaderBatcherCppClass(
+        requested_shader.shader_type,
+        requested_shader.num_elements_in_buffer,
+        vertex_attributes,
+        requested_shader.allocation_policy,
+        requested_shader.growth_factor,
+        requested_shader.upload_mode,
+        requested_shader.num_stream_regions,
+        requested_shader.use_shadow_copy,
+        requested_shader.draw_mode,
+        requested_shader.deduplicate_geometry,
+        requested_shader.use_instancing,
+        requested_shader.num_ltw_matrices,
+        requested_shader.culling_mode,
+        requested_shader.use_lods,
+    )
+
+
+def render_shader_batcher(
+    requested_shader: ShaderRequest,
+    vertex_attributes: List[ShaderVertexAttributeVariable],
+) -> Tuple[str, str]:
+    """Generate the header and source content of the requested shader's batcher.
+
+    This only depends on its arguments so that it can run in a worker process, writing the files is left to the
+    caller.
+    """
+    shader_type = requested_shader.shader_type
+    shader_batcher = create_shader_batcher(requested_shader, vertex_attributes)
+
+    shader_batcher_header_and_source = CppHeaderAndSource(
+        f"{shader_type.name.lower()}_shader_batcher"
+    )
+
+    shader_batcher_header_and_source.add_include(
+        '#include <iostream>\n#include <limits>\n#include <string>\n#include "../sbpt_generated_includes.hpp"\n'
+        + ('#include "../hashing.hpp"\n' if requested_shader.deduplicate_geometry else "")
+        + f'#include "{FreeListFixedSizeArrayTrackerCppClass().get_file_name()}.hpp"\n\n'
+    )
+
+    batcher_class = shader_batcher.generate_cpp_class()
+    shader_batcher_header_and_source.add_class(batcher_class)
+
+    # deduplication compares incoming data against the cached data through this struct and its hash
+    if requested_shader.deduplicate_geometry:
+        shader_batcher_draw_info_struct = ShaderBatcherCppStruct(
+            shader_type, shader_batcher.per_vertex_attributes
+        )
+        struct = shader_batcher_draw_info_struct.generate_cpp_struct()
+        shader_batcher_header_and_source.add_struct(struct)
+
+    return (
+        shader_batcher_header_and_source.generate_header_content(),
+        shader_batcher_header_and_source.generate_source_content(),
+    )
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Generate C++ shader batcher classes.")
@@ -1430,14 +5516,31 @@ if __name__ == "__main__":
         help="Directory to save the generated config file (default: current directory).",
     )
 
+    parser.add_argument(
+        "--merge-capacity",
+        choices=[capacity_merge.value for capacity_merge in CapacityMerge],
+        default=CapacityMerge.MAX.value,
+        help="How the buffer sizes of several requests for the same shader are combined, 'max' (default) or 'sum'.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=parse_positive_int,
+        default=1,
+        help="Number of processes the shader batchers are generated with (default: 1).",
+    )
+
     args = parser.parse_args()
 
-    # we assume that submodules can define their own required shader batchers and then we compile all those here.
-    concatenate_files(
-        find_all_instances_of_file_in_directory_recursively(
-            ".", ".required_shader_batchers.txt"
-        ),
+    # we assume that submodules can define their own required shader batchers and then we compile all those here,
+    # the merged file is left alone when nothing in it changed
+    write_file_if_changed(
         ".all_required_shader_batchers.txt",
+        merge_required_shader_batcher_files(
+            find_required_shader_batcher_files(
+                ".", REQUIRED_SHADER_BATCHERS_DISCOVERY_CACHE_FILE_NAME
+            )
+        ),
     )
 
     if args.generate_config:
@@ -1461,21 +5564,68 @@ if __name__ == "__main__":
                 sys.exit(1)
 
             user_shader_requests: List[ShaderRequest] = get_required_shaders(
-                args.config_file
+                args.config_file, CapacityMerge(args.merge_capacity)
             )
             print(f"Selected shaders from config file: {user_shader_requests}")
         else:
-            user_shader_requests = list_available_shaders(
-                shader_to_used_vertex_attribute_variables
-            )
+            user_shader_requests = [
+                ShaderRequest(shader_type, 100000)
+                for shader_type in list_available_shaders(
+                    shader_to_used_vertex_attribute_variables
+                )
+            ]
+
+        # the requests are already merged, so there's exactly one per shader type
+        shader_type_to_request: Dict[ShaderType, ShaderRequest] = {
+            shader_request.shader_type: shader_request
+            for shader_request in user_shader_requests
+        }
 
         constructed_class_names: List[str] = []
+        constructed_shader_types: List[ShaderType] = []
         constructed_header_files: List[str] = []
+        # every file this run produces, whether it had to be written or not
+        generated_file_names: List[str] = []
+
+        script_directory = create_generated_directory()
+        previous_manifest = load_generated_manifest(script_directory)
+        # a run that stops half way leaves no manifest behind, so the next one doesn't trust fingerprints of files
+        # that might not have been written yet, it regenerates everything and only writes what differs
+        remove_generated_manifest(script_directory)
+        manifest: Dict[str, str] = {}
+        generator_version = get_generator_version()
+
+        # the allocator is shared by every shader batcher so it only gets generated once
+        tracker_cpp_class_creator = FreeListFixedSizeArrayTrackerCppClass()
+        tracker_header_and_source = CppHeaderAndSource(
+            tracker_cpp_class_creator.get_file_name()
+        )
+        tracker_header_and_source.add_class(
+            tracker_cpp_class_creator.generate_cpp_class()
+        )
 
-        wipe_generated_directory()
+        header_filename = os.path.join(
+            script_directory, f"{tracker_cpp_class_creator.get_file_name()}.hpp"
+        )
+        source_filename = os.path.join(
+            script_directory, f"{tracker_cpp_class_creator.get_file_name()}.cpp"
+        )
+
+        write_generated_file(
+            header_filename, tracker_header_and_source.generate_header_content()
+        )
+        write_generated_file(
+            source_filename, tracker_header_and_source.generate_source_content()
+        )
+        generated_file_names += [
+            os.path.basename(header_filename),
+            os.path.basename(source_filename),
+        ]
 
-        # Get the directory where the script exists
-        script_directory = os.path.dirname(os.path.abspath(__file__)) + "/generated"
+        # (request, vertex attributes, header path, source path) of every batcher that has to be generated
+        batchers_to_render: List[
+            Tuple[ShaderRequest, List[ShaderVertexAttributeVariable], str, str]
+        ] = []
 
         # NOTE: this is the main logic that starts off everything
         for (
@@ -1483,17 +5633,16 @@ if __name__ == "__main__":
             vertex_attributes,
         ) in shader_to_used_vertex_attribute_variables.items():
 
-            # TODO: then just iterate over this instead of this check...
-            if shader_type not in [usr.shader_type for usr in user_shader_requests]:
+            if shader_type not in shader_type_to_request:
                 continue
-
-            num_elements_in_buffer = 100000
-            for shader_request in user_shader_requests:
-                if shader_request.shader_type == shader_type:
-                    num_elements_in_buffer = shader_request.num_elements_in_buffer
+            requested_shader = shader_type_to_request[shader_type]
 
             header_file = f"{shader_type.name.lower()}_shader_batcher.hpp"
             constructed_header_files.append(header_file)
+            generated_file_names += [
+                header_file,
+                f"{shader_type.name.lower()}_shader_batcher.cpp",
+            ]
 
             # Create file paths relative to the script's directory
             header_filename = os.path.join(
@@ -1503,43 +5652,56 @@ if __name__ == "__main__":
                 script_directory, f"{shader_type.name.lower()}_shader_batcher.cpp"
             )
 
-            shader_batcher_header_and_source = CppHeaderAndSource(
-                f"{shader_type.name.lower()}_shader_batcher"
-            )
+            shader_batcher = create_shader_batcher(requested_shader, vertex_attributes)
+            constructed_class_names.append(shader_batcher.get_class_name())
+            constructed_shader_types.append(shader_type)
 
-            shader_batcher_header_and_source.add_include(
-                '#include <iostream>\n#include <string>\n#include "../sbpt_generated_includes.hpp"\n\n'
+            # generating a batcher is the slow part, so it's skipped when it's made from the same inputs as last time
+            fingerprint = fingerprint_shader_batcher_inputs(
+                requested_shader, vertex_attributes, generator_version
             )
+            manifest[f"{shader_type.name.lower()}_shader_batcher"] = fingerprint
+            if (
+                previous_manifest.get(f"{shader_type.name.lower()}_shader_batcher")
+                == fingerprint
+                and os.path.isfile(header_filename)
+                and os.path.isfile(source_filename)
+            ):
+                print(f"Up to date {header_filename}")
+                print(f"Up to date {source_filename}")
+                continue
 
-            shader_batcher = ShaderBatcherCppClass(
-                shader_type, num_elements_in_buffer, vertex_attributes
+            batchers_to_render.append(
+                (requested_shader, vertex_attributes, header_filename, source_filename)
             )
-            batcher_class = shader_batcher.generate_cpp_class()
-            shader_batcher_header_and_source.add_class(batcher_class)
-
-            # shader_batcher_draw_info_struct = ShaderBatcherCppStruct(shader_type, vertex_attributes)
-            # struct = shader_batcher_draw_info_struct.generate_cpp_struct()
-            # shader_batcher_header_and_source.add_struct(struct)
 
-            # shader_batcher_header_and_source.add_extra_header_code(generate_hashing_code_for_draw_data(vertex_attributes, shader_type))
-
-            source_content = shader_batcher_header_and_source.generate_source_content()
-            header_content = shader_batcher_header_and_source.generate_header_content()
-
-            # Write the header content to the header file
-            with open(header_filename, "w") as header_file:
-                header_file.write(header_content)
-
-            # Write the source content to the source file
-            with open(source_filename, "w") as source_file:
-                source_file.write(source_content)
+        # the batchers don't depend on each other, so with more than one job they're rendered in parallel, map hands
+        # the results back in request order so the files are written in the same order either way
+        render_inputs = [
+            (requested_shader, vertex_attributes)
+            for requested_shader, vertex_attributes, _, _ in batchers_to_render
+        ]
+        if args.jobs > 1 and len(batchers_to_render) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                rendered_batchers = list(
+                    executor.map(render_shader_batcher, *zip(*render_inputs))
+                )
+        else:
+            rendered_batchers = [
+                render_shader_batcher(requested_shader, vertex_attributes)
+                for requested_shader, vertex_attributes in render_inputs
+            ]
 
-            # Optional: Print confirmation message
-            print(f"Header written to {header_filename}")
-            print(f"Source written to {source_filename}")
-            constructed_class_names.append(shader_batcher.get_class_name())
+        for (_, _, header_filename, source_filename), (
+            header_content,
+            source_content,
+        ) in zip(batchers_to_render, rendered_batchers):
+            write_generated_file(header_filename, header_content)
+            write_generated_file(source_filename, source_content)
 
-        batcher_cpp_class_creator = BatcherCppClassCreator(constructed_class_names)
+        batcher_cpp_class_creator = BatcherCppClassCreator(
+            constructed_class_names, constructed_shader_types
+        )
         batcher_class = batcher_cpp_class_creator.generate_cpp_class()
 
         # File paths for the main batcher class
@@ -1564,14 +5726,15 @@ if __name__ == "__main__":
         header_content = batcher_header_and_source.generate_header_content()
         source_content = batcher_header_and_source.generate_source_content()
 
-        # Write the header content to the header file
-        with open(header_filename, "w") as header_file:
-            header_file.write(header_content)
-
-        # Write the source content to the source file
-        with open(source_filename, "w") as source_file:
-            source_file.write(source_content)
+        write_generated_file(header_filename, header_content)
+        write_generated_file(source_filename, source_content)
+        generated_file_names += [
+            os.path.basename(header_filename),
+            os.path.basename(source_filename),
+        ]
 
-        # Optional: Print confirmation message
-        print(f"Header written to {header_filename}")
-        print(f"Source written to {source_filename}")
+        remove_stale_generated_files(script_directory, generated_file_names)
+        write_file_if_changed(
+            os.path.join(script_directory, GENERATED_MANIFEST_FILE_NAME),
+            json.dumps(manifest, indent=4, sort_keys=True) + "\n",
+        )
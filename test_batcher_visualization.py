@@ -0,0 +1,186 @@
+import random
+import unittest
+
+from batcher_visualization import (
+    ALLOCATION_POLICIES,
+    BEST_FIT,
+    FIRST_FIT,
+    SIZE_CLASS,
+    FixedSizeArray,
+    FixedSizeArrayTracker,
+)
+
+
+class FixedSizeArrayTrackerTest(unittest.TestCase):
+    def test_compact_step_with_empty_range_sharing_a_start(self):
+        tracker = FixedSizeArrayTracker(20)
+        tracker.add_metadata(1, 0, 5)
+        tracker.add_metadata(2, 5, 5)
+        tracker.add_metadata(3, 10, 10)
+        tracker.remove_metadata(2)
+
+        # an empty object, like text without glyphs, lands at the start of the hole and a real one right on top of it
+        tracker.add_metadata(4, tracker._find_space(0), 0)
+        tracker.add_metadata(5, tracker._find_space(5), 5)
+        self.assertEqual(tracker.get_metadata(4), (5, 0))
+        self.assertEqual(tracker.get_metadata(5), (5, 5))
+
+        tracker.remove_metadata(1)
+        relocations = tracker.compact_step(100)
+
+        self.assertEqual(relocations, [(5, 5, 0, 5), (3, 10, 5, 10)])
+        self.assertFalse(tracker.is_fragmented())
+        self.assertEqual(tracker.start_to_id, {0: 5, 5: 3})
+
+    def test_removing_empty_range_keeps_the_real_one_tracked(self):
+        tracker = FixedSizeArrayTracker(10)
+        tracker.add_metadata(1, 0, 0)
+        tracker.add_metadata(2, 0, 4)
+        tracker.remove_metadata(1)
+        self.assertEqual(tracker.start_to_id, {0: 2})
+
+    def test_resize_in_place_to_and_from_empty(self):
+        tracker = FixedSizeArrayTracker(10)
+        tracker.add_metadata(1, 0, 4)
+        self.assertTrue(tracker.resize_in_place(1, 0))
+        self.assertEqual(tracker.start_to_id, {})
+        self.assertTrue(tracker.resize_in_place(1, 3))
+        self.assertEqual(tracker.start_to_id, {0: 1})
+
+    def test_remove_coalesces_with_neighbouring_free_intervals(self):
+        tracker = FixedSizeArrayTracker(10)
+        tracker.add_metadata(1, 0, 3)
+        tracker.add_metadata(2, 3, 3)
+        tracker.add_metadata(3, 6, 3)
+
+        tracker.remove_metadata(1)
+        tracker.remove_metadata(3)
+        self.assertEqual(tracker.free_start_to_length, {0: 3, 6: 4})
+
+        tracker.remove_metadata(2)
+        self.assertEqual(tracker.free_start_to_length, {0: 10})
+        self.assertEqual(tracker.free_starts, [0])
+
+    def test_first_fit_takes_the_lowest_hole_that_fits(self):
+        tracker = FixedSizeArrayTracker(20)
+        tracker.add_metadata(1, 0, 2)
+        tracker.add_metadata(2, 2, 3)
+        tracker.add_metadata(3, 5, 5)
+        tracker.add_metadata(4, 10, 2)
+        tracker.remove_metadata(1)
+        tracker.remove_metadata(3)
+
+        self.assertEqual(tracker._find_space(2), 0)
+        self.assertEqual(tracker._find_space(3), 5)
+        self.assertEqual(tracker._find_space(6), 12)
+        self.assertEqual(tracker._find_space(9), None)
+
+    def test_empty_range_fits_when_full(self):
+        tracker = FixedSizeArrayTracker(4)
+        tracker.add_metadata(1, 0, 4)
+        self.assertEqual(tracker._find_space(0), 0)
+
+        tracker.add_metadata(2, tracker._find_space(0), 0)
+        self.assertEqual(tracker.get_metadata(2), (0, 0))
+        self.assertEqual(tracker.start_to_id, {0: 1})
+
+        tracker.remove_metadata(2)
+        self.assertEqual(tracker.free_starts, [])
+
+    def _tracker_with_holes(self, policy, size, used):
+        tracker = FixedSizeArrayTracker(size, policy=policy)
+        for id, (start, length) in enumerate(used):
+            tracker.add_metadata(id, start, length)
+        return tracker
+
+    def test_placement_per_policy(self):
+        # holes of length 9 at 1, 3 at 12, 4 at 16 and 8 at 24
+        used = [(0, 1), (10, 2), (15, 1), (20, 4)]
+        expected = {
+            FIRST_FIT: {3: 1, 5: 1},
+            BEST_FIT: {3: 12, 5: 24},
+            SIZE_CLASS: {3: 16, 5: 1},
+        }
+        for policy, length_to_start in expected.items():
+            tracker = self._tracker_with_holes(policy, 32, used)
+            for length, start in length_to_start.items():
+                self.assertEqual(tracker._find_space(length), start, (policy, length))
+            self.assertEqual(tracker._find_space(10), None, policy)
+
+    def test_size_class_falls_back_when_larger_classes_are_empty(self):
+        # holes of length 6 at 2 and 3 at 10, a length of 5 rounds up to a class that is empty
+        tracker = self._tracker_with_holes(SIZE_CLASS, 16, [(0, 2), (8, 2), (13, 3)])
+        self.assertEqual(tracker._find_space(5), 2)
+        self.assertEqual(tracker._find_space(7), None)
+
+    def test_unknown_policy_raises(self):
+        with self.assertRaises(ValueError):
+            FixedSizeArrayTracker(8, policy="worst_fit")
+
+
+class FixedSizeArrayTest(unittest.TestCase):
+    def test_add_empty_string_when_full(self):
+        array = FixedSizeArray(4)
+        array.add(1, "abcd")
+        array.add(2, "")
+        self.assertEqual(array.get(1), "abcd")
+        self.assertEqual(array.get(2), "")
+
+    def test_replaced_string_that_fits_keeps_its_start(self):
+        array = FixedSizeArray(10)
+        array.add(1, "abcd")
+        array.add(2, "ef")
+        array.add(1, "xy")
+        self.assertEqual(array.tracker.get_metadata(1), (0, 2))
+        self.assertEqual(array.get(1), "xy")
+        self.assertEqual(array.get(2), "ef")
+
+    def test_replaced_string_grows_into_following_free_space(self):
+        array = FixedSizeArray(10)
+        array.add(1, "ab")
+        array.add(2, "cd")
+        array.tracker.remove_metadata(2)
+        array.add(1, "wxyz")
+        self.assertEqual(array.tracker.get_metadata(1), (0, 4))
+        self.assertEqual(array.get(1), "wxyz")
+
+    def test_replaced_string_moves_when_blocked(self):
+        array = FixedSizeArray(10)
+        array.add(1, "ab")
+        array.add(2, "cd")
+        array.add(1, "wxyz")
+        self.assertEqual(array.tracker.get_metadata(1), (4, 4))
+        self.assertEqual(array.get(1), "wxyz")
+        self.assertEqual(array.get(2), "cd")
+
+    def test_incremental_defragment_packs_everything(self):
+        for policy in ALLOCATION_POLICIES:
+            rng = random.Random(policy)
+            incremental = FixedSizeArray(64, policy=policy)
+            strings = {}
+            for step in range(200):
+                id = rng.randrange(16)
+                if id in strings and rng.random() < 0.4:
+                    incremental.tracker.remove_metadata(id)
+                    del strings[id]
+                    continue
+                string = "".join(rng.choice("abcdef") for _ in range(rng.randrange(6)))
+                try:
+                    incremental.add(id, string)
+                except ValueError:
+                    continue
+                strings[id] = string
+                if step % 7 == 0:
+                    incremental.incremental_defragment(3)
+
+            while incremental.incremental_defragment(3):
+                pass
+
+            for id, string in strings.items():
+                self.assertEqual(incremental.get(id), string)
+            used = sum(len(string) for string in strings.values())
+            self.assertEqual(incremental.tracker.free_starts, [used] if used < 64 else [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from main import (
+    REQUIRED_SHADER_BATCHERS_FILE_NAME,
+    AllocationPolicy,
+    CapacityMerge,
+    ShaderType,
+    UploadMode,
+    find_required_shader_batcher_files,
+    is_ignored_by_gitignore,
+    read_gitignore_patterns,
+    validate_shader_specs,
+)
+
+
+def write(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def touch_later(path):
+    # modification times can be coarser than the time between two writes in a test, so they're moved on explicitly
+    modification_time = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(modification_time, modification_time))
+
+
+class GitignoreTest(unittest.TestCase):
+    def assert_matches(self, pattern, relative_path, expected, is_directory=False):
+        path = os.path.join("/root_directory", relative_path)
+        self.assertEqual(
+            is_ignored_by_gitignore(path, is_directory, [["/root_directory", pattern]]),
+            expected,
+            (pattern, relative_path),
+        )
+
+    def test_double_star_matches_any_number_of_directories(self):
+        self.assert_matches("**/foo", "foo", True)
+        self.assert_matches("**/foo", "a/b/foo", True)
+        self.assert_matches("a/**/b", "a/b", True)
+        self.assert_matches("a/**/b", "a/x/y/b", True)
+        self.assert_matches("foo/**", "foo", False)
+        self.assert_matches("foo/**", "foo/a/b", True)
+
+    def test_single_star_does_not_cross_directories(self):
+        self.assert_matches("a/*.txt", "a/b.txt", True)
+        self.assert_matches("a/*.txt", "a/b/c.txt", False)
+        self.assert_matches("a?b", "a/b", False)
+        # without a slash the pattern matches at any depth
+        self.assert_matches("*.txt", "a/b/c.txt", True)
+
+    def test_anchoring_and_directory_only_patterns(self):
+        self.assert_matches("/build", "build", True)
+        self.assert_matches("/build", "a/build", False)
+        self.assert_matches("build/", "a/build", True, is_directory=True)
+        self.assert_matches("build/", "a/build", False)
+
+    def test_last_matching_pattern_decides(self):
+        patterns = [["/root_directory", "*.txt"], ["/root_directory", "!keep.txt"]]
+        self.assertTrue(is_ignored_by_gitignore("/root_directory/drop.txt", False, patterns))
+        self.assertFalse(is_ignored_by_gitignore("/root_directory/keep.txt", False, patterns))
+
+    def test_escapes_and_trailing_spaces(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write(os.path.join(directory, ".gitignore"), "# comment\n\\#hash\n\\!bang\ntrailing  \nescaped\\ \n")
+            patterns = read_gitignore_patterns(directory)
+            self.assertEqual(
+                [pattern for _, pattern in patterns], ["\\#hash", "\\!bang", "trailing", "escaped\\ "]
+            )
+            for name, expected in [("#hash", True), ("!bang", True), ("bang", False), ("trailing", True),
+                                   ("escaped ", True), ("escaped", False)]:
+                self.assertEqual(
+                    is_ignored_by_gitignore(os.path.join(directory, name), False, patterns), expected, name
+                )
+
+
+class FindRequiredShaderBatcherFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = self.temporary_directory.name
+        self.cache_path = os.path.join(self.root, "cache.json")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def request_file(self, *directories):
+        return os.path.join(self.root, *directories, REQUIRED_SHADER_BATCHERS_FILE_NAME)
+
+    def find(self):
+        return find_required_shader_batcher_files(self.root, self.cache_path)
+
+    def test_ignored_and_skipped_directories_are_not_searched(self):
+        write(self.request_file("app"))
+        write(self.request_file("app", "vendor", "lib"))
+        write(self.request_file("app", "vendor", "kept"))
+        write(self.request_file("node_modules", "package"))
+        write(os.path.join(self.root, "app", ".gitignore"), "vendor/*\n!vendor/kept/\n")
+
+        self.assertEqual(self.find(), [self.request_file("app"), self.request_file("app", "vendor", "kept")])
+        with open(self.cache_path) as cache_file:
+            searched_directories = json.load(cache_file)
+        self.assertNotIn(os.path.join(self.root, "app", "vendor", "lib"), searched_directories)
+        self.assertNotIn(os.path.join(self.root, "node_modules"), searched_directories)
+
+    def test_cache_is_invalidated_by_new_requests_and_gitignore_changes(self):
+        write(self.request_file("a", "b"))
+        self.assertEqual(self.find(), [self.request_file("a", "b")])
+
+        write(self.request_file("a"))
+        touch_later(os.path.join(self.root, "a"))
+        self.assertEqual(self.find(), [self.request_file("a"), self.request_file("a", "b")])
+
+        # a parent's .gitignore changing has to reach directories below it that didn't change themselves
+        write(os.path.join(self.root, ".gitignore"), "b/\n")
+        touch_later(os.path.join(self.root, ".gitignore"))
+        self.assertEqual(self.find(), [self.request_file("a")])
+
+        write(os.path.join(self.root, ".gitignore"), "")
+        touch_later(os.path.join(self.root, ".gitignore"))
+        self.assertEqual(self.find(), [self.request_file("a"), self.request_file("a", "b")])
+
+
+class ValidateShaderSpecsTest(unittest.TestCase):
+    SHADER = "cwl_v_transformation_ubos_1024_with_solid_color"
+
+    def validate(self, specs, capacity_merge=CapacityMerge.MAX):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            try:
+                return validate_shader_specs(specs, capacity_merge), output.getvalue()
+            except SystemExit:
+                return None, output.getvalue()
+
+    def test_duplicate_requests_merge_their_buffer_sizes(self):
+        specs = [f"{self.SHADER}(100)", f"{self.SHADER}(300)", f"{self.SHADER}(200)"]
+        for capacity_merge, num_elements in [(CapacityMerge.MAX, 300), (CapacityMerge.SUM, 600)]:
+            shader_requests, _ = self.validate(specs, capacity_merge)
+            self.assertEqual(len(shader_requests), 1)
+            self.assertEqual(shader_requests[0].shader_type, ShaderType.CWL_V_TRANSFORMATION_UBOS_1024_WITH_SOLID_COLOR)
+            self.assertEqual(shader_requests[0].num_elements_in_buffer, num_elements)
+
+    def test_duplicate_requests_take_every_option_set(self):
+        shader_requests, _ = self.validate(
+            [
+                f"{self.SHADER}(16, policy=best_fit)",
+                f"{self.SHADER}(16, upload=coalesced)",
+                f"{self.SHADER}(16, policy=best_fit)",
+            ]
+        )
+        self.assertEqual(shader_requests[0].allocation_policy, AllocationPolicy.BEST_FIT)
+        self.assertEqual(shader_requests[0].upload_mode, UploadMode.COALESCED)
+
+    def test_conflicts_are_reported_against_the_request_that_set_the_option(self):
+        first = f"{self.SHADER}(16, policy=best_fit)"
+        second = f"{self.SHADER}(16, policy=size_class)"
+        third = f"{self.SHADER}(16, policy=first_fit)"
+        shader_requests, output = self.validate([first, f"{self.SHADER}(16)", second, third])
+        self.assertIsNone(shader_requests)
+        self.assertIn(f"'{second}' sets 'policy' to size_class where '{first}' set it to best_fit", output)
+        self.assertIn(f"'{third}' sets 'policy' to first_fit where '{first}' set it to best_fit", output)
+
+    def test_options_are_checked_against_each_other_once_merged(self):
+        streaming = f"{self.SHADER}(16, upload=streaming)"
+        growing = f"{self.SHADER}(16, growth_factor=2)"
+        for specs in [[streaming], [growing]]:
+            shader_requests, _ = self.validate(specs)
+            self.assertIsNotNone(shader_requests)
+
+        shader_requests, output = self.validate([streaming, growing])
+        self.assertIsNone(shader_requests)
+        self.assertIn(f"'growth_factor' can't be combined with 'upload=streaming' in '{streaming} + {growing}'", output)
+
+
+if __name__ == "__main__":
+    unittest.main()